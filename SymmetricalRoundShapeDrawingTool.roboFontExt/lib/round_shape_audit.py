@@ -0,0 +1,379 @@
+"""
+Find the contours in a font that are symmetrical round shapes and recover
+their bounds and factors.
+
+    python round_shape_audit.py MyFont.ufo > shapes.jsonl
+    python round_shape_audit.py --processes 8 --layers "*" A.ufo B.ufo
+
+Every round shape found is one JSON line, in the same form the command
+line tool reads, with the contour index added. A contour is first checked
+on its point count and point types, only the contours with the structure
+the tool draws get to the float math. The factors are solved from the
+corners in closed form and the shape is drawn again to check it.
+The glyphs are read in chunks, spread over a number of processes.
+"""
+
+import argparse
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from round_shape_geometry import RoundShape, ShapeOutline
+
+
+# four curves with two off curve points each, with or without a flat between them
+_structurePattern = re.compile("(l?ooc){4}")
+_typeCodes = {None: "o", "line": "l", "curve": "c"}
+
+
+def isRoundShapeStructure(segmentTypes):
+    """
+    True when the point segment types of a closed contour are the way the
+    tool adds a shape: 12 to 16 points, four curves and up to four flats.
+    """
+    if not 12 <= len(segmentTypes) <= 16:
+        return False
+    codes = []
+    for segmentType in segmentTypes:
+        code = _typeCodes.get(segmentType)
+        if code is None:
+            return False
+        codes.append(code)
+    codes = "".join(codes)
+    # start right after a curve, so the contour ends with one
+    index = codes.find("c")
+    if index == -1:
+        return False
+    codes = codes[index+1:] + codes[:index+1]
+    return _structurePattern.fullmatch(codes) is not None
+
+
+def _flatFactor(values, low, high):
+    # a flat from the on curve points on one side, the one left of a
+    # dropped flat is still off the middle by half its length
+    if not values:
+        return None
+    if len(values) == 1:
+        return abs(2 * values[0] - low - high) / (high - low)
+    return (max(values) - min(values)) / (high - low)
+
+
+def _average(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return sum(values) / len(values)
+
+
+# a contour this close to the shape drawn again is the shape
+_exactDeviation = 1e-6
+
+
+def _lowHigh(values, tolerance):
+    # the two sides of the box in one direction, every value on one of them
+    low, high = min(values), max(values)
+    for value in values:
+        if value - low > tolerance and high - value > tolerance:
+            return None
+    return low, high
+
+
+def solveRoundShape(points, tolerance=1):
+    """
+    Recover the RoundShape of a contour with the round shape structure,
+    `points` are (x, y, segmentType) in contour order. Returns None when
+    the contour is not a round shape within `tolerance` font units.
+
+    Each curve goes from a vertical side of the box to a horizontal side,
+    so the on curve points are on the sides in one of two ways around the
+    contour. The box comes from the sides and not from the extremes of
+    the points: with flats over 1 the tangents are outside the box. When
+    both ways fit, which can happen with flats close to 1, the closest
+    fit wins.
+    """
+    count = len(points)
+    # the on curve points at both ends of each curve
+    curves = [((index - 3) % count, index) for index, point in enumerate(points) if point[2] == "curve"]
+    if len(curves) != 4:
+        return None
+    # the first curve starts on a vertical side when its first bcp is
+    # above or below it, try that way first
+    start = curves[0][0]
+    dx = points[(start + 1) % count][0] - points[start][0]
+    dy = points[(start + 1) % count][1] - points[start][1]
+    parities = (0, 1) if abs(dx) <= abs(dy) else (1, 0)
+    best = None
+    for parity in parities:
+        solved = _solveRoundShape(points, curves, parity, tolerance)
+        if solved is None:
+            continue
+        if solved[1] <= _exactDeviation:
+            return solved[0]
+        if best is None or solved[1] < best[1]:
+            best = solved
+    if best is None:
+        return None
+    return best[0]
+
+
+def _solveRoundShape(points, curves, parity, tolerance):
+    # the curves with an index of this parity start on a vertical side,
+    # returns the shape and how far the contour is off from it
+    count = len(points)
+    vertical = set()
+    horizontal = set()
+    orientedCurves = []
+    for index, (start, end) in enumerate(curves):
+        if index % 2 == parity:
+            vertical.add(start)
+            horizontal.add(end)
+            orientedCurves.append((start, end, 1))
+        else:
+            horizontal.add(start)
+            vertical.add(end)
+            orientedCurves.append((end, start, -1))
+    onCurve = set(index for index, point in enumerate(points) if point[2] is not None)
+    if vertical & horizontal or vertical | horizontal != onCurve:
+        return None
+    xs = _lowHigh([points[index][0] for index in vertical], tolerance)
+    ys = _lowHigh([points[index][1] for index in horizontal], tolerance)
+    if xs is None or ys is None:
+        return None
+    xMin, xMax = xs
+    yMin, yMax = ys
+    width = xMax - xMin
+    height = yMax - yMin
+    if width <= 0 or height <= 0:
+        return None
+    centerX = xMin + .5 * width
+    centerY = yMin + .5 * height
+    # on curve points per side: top, right, bottom, left,
+    # x on the horizontal sides, y on the vertical sides
+    sides = ([], [], [], [])
+    for index in vertical:
+        x, y, segmentType = points[index]
+        sides[3 if x < centerX else 1].append(y)
+    for index in horizontal:
+        x, y, segmentType = points[index]
+        sides[2 if y < centerY else 0].append(x)
+    if any(len(side) > 2 for side in sides):
+        return None
+    flatFactor_x = _average([_flatFactor(sides[0], xMin, xMax), _flatFactor(sides[2], xMin, xMax)])
+    flatFactor_y = _average([_flatFactor(sides[1], yMin, yMax), _flatFactor(sides[3], yMin, yMax)])
+    if flatFactor_x is None or flatFactor_y is None:
+        return None
+    # distances from the corners to the tangents, below 0 with flats over 1
+    dh = .5 * width * (1 - flatFactor_x)
+    dv = .5 * height * (1 - flatFactor_y)
+    bcps_x = []
+    bcps_y = []
+    for start, end, step in orientedCurves:
+        # from the end on the vertical side to the end on the horizontal side
+        p0 = points[start]
+        p1 = points[(start + step) % count]
+        p2 = points[(end - step) % count]
+        p3 = points[end]
+        cornerX = xMin if p0[0] < centerX else xMax
+        cornerY = yMin if p3[1] < centerY else yMax
+        # towards the tangents is positive, with a tangent in the corner
+        # any bcp factor draws the same points
+        if dv:
+            bcps_y.append((p1[1] - cornerY) / (dv if cornerY == yMin else -dv))
+        if dh:
+            bcps_x.append((p2[0] - cornerX) / (dh if cornerX == xMin else -dh))
+    bcpFactor_x = _average(bcps_x)
+    bcpFactor_y = _average(bcps_y)
+    shape = RoundShape(
+        xMin, yMin, xMax, yMax,
+        flatFactor_x, flatFactor_y,
+        0 if bcpFactor_x is None else bcpFactor_x,
+        0 if bcpFactor_y is None else bcpFactor_y,
+    )
+    # a flat is there when its side has two on curve points
+    keptFlats = tuple(len(side) == 2 for side in sides)
+    expected = ShapeOutline(shape).contourPoints(keptFlats=keptFlats)
+    if len(expected) != len(points):
+        return None
+    deviation = _contourDeviation(expected, points, tolerance)
+    if deviation is None:
+        return None
+    return shape, deviation
+
+
+def _contourDeviation(expected, points, tolerance):
+    # the largest distance of a point to the expected one, from the start
+    # point and in the direction that fit best, None when over tolerance
+    x, y = points[0][0], points[0][1]
+    count = len(points)
+    best = None
+    for start, (pt, segmentType, smooth) in enumerate(expected):
+        if abs(pt[0] - x) > tolerance or abs(pt[1] - y) > tolerance:
+            continue
+        for step in (1, -1):
+            deviation = 0
+            for index in range(count):
+                expectedPt = expected[(start + step * index) % count][0]
+                point = points[index]
+                deviation = max(deviation, abs(expectedPt[0] - point[0]), abs(expectedPt[1] - point[1]))
+                if deviation > tolerance:
+                    break
+            else:
+                if best is None or deviation < best:
+                    best = deviation
+    return best
+
+
+class RoundShapeFinder(object):
+
+    """
+    A point pen that finds the round shapes in what is drawn into it.
+
+    `shapes` is a list of (contourIndex, identifier, RoundShape).
+    """
+
+    def __init__(self, tolerance=1):
+        self.tolerance = tolerance
+        self.shapes = []
+        self.contourCount = 0
+        self._points = None
+        self._identifier = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._points = []
+        self._identifier = identifier
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self._points.append((pt[0], pt[1], segmentType))
+
+    def endPath(self):
+        points = self._points
+        self._points = None
+        index = self.contourCount
+        self.contourCount += 1
+        if not isRoundShapeStructure([point[2] for point in points]):
+            return
+        shape = solveRoundShape(points, self.tolerance)
+        if shape is not None:
+            self.shapes.append((index, self._identifier, shape))
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        pass
+
+
+def findRoundShapes(glyph, tolerance=1):
+    """
+    The round shapes in a glyph with a drawPoints method, such as a
+    fontParts glyph, as (contourIndex, identifier, RoundShape).
+    """
+    finder = RoundShapeFinder(tolerance)
+    glyph.drawPoints(finder)
+    return finder.shapes
+
+
+def shapeRecord(shape, glyphName, layerName=None, contourIndex=None, identifier=None, digits=6):
+    # a dict the command line tool can read back
+    record = dict(glyph=glyphName)
+    if layerName is not None:
+        record["layer"] = layerName
+    for name in ("xMin", "yMin", "xMax", "yMax", "flatFactor_x", "flatFactor_y", "bcpFactor_x", "bcpFactor_y"):
+        record[name] = round(getattr(shape, name), digits)
+    record["contour"] = contourIndex
+    if identifier is not None:
+        record["identifier"] = identifier
+    return record
+
+
+class _GlifGlyph(object):
+    # receives the glyph attributes from GlyphSet.readGlyph
+    pass
+
+
+def auditGlyphs(job):
+    """
+    One chunk of work: the records of the round shapes in some glyphs of
+    one layer of a UFO. `job` is (ufoPath, layerName, glyphNames, tolerance).
+    """
+    from fontTools.ufoLib import UFOReader
+    ufoPath, layerName, glyphNames, tolerance = job
+    glyphSet = UFOReader(ufoPath, validate=False).getGlyphSet(layerName, validateRead=False)
+    records = []
+    for glyphName in glyphNames:
+        finder = RoundShapeFinder(tolerance)
+        glyphSet.readGlyph(glyphName, _GlifGlyph(), finder, validate=False)
+        for contourIndex, identifier, shape in finder.shapes:
+            record = shapeRecord(shape, glyphName, layerName, contourIndex, identifier)
+            record["ufo"] = ufoPath
+            records.append(record)
+    return records
+
+
+def auditJobs(ufoPaths, layerNames=None, chunkSize=500, tolerance=1):
+    # the jobs for auditGlyphs, in chunks of glyph names
+    from fontTools.ufoLib import UFOReader
+    for ufoPath in ufoPaths:
+        reader = UFOReader(ufoPath, validate=False)
+        names = reader.getLayerNames()
+        if layerNames is None:
+            names = [reader.getDefaultLayerName()]
+        elif layerNames != "*":
+            names = [name for name in names if name in layerNames]
+        for layerName in names:
+            glyphNames = sorted(reader.getGlyphSet(layerName, validateRead=False).keys())
+            for index in range(0, len(glyphNames), chunkSize):
+                yield ufoPath, layerName, glyphNames[index:index+chunkSize], tolerance
+
+
+def auditUFOs(ufoPaths, output, layerNames=None, processes=1, chunkSize=500, tolerance=1):
+    """
+    Write a JSON line to `output` for every round shape in the UFOs, as
+    soon as the chunk it is in is done. Returns the number of shapes.
+    """
+    jobs = auditJobs(ufoPaths, layerNames, chunkSize, tolerance)
+    count = 0
+    if processes > 1:
+        executor = ProcessPoolExecutor(max_workers=processes)
+        results = executor.map(auditGlyphs, jobs)
+    else:
+        executor = None
+        results = map(auditGlyphs, jobs)
+    try:
+        for records in results:
+            for record in records:
+                output.write(json.dumps(record, separators=(",", ":")))
+                output.write("\n")
+            count += len(records)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return count
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Find the symmetrical round shapes in UFOs."
+    )
+    parser.add_argument("ufos", nargs="+", metavar="UFO")
+    parser.add_argument("--layers", help="comma separated layer names, * for all layers, the default layer by default")
+    parser.add_argument("--output", default="-", help="JSONL file for the shapes, - for stdout")
+    parser.add_argument("--processes", type=int, default=1, help="number of processes")
+    parser.add_argument("--chunk-size", type=int, default=500, help="number of glyphs per job")
+    parser.add_argument("--tolerance", type=float, default=1, help="distance in font units a point can be off")
+    options = parser.parse_args(args)
+    layerNames = options.layers
+    if layerNames and layerNames != "*":
+        layerNames = layerNames.split(",")
+    if options.output == "-":
+        output = sys.stdout
+    else:
+        output = open(options.output, "w", encoding="utf-8")
+    try:
+        count = auditUFOs(options.ufos, output, layerNames, options.processes, options.chunk_size, options.tolerance)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print("%d round shapes" % count, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
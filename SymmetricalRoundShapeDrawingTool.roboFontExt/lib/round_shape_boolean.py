@@ -0,0 +1,283 @@
+"""
+Union or subtract the round shape with the contours of the glyph, on a
+worker thread, for a live preview while dragging.
+
+The glyph is copied to plain point data at mouseDown, the worker never
+touches the glyph. Only the contours whose bounds overlap the shape take
+part, the others stay as they are, and so do the contours booleanOperations
+can't read: quadratic ones and ones without on curve points. Needs
+booleanOperations, which comes with RoboFont. It is imported on the first
+merge, not when RoboFont starts the tool.
+"""
+
+import threading
+
+
+# False until the first merge, None when booleanOperations is not installed
+_booleanOperationManager = False
+
+
+def getBooleanOperationManager():
+    global _booleanOperationManager
+    if _booleanOperationManager is False:
+        try:
+            from booleanOperations import BooleanOperationManager
+        except ImportError:
+            BooleanOperationManager = None
+        _booleanOperationManager = BooleanOperationManager
+    return _booleanOperationManager
+
+
+booleanOperationNames = {
+    "union": "union with the glyph",
+    "subtract": "subtract from the glyph",
+}
+
+
+class ContourSnapshot(object):
+
+    """
+    The points of one contour as (pt, segmentType, smooth), with the
+    bounds of all its points. Draws into a point pen, the way
+    booleanOperations reads contours. `index` is the index of the contour
+    in the glyph.
+    """
+
+    def __init__(self, points, identifier=None, index=None):
+        self.points = points
+        self.identifier = identifier
+        self.index = index
+        xs = [pt[0] for pt, segmentType, smooth in points]
+        ys = [pt[1] for pt, segmentType, smooth in points]
+        self.bounds = min(xs), min(ys), max(xs), max(ys)
+
+    def __len__(self):
+        return len(self.points)
+
+    def overlaps(self, bounds):
+        xMin, yMin, xMax, yMax = self.bounds
+        return xMin <= bounds[2] and bounds[0] <= xMax and yMin <= bounds[3] and bounds[1] <= yMax
+
+    def drawPoints(self, pointPen):
+        pointPen.beginPath(identifier=self.identifier)
+        for pt, segmentType, smooth in self.points:
+            pointPen.addPoint(pt, segmentType, smooth)
+        pointPen.endPath()
+
+
+def _supported(points):
+    # booleanOperations needs an on curve point and no quadratic segments
+    segmentTypes = set(segmentType for pt, segmentType, smooth in points)
+    return "qcurve" not in segmentTypes and segmentTypes != {None}
+
+
+class _SnapshotPen(object):
+    # a point pen that keeps the closed cubic contours, not the components
+
+    def __init__(self, skipIdentifier=None):
+        self.skipIdentifier = skipIdentifier
+        self.contours = []
+        self.contourCount = 0
+        self._points = None
+        self._identifier = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._points = []
+        self._identifier = identifier
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self._points.append(((pt[0], pt[1]), segmentType, smooth))
+
+    def endPath(self):
+        points = self._points
+        self._points = None
+        index = self.contourCount
+        self.contourCount += 1
+        if not points or points[0][1] == "move" or not _supported(points):
+            return
+        if self._identifier is not None and self._identifier == self.skipIdentifier:
+            return
+        self.contours.append(ContourSnapshot(points, self._identifier, index))
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        pass
+
+
+def glyphSnapshot(glyph, skipIdentifier=None):
+    """
+    The closed contours of a glyph as a list of ContourSnapshot, without
+    the contour with `skipIdentifier`, the shape that is being edited.
+    """
+    pen = _SnapshotPen(skipIdentifier)
+    glyph.drawPoints(pen)
+    return pen.contours
+
+
+class _ContourPen(object):
+    # a point pen that collects the result of booleanOperations
+
+    def __init__(self):
+        self.contours = []
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.contours.append([])
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self.contours[-1].append(((pt[0], pt[1]), segmentType, smooth))
+
+    def endPath(self):
+        pass
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        pass
+
+
+def booleanShape(snapshot, shapeContour, operation):
+    """
+    Union the ContourSnapshot `shapeContour` with the contours of
+    `snapshot` that it overlaps, or subtract it from them. Returns the
+    indexes of those contours in the snapshot and the contours that
+    replace them, as lists of (pt, segmentType, smooth).
+    """
+    involved = [index for index, contour in enumerate(snapshot) if contour.overlaps(shapeContour.bounds)]
+    contours = [snapshot[index] for index in involved]
+    BooleanOperationManager = getBooleanOperationManager()
+    pen = _ContourPen()
+    if operation == "union":
+        BooleanOperationManager.union(contours + [shapeContour], pen)
+    elif operation == "subtract":
+        BooleanOperationManager.difference(contours, [shapeContour], pen)
+    else:
+        raise ValueError("unknown boolean operation: %r" % operation)
+    return involved, pen.contours
+
+
+def drawContours(pen, contours):
+    # draw the point contours into a segment pen
+    from fontTools.pens.pointPen import PointToSegmentPen
+    drawPointContours(PointToSegmentPen(pen), contours)
+
+
+def drawPointContours(pointPen, contours):
+    for points in contours:
+        pointPen.beginPath()
+        for pt, segmentType, smooth in points:
+            pointPen.addPoint(pt, segmentType, smooth)
+        pointPen.endPath()
+
+
+class BooleanPreview(object):
+
+    """
+    Runs booleanShape on a worker thread, against the snapshot of the
+    glyph given to `start`.
+
+    `submit` replaces the job that is waiting, so the worker only ever
+    starts on the newest parameters, the jobs in between are cancelled.
+    A job that is already running finishes, its result is kept when it
+    is newer than the last one. `result` returns the latest finished
+    (generation, involved, contours), or None. A job that fails keeps its
+    exception in `lastError` until a newer job finishes. `notify` is called
+    on the worker thread when a job is done or failed, hand it to the main
+    thread there.
+    """
+
+    def __init__(self, notify=None):
+        self.notify = notify
+        self.generation = 0
+        self.cancelledCount = 0
+        self.finishedCount = 0
+        self.failedCount = 0
+        self.lastError = None
+        self._condition = threading.Condition()
+        self._snapshot = None
+        self._operation = None
+        self._pending = None
+        self._running = False
+        self._result = None
+        # results of jobs from before the last start or cancel are dropped
+        self._firstGeneration = 0
+        self._thread = None
+
+    def start(self, snapshot, operation):
+        with self._condition:
+            self.cancel()
+            self._snapshot = snapshot
+            self._operation = operation
+
+    def submit(self, shapeContour):
+        with self._condition:
+            if self._snapshot is None:
+                return None
+            self.generation += 1
+            if self._pending is not None:
+                self.cancelledCount += 1
+            self._pending = self.generation, self._snapshot, self._operation, shapeContour
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="RoundShapeBooleanPreview", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return self.generation
+
+    def cancel(self):
+        with self._condition:
+            if self._pending is not None:
+                self.cancelledCount += 1
+            self._pending = None
+            self._result = None
+            self.lastError = None
+            self._snapshot = None
+            self.generation += 1
+            self._firstGeneration = self.generation
+
+    def result(self):
+        with self._condition:
+            return self._result
+
+    def wait(self, timeout=None):
+        # wait until the worker is done, returns the result of the last submitted job or None
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending is None and not self._running, timeout)
+            if self._result is None or self._result[0] != self.generation:
+                return None
+            return self._result
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                generation, snapshot, operation, shapeContour = self._pending
+                self._pending = None
+                self._running = True
+            result = error = None
+            try:
+                result = booleanShape(snapshot, shapeContour, operation)
+            except Exception as exception:
+                # whatever goes wrong, the worker stays to run the next job
+                error = exception
+            finally:
+                finished = self._finish(generation, result, error)
+            if finished and self.notify is not None:
+                self.notify()
+
+    def _finish(self, generation, result, error=None):
+        # keep the result or the error of a job, unless it is older than the last one
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            if generation < self._firstGeneration:
+                return False
+            if self._result is not None and self._result[0] > generation:
+                return False
+            if error is not None:
+                self.lastError = error
+                self.failedCount += 1
+                return True
+            if result is None:
+                return False
+            involved, contours = result
+            self._result = generation, involved, contours
+            self.lastError = None
+            self.finishedCount += 1
+            return True
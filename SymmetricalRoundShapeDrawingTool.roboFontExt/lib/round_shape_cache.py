@@ -0,0 +1,62 @@
+"""
+Least recently used cache of round shape outlines.
+
+The outlines are keyed on the exact bounds and factors of the shape, so a
+cached outline has the same points as RoundShape.points. It only pays off
+when the same shapes come back, a new ShapeOutline is cheap as well.
+"""
+
+from collections import OrderedDict
+
+from round_shape_geometry import ShapeOutline
+
+
+class OutlineCache(object):
+
+    """
+    Cache the outlines of the most recently used shapes.
+
+    `maxSize` is the number of outlines kept. The hits, misses and
+    evictions are counted.
+    """
+
+    def __init__(self, maxSize=256):
+        self.maxSize = maxSize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def resetCounters(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return dict(
+            size=len(self._entries),
+            maxSize=self.maxSize,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+    def outline(self, shape):
+        # the ShapeOutline of a RoundShape, the same points as the shape
+        key = shape.key()
+        entries = self._entries
+        outline = entries.get(key)
+        if outline is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return outline
+        self.misses += 1
+        outline = entries[key] = ShapeOutline(shape)
+        while len(entries) > max(self.maxSize, 1):
+            entries.popitem(last=False)
+            self.evictions += 1
+        return outline
@@ -0,0 +1,246 @@
+"""
+Add symmetrical round shapes to UFOs from the command line.
+
+    python round_shape_cli.py shapes.jsonl MyFont.ufo
+    python round_shape_cli.py --processes 4 a.csv A.ufo b.csv B.ufo
+
+Each line of a JSONL file, or each row of a CSV file with a header, is
+one shape:
+
+    {"glyph": "period", "xMin": 40, "yMin": 0, "xMax": 160, "yMax": 120,
+     "flatFactor_x": 0.25, "flatFactor_y": 0, "bcpFactor_x": 0.2,
+     "bcpFactor_y": 0.2, "layer": "background"}
+
+The factors default to the tool defaults, the layer to the default layer.
+The shapes are calculated and cleaned up the same way the tool adds them.
+The specs are read one at a time and the glyphs are written in batches,
+so the size of the spec file does not matter. Pairs of spec files and
+UFOs are independent and can be spread over a number of processes.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fontTools.pens.recordingPen import RecordingPointPen
+from fontTools.ufoLib import UFOWriter, DEFAULT_LAYER_NAME, DEFAULT_GLYPHS_DIRNAME
+
+from round_shape_geometry import RoundShape, ShapeOutline, flatTolerance
+
+
+defaultFactors = dict(
+    flatFactor_x=.25,
+    flatFactor_y=0,
+    bcpFactor_x=.2,
+    bcpFactor_y=.2,
+)
+
+boundsKeys = ("xMin", "yMin", "xMax", "yMax")
+
+
+def _coordinate(value):
+    # whole numbers stay ints, the way the tool rounds the mouse position
+    value = float(value)
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+class ShapeSpec(object):
+
+    __slots__ = ("glyphName", "layerName", "shape")
+
+    def __init__(self, glyphName, layerName, shape):
+        self.glyphName = glyphName
+        self.layerName = layerName
+        self.shape = shape
+
+    @classmethod
+    def fromDict(cls, data):
+        glyphName = data.get("glyph")
+        if not glyphName:
+            raise ValueError("no glyph name")
+        values = {}
+        for key in boundsKeys:
+            if data.get(key) in (None, ""):
+                raise ValueError("no %s" % key)
+            values[key] = _coordinate(data[key])
+        for key, default in defaultFactors.items():
+            value = data.get(key)
+            values[key] = default if value in (None, "") else float(value)
+        shape = RoundShape(
+            min(values["xMin"], values["xMax"]), min(values["yMin"], values["yMax"]),
+            max(values["xMin"], values["xMax"]), max(values["yMin"], values["yMax"]),
+            values["flatFactor_x"], values["flatFactor_y"],
+            values["bcpFactor_x"], values["bcpFactor_y"]
+        )
+        return cls(glyphName, data.get("layer") or None, shape)
+
+
+def _openSpecFile(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, newline="", encoding="utf-8")
+
+
+def guessFormat(path):
+    if path.lower().endswith(".csv"):
+        return "csv"
+    return "jsonl"
+
+
+def readSpecs(path, format=None):
+    """
+    Yield a ShapeSpec for every line or row in the file at `path`, "-" reads
+    from stdin. The format is "jsonl" or "csv", guessed from the extension.
+    """
+    if format is None:
+        format = guessFormat(path)
+    f = _openSpecFile(path)
+    try:
+        if format == "csv":
+            rows = csv.DictReader(f)
+            # the header is line 1
+            lines = ((rows.line_num, row) for row in rows)
+        else:
+            lines = ((lineNumber, line) for lineNumber, line in enumerate(f, 1) if line.strip())
+        for lineNumber, data in lines:
+            try:
+                if format != "csv":
+                    data = json.loads(data)
+                yield ShapeSpec.fromDict(data)
+            except ValueError as error:
+                raise ValueError("%s, line %d: %s" % (path, lineNumber, error))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class _GlifGlyph(object):
+    # receives the glyph attributes from GlyphSet.readGlyph
+    pass
+
+
+class UFOShapeWriter(object):
+
+    """
+    Add shapes to the glyphs of a UFO, a batch of glyphs at a time.
+
+    Each glyph in a batch is read once, gets all its new contours and is
+    written once. The UFO is created if it does not exist.
+    Call `close` to write the contents files.
+    """
+
+    def __init__(self, path, batchSize=10000):
+        self.writer = UFOWriter(path)
+        self.batchSize = batchSize
+        self.glyphSets = {}
+        self.shapeCount = 0
+        self.glyphWriteCount = 0
+        self._pending = {}
+        self._pendingCount = 0
+        # a UFO always needs a default layer
+        self.defaultLayerName = DEFAULT_LAYER_NAME
+        for layerName, directory in self.writer.layerContents.items():
+            if directory == DEFAULT_GLYPHS_DIRNAME:
+                self.defaultLayerName = layerName
+        self._getGlyphSet(None)
+
+    def _getGlyphSet(self, layerName):
+        if layerName is None:
+            layerName = self.defaultLayerName
+        glyphSet = self.glyphSets.get(layerName)
+        if glyphSet is None:
+            glyphSet = self.writer.getGlyphSet(
+                layerName,
+                defaultLayer=layerName == self.defaultLayerName
+            )
+            self.glyphSets[layerName] = glyphSet
+        return glyphSet
+
+    def addSpec(self, spec):
+        key = spec.layerName, spec.glyphName
+        self._pending.setdefault(key, []).append(spec.shape)
+        self._pendingCount += 1
+        if self._pendingCount >= self.batchSize:
+            self.flush()
+
+    def flush(self):
+        for (layerName, glyphName), shapes in self._pending.items():
+            glyphSet = self._getGlyphSet(layerName)
+            glyph = _GlifGlyph()
+            existing = RecordingPointPen()
+            if glyphName in glyphSet:
+                glyphSet.readGlyph(glyphName, glyph, existing)
+            # the outline of each shape itself, the way the tool adds it
+            outlines = [ShapeOutline(shape) for shape in shapes]
+
+            def drawPoints(pointPen):
+                existing.replay(pointPen)
+                for outline in outlines:
+                    outline.drawPoints(pointPen, flatTolerance=flatTolerance)
+
+            glyphSet.writeGlyph(glyphName, glyph, drawPoints)
+            self.shapeCount += len(shapes)
+            self.glyphWriteCount += 1
+        self._pending = {}
+        self._pendingCount = 0
+
+    def close(self):
+        self.flush()
+        for glyphSet in self.glyphSets.values():
+            glyphSet.writeContents()
+        self.writer.writeLayerContents()
+
+
+def addShapesToUFO(specPath, ufoPath, format=None, batchSize=10000):
+    # one job: all shapes in one spec file into one UFO
+    start = time.monotonic()
+    shapeWriter = UFOShapeWriter(ufoPath, batchSize=batchSize)
+    for spec in readSpecs(specPath, format):
+        shapeWriter.addSpec(spec)
+    shapeWriter.close()
+    return dict(
+        specs=specPath,
+        ufo=ufoPath,
+        shapes=shapeWriter.shapeCount,
+        glyphWrites=shapeWriter.glyphWriteCount,
+        seconds=time.monotonic() - start,
+    )
+
+
+def _addShapesToUFO(job):
+    return addShapesToUFO(*job)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Add symmetrical round shapes to UFOs."
+    )
+    parser.add_argument("jobs", nargs="+", metavar="SPECS UFO", help="pairs of a JSONL or CSV spec file (- for stdin) and a UFO")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="format of the spec files, guessed from the extension by default")
+    parser.add_argument("--batch-size", type=int, default=10000, help="number of shapes to collect before glyphs are written")
+    parser.add_argument("--processes", type=int, default=1, help="number of processes for independent UFOs")
+    options = parser.parse_args(args)
+    if len(options.jobs) % 2:
+        parser.error("specs and UFOs come in pairs")
+    jobs = [
+        (options.jobs[index], options.jobs[index+1], options.format, options.batch_size)
+        for index in range(0, len(options.jobs), 2)
+    ]
+    if len(set(job[1] for job in jobs)) != len(jobs):
+        parser.error("each UFO can only be in one pair")
+    if options.processes > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=options.processes) as executor:
+            results = list(executor.map(_addShapesToUFO, jobs))
+    else:
+        results = [_addShapesToUFO(job) for job in jobs]
+    for result in results:
+        print("%(ufo)s: %(shapes)d shapes, %(glyphWrites)d glyph writes, %(seconds).2f s" % result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Find a contour in a glyph that is the same as the one about to be added.
+
+Every contour gets a key: its points rounded to a grid, starting at the
+same point and going the same way whatever the start point and the
+direction of the contour. The keys of a glyph are kept in a dict, read
+the first time the glyph is asked for and again when it changed, so a
+duplicate is a dict lookup and not a comparison with every contour.
+Works with fontParts glyphs.
+"""
+
+import weakref
+
+
+def contourKey(points, quantum=1):
+    """
+    The key of a contour from its (x, y, onCurve) points. Points that
+    round to the same multiple of `quantum` make the same key.
+    """
+    items = [(round(x / quantum), round(y / quantum), onCurve) for x, y, onCurve in points]
+    key = None
+    for sequence in (items, items[::-1]):
+        # start at the lowest point, try all starts when there is a tie
+        first = min(sequence)
+        for index, item in enumerate(sequence):
+            if item != first:
+                continue
+            rotated = tuple(sequence[index:] + sequence[:index])
+            if key is None or rotated < key:
+                key = rotated
+    return key
+
+
+def glyphContourKey(contour, quantum=1):
+    # the key of a contour in a glyph
+    return contourKey(
+        [(point.x, point.y, point.type not in (None, "offcurve")) for point in contour.points],
+        quantum
+    )
+
+
+def shapeContourKey(contourPoints, quantum=1):
+    # the key of the (pt, segmentType, smooth) points of a ShapeOutline
+    return contourKey(
+        [(pt[0], pt[1], segmentType is not None) for pt, segmentType, smooth in contourPoints],
+        quantum
+    )
+
+
+class _GlyphKeys(object):
+
+    __slots__ = ("contourCount", "keys")
+
+    def __init__(self, contourCount, keys):
+        self.contourCount = contourCount
+        # key: [contour index]
+        self.keys = keys
+
+
+class FontContourIndex(object):
+
+    """
+    The contour keys of the glyphs of one font. Call `glyphChanged` when
+    a glyph changes, only that glyph is read again. The glyphs are asked
+    for their contours with len(glyph) and glyph[index], the way fontParts
+    glyphs do it, without making all contours. A glyph with another
+    number of contours than was read is read again anyway, and a found
+    contour is checked before it is returned.
+    """
+
+    def __init__(self, quantum=1):
+        self.quantum = quantum
+        self._glyphs = {}
+        self.readCount = 0
+
+    def _key(self, glyph):
+        layer = getattr(glyph, "layer", None)
+        return getattr(layer, "name", None), glyph.name
+
+    def _read(self, glyph):
+        keys = {}
+        for index, contour in enumerate(glyph.contours):
+            keys.setdefault(glyphContourKey(contour, self.quantum), []).append(index)
+        self.readCount += 1
+        return _GlyphKeys(len(glyph.contours), keys)
+
+    def _glyphKeys(self, glyph):
+        name = self._key(glyph)
+        glyphKeys = self._glyphs.get(name)
+        if glyphKeys is None or glyphKeys.contourCount != len(glyph):
+            glyphKeys = self._glyphs[name] = self._read(glyph)
+        return glyphKeys
+
+    def find(self, glyph, key):
+        """
+        The index of a contour in the glyph with `key`, or None.
+        """
+        indexes = self._glyphKeys(glyph).keys.get(key)
+        if not indexes:
+            return None
+        index = indexes[0]
+        if index < len(glyph) and glyphContourKey(glyph[index], self.quantum) == key:
+            return index
+        # changed without a glyphChanged, read it again
+        self._glyphs[self._key(glyph)] = glyphKeys = self._read(glyph)
+        indexes = glyphKeys.keys.get(key)
+        if not indexes:
+            return None
+        return indexes[0]
+
+    def contourAdded(self, glyph, key):
+        # a contour with `key` was drawn at the end of the glyph
+        glyphKeys = self._glyphs.get(self._key(glyph))
+        if glyphKeys is None or glyphKeys.contourCount != len(glyph) - 1:
+            return
+        glyphKeys.keys.setdefault(key, []).append(glyphKeys.contourCount)
+        glyphKeys.contourCount += 1
+
+    def glyphChanged(self, glyph):
+        self._glyphs.pop(self._key(glyph), None)
+
+    def clear(self):
+        self._glyphs.clear()
+
+
+_indexes = weakref.WeakKeyDictionary()
+# for glyphs without a font
+_fontlessIndex = FontContourIndex()
+
+
+def getFontContourIndex(font):
+    # one index per font, it goes away with the font
+    if font is None:
+        return _fontlessIndex
+    if hasattr(font, "naked"):
+        font = font.naked()
+    index = _indexes.get(font)
+    if index is None:
+        index = _indexes[font] = FontContourIndex()
+    return index
@@ -0,0 +1,507 @@
+"""
+Geometry of the symmetrical round shape.
+
+Shapes can be calculated, drawn into any segment pen and benchmarked
+outside of the application.
+"""
+
+import math
+from array import array
+
+# numpy is imported when a batch first needs it, not when RoboFont starts
+# the tool: False until then, None when it is not installed
+_numpy = False
+
+
+def getNumpy():
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+# bcp factor of the standard circle / ellipse approximation
+circleFactor = 1-0.552284749831
+
+# segment types and the number of points per segment, as buildShapePath draws them
+shapeSegments = [
+    ("moveTo", 1),
+    ("curveTo", 3),
+    ("lineTo", 1),
+    ("curveTo", 3),
+    ("lineTo", 1),
+    ("curveTo", 3),
+    ("lineTo", 1),
+    ("curveTo", 3),
+]
+
+# the x and y attribute of each of the 16 points, in drawing order
+shapePointNames = [
+    ("xMin", "t2_v"),
+    ("xMin", "b2_v"), ("b1_h", "yMax"), ("t1_h", "yMax"),
+    ("t2_h", "yMax"),
+    ("b2_h", "yMax"), ("xMax", "b2_v"), ("xMax", "t2_v"),
+    ("xMax", "t1_v"),
+    ("xMax", "b1_v"), ("b2_h", "yMin"), ("t2_h", "yMin"),
+    ("t1_h", "yMin"),
+    ("b1_h", "yMin"), ("xMin", "b1_v"), ("xMin", "t1_v"),
+]
+
+shapePointCount = len(shapePointNames)
+
+# the end points of the three line segments, the fourth flat closes the contour
+flatPointIndexes = [4, 8, 12]
+
+# the on curve points: the tangents, where the flats meet the curves
+onCurvePointIndexes = [0, 3, 4, 7, 8, 11, 12, 15]
+
+# flats that are this short, or shorter, are left out of the committed contour
+flatTolerance = 5
+
+# point pen segment types of the on curve points, the moveTo point closes the contour with a line
+pointSegmentTypes = dict(moveTo="line", lineTo="line", curveTo="curve")
+
+# on curve points with a straighter angle than this are smooth, as fontTools guesses them
+smoothAngleError = 0.05
+
+
+class RoundShape(object):
+
+    """
+    Immutable record of one calculated round shape.
+
+    The bounds are the normalised box of the shape, the tangents are where
+    the flats meet the curves and the bcps are the off curve points.
+    Suffix _h are x values on the horizontal sides, suffix _v are y values
+    on the vertical sides.
+    """
+
+    __slots__ = (
+        "xMin", "yMin", "xMax", "yMax", "width", "height",
+        "flatFactor_x", "flatFactor_y", "bcpFactor_x", "bcpFactor_y",
+        "t1_h", "t2_h", "t1_v", "t2_v",
+        "b1_h", "b2_h", "b1_v", "b2_v",
+    )
+
+    def __init__(self, xMin, yMin, xMax, yMax, flatFactor_x, flatFactor_y, bcpFactor_x, bcpFactor_y, width=None, height=None):
+        # width and height can be passed in when the caller already has them,
+        # xMax-xMin is not always the exact same float.
+        if width is None:
+            width = xMax - xMin
+        if height is None:
+            height = yMax - yMin
+        _set = object.__setattr__
+        _set(self, "xMin", xMin)
+        _set(self, "yMin", yMin)
+        _set(self, "xMax", xMax)
+        _set(self, "yMax", yMax)
+        _set(self, "width", width)
+        _set(self, "height", height)
+        _set(self, "flatFactor_x", flatFactor_x)
+        _set(self, "flatFactor_y", flatFactor_y)
+        _set(self, "bcpFactor_x", bcpFactor_x)
+        _set(self, "bcpFactor_y", bcpFactor_y)
+        self._calculateTangents()
+        self._calculateBcps()
+
+    def _calculateTangents(self):
+        _set = object.__setattr__
+        xMin = self.xMin
+        yMin = self.yMin
+        width = self.width
+        height = self.height
+        _set(self, "t1_v", yMin+.5*height-self.flatFactor_y*.5*height)
+        _set(self, "t2_v", yMin+.5*height+self.flatFactor_y*.5*height)
+        _set(self, "t1_h", xMin+.5*width-self.flatFactor_x*.5*width)
+        _set(self, "t2_h", xMin+.5*width+self.flatFactor_x*.5*width)
+
+    def _calculateBcps(self):
+        # the bcps depend on the tangents, calculate those first
+        _set = object.__setattr__
+        xMin = self.xMin
+        yMin = self.yMin
+        _set(self, "b1_v", yMin + self.bcpFactor_y*(self.t1_v-yMin))
+        _set(self, "b2_v", self.t2_v + (1-self.bcpFactor_y)*(self.yMax-self.t2_v))
+        _set(self, "b1_h", xMin + self.bcpFactor_x * (self.t1_h-xMin))
+        _set(self, "b2_h", self.t2_h + (1-self.bcpFactor_x) * (self.xMax-self.t2_h))
+
+    def _copy(self):
+        copy = RoundShape.__new__(RoundShape)
+        _set = object.__setattr__
+        for name in self.__slots__:
+            _set(copy, name, getattr(self, name))
+        return copy
+
+    def withFlatFactors(self, flatFactor_x, flatFactor_y, bcpFactor_x=None, bcpFactor_y=None):
+        # new shape with other flat factors, and optionally bcp factors,
+        # the bounds are reused: only the tangents and bcps are calculated.
+        copy = self._copy()
+        _set = object.__setattr__
+        _set(copy, "flatFactor_x", flatFactor_x)
+        _set(copy, "flatFactor_y", flatFactor_y)
+        if bcpFactor_x is not None:
+            _set(copy, "bcpFactor_x", bcpFactor_x)
+        if bcpFactor_y is not None:
+            _set(copy, "bcpFactor_y", bcpFactor_y)
+        copy._calculateTangents()
+        copy._calculateBcps()
+        return copy
+
+    def withBcpFactors(self, bcpFactor_x, bcpFactor_y):
+        # new shape with other bcp factors, the bounds and tangents are reused.
+        copy = self._copy()
+        _set = object.__setattr__
+        _set(copy, "bcpFactor_x", bcpFactor_x)
+        _set(copy, "bcpFactor_y", bcpFactor_y)
+        copy._calculateBcps()
+        return copy
+
+    def scaled(self, scale):
+        # new shape with the bounds scaled from the origin, the same factors
+        return RoundShape(
+            self.xMin * scale, self.yMin * scale, self.xMax * scale, self.yMax * scale,
+            self.flatFactor_x, self.flatFactor_y, self.bcpFactor_x, self.bcpFactor_y
+        )
+
+    def translated(self, dx, dy):
+        # new shape with the bounds moved, the same factors
+        return RoundShape(
+            self.xMin + dx, self.yMin + dy, self.xMax + dx, self.yMax + dy,
+            self.flatFactor_x, self.flatFactor_y, self.bcpFactor_x, self.bcpFactor_y
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RoundShape is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RoundShape is immutable")
+
+    def __repr__(self):
+        return "<RoundShape %r %r %r %r flat %r %r bcp %r %r>" % (
+            self.xMin, self.yMin, self.xMax, self.yMax,
+            self.flatFactor_x, self.flatFactor_y, self.bcpFactor_x, self.bcpFactor_y
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, RoundShape):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self):
+        return (
+            self.xMin, self.yMin, self.xMax, self.yMax, self.width, self.height,
+            self.flatFactor_x, self.flatFactor_y, self.bcpFactor_x, self.bcpFactor_y
+        )
+
+    def tangents(self):
+        # the 4 tangent coordinates: x on the horizontal sides, y on the vertical sides
+        return self.t1_h, self.t2_h, self.t1_v, self.t2_v
+
+    def bcps(self):
+        # the 4 bcp coordinates: x on the horizontal sides, y on the vertical sides
+        return self.b1_h, self.b2_h, self.b1_v, self.b2_v
+
+    def segments(self):
+        # the segments in the order buildShapePath draws them
+        return pointsToSegments(self.points())
+
+    def points(self):
+        # all 16 points of the contour, in drawing order
+        xMin = self.xMin
+        yMin = self.yMin
+        xMax = self.xMax
+        yMax = self.yMax
+        return [
+            (xMin, self.t2_v),
+            (xMin, self.b2_v), (self.b1_h, yMax), (self.t1_h, yMax),
+            (self.t2_h, yMax),
+            (self.b2_h, yMax), (xMax, self.b2_v), (xMax, self.t2_v),
+            (xMax, self.t1_v),
+            (xMax, self.b1_v), (self.b2_h, yMin), (self.t2_h, yMin),
+            (self.t1_h, yMin),
+            (self.b1_h, yMin), (xMin, self.b1_v), (xMin, self.t1_v),
+        ]
+
+    def draw(self, pen):
+        return drawShapePoints(pen, self.points())
+
+
+class ShapeOutline(object):
+
+    """
+    The points of one RoundShape, calculated once, as a flat list of x, y
+    values. The values keep their type, an int corner is written to the
+    glyph as an int. Outlines from coordinates keep them in an array of
+    doubles.
+
+    Draw it into as many pens as needed. With a `flatTolerance` the flats
+    that are too short are left out, the way the shape is added to a glyph.
+    """
+
+    __slots__ = ("shape", "coordinates")
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.coordinates = [value for point in shape.points() for value in point]
+
+    @classmethod
+    def fromCoordinates(cls, coordinates, shape=None):
+        # an outline from 32 x, y values, optionally for `shape`
+        outline = cls.__new__(cls)
+        outline.shape = shape
+        outline.coordinates = array("d", coordinates)
+        return outline
+
+    def matches(self, shape):
+        return shape is self.shape or shape == self.shape
+
+    def scaled(self, scale):
+        # a copy, scaled from the origin
+        shape = None
+        if self.shape is not None:
+            shape = self.shape.scaled(scale)
+        return ShapeOutline.fromCoordinates([value * scale for value in self.coordinates], shape)
+
+    def draw(self, pen, flatTolerance=None):
+        c = self.coordinates
+        index = 0
+        for segmentType, count in shapeSegments:
+            start = index * 2
+            index += count
+            if segmentType == "lineTo" and flatTolerance is not None:
+                # the previous on curve point is the start of the flat
+                if math.hypot(c[start-2]-c[start], c[start-1]-c[start+1]) <= flatTolerance:
+                    continue
+            pts = [(c[i], c[i+1]) for i in range(start, index * 2, 2)]
+            getattr(pen, segmentType)(*pts)
+        pen.closePath()
+        return pen
+
+    def keptFlats(self, flatTolerance=None):
+        """
+        Which flats end up in the contour: the three line segments, and
+        the closing flat, which is only left out when it has no length.
+        """
+        c = self.coordinates
+        kept = []
+        for index in flatPointIndexes:
+            if flatTolerance is None:
+                kept.append(True)
+            else:
+                # the previous on curve point is the start of the flat
+                i = index * 2
+                kept.append(math.hypot(c[i-2]-c[i], c[i-1]-c[i+1]) > flatTolerance)
+        kept.append(c[0] != c[-2] or c[1] != c[-1])
+        return tuple(kept)
+
+    def contourPoints(self, flatTolerance=None, keptFlats=None):
+        """
+        The points of the closed contour as (point, segmentType, smooth),
+        the way a segment pen converted to a point pen makes them: the
+        closing flat goes first, short flats are left out with a
+        `flatTolerance` and the smooth points are guessed. `keptFlats`,
+        as keptFlats returns them, overrides the flatTolerance.
+        """
+        if keptFlats is None:
+            keptFlats = self.keptFlats(flatTolerance)
+        c = self.coordinates
+        points = []
+        index = 0
+        flatIndex = 0
+        for segmentType, count in shapeSegments:
+            start = index * 2
+            index += count
+            if segmentType == "lineTo":
+                flatIndex += 1
+                if not keptFlats[flatIndex - 1]:
+                    continue
+            for i in range(start, index * 2 - 2, 2):
+                points.append([(c[i], c[i+1]), None, False])
+            points.append([(c[index*2-2], c[index*2-1]), pointSegmentTypes[segmentType], False])
+        if not keptFlats[-1]:
+            # the closing flat has no length
+            points[0] = points.pop()
+        count = len(points)
+        for i in range(-1, count - 1):
+            pt, segmentType, smooth = points[i]
+            if segmentType is None:
+                continue
+            prevPt = points[i-1][0]
+            nextPt = points[i+1][0]
+            if points[i-1][1] is not None and points[i+1][1] is not None:
+                continue
+            if pt != prevPt and pt != nextPt:
+                a1 = math.atan2(pt[1] - prevPt[1], pt[0] - prevPt[0])
+                a2 = math.atan2(nextPt[1] - pt[1], nextPt[0] - pt[0])
+                if abs(a1 - a2) < smoothAngleError:
+                    points[i][2] = True
+        return [tuple(point) for point in points]
+
+    def drawPoints(self, pointPen, flatTolerance=None, keptFlats=None, identifier=None):
+        # draw the contour into a point pen in one pass
+        pointPen.beginPath(identifier=identifier)
+        for pt, segmentType, smooth in self.contourPoints(flatTolerance, keptFlats):
+            pointPen.addPoint(pt, segmentType, smooth)
+        pointPen.endPath()
+        return pointPen
+
+
+def jointKeptFlats(outlines, flatTolerance=None):
+    # a flat is kept when any of the outlines needs it
+    kept = None
+    for outline in outlines:
+        flats = outline.keptFlats(flatTolerance)
+        kept = flats if kept is None else tuple(a or b for a, b in zip(kept, flats))
+    return kept
+
+
+class MasterShapes(object):
+
+    """
+    One round shape in a number of masters, with one point structure.
+
+    A flat that is long enough in any master is kept in all of them, and
+    an on curve point that is smooth in any master is smooth in all, so
+    the contours are compatible.
+    """
+
+    def __init__(self, outlines, flatTolerance=None, keptFlats=None):
+        self.outlines = list(outlines)
+        if keptFlats is None:
+            keptFlats = jointKeptFlats(self.outlines, flatTolerance)
+        self.keptFlats = keptFlats
+
+    def __len__(self):
+        return len(self.outlines)
+
+    @classmethod
+    def calculate(cls, bounds, flatFactors, bcpFactors, flatTolerance=None):
+        """
+        Calculate the shape in all masters in one calculateShapes pass,
+        `bounds`, `flatFactors` and `bcpFactors` have one entry per master.
+        """
+        points = calculateShapes(bounds, flatFactors, bcpFactors)
+        keptFlats = None
+        numpy = getNumpy()
+        if numpy is not None:
+            start = points[:, [index - 1 for index in flatPointIndexes]]
+            end = points[:, flatPointIndexes]
+            if flatTolerance is None:
+                kept = [True] * len(flatPointIndexes)
+            else:
+                lengths = numpy.hypot(start[..., 0] - end[..., 0], start[..., 1] - end[..., 1])
+                kept = list((lengths > flatTolerance).any(axis=0))
+            kept.append((points[:, 0] != points[:, -1]).any())
+            keptFlats = tuple(bool(value) for value in kept)
+            outlines = [ShapeOutline.fromCoordinates(row) for row in points.reshape(len(points), -1)]
+            return cls(outlines, keptFlats=keptFlats)
+        outlines = [ShapeOutline.fromCoordinates([value for point in row for value in point]) for row in points]
+        return cls(outlines, flatTolerance)
+
+    def contourPoints(self):
+        # the contour points of each master, with the same structure
+        contours = [outline.contourPoints(keptFlats=self.keptFlats) for outline in self.outlines]
+        if not contours:
+            return contours
+        smooth = [any(contour[index][2] for contour in contours) for index in range(len(contours[0]))]
+        return [
+            [(pt, segmentType, smooth[index]) for index, (pt, segmentType, _) in enumerate(contour)]
+            for contour in contours
+        ]
+
+    def drawPoints(self, pointPens):
+        # draw each master into its own point pen
+        for pointPen, contour in zip(pointPens, self.contourPoints()):
+            pointPen.beginPath()
+            for pt, segmentType, smooth in contour:
+                pointPen.addPoint(pt, segmentType, smooth)
+            pointPen.endPath()
+
+
+def pointsToSegments(points):
+    # group 16 contour points back into the segments of buildShapePath
+    segments = []
+    index = 0
+    for segmentType, count in shapeSegments:
+        segments.append((segmentType, tuple(tuple(pt) for pt in points[index:index+count])))
+        index += count
+    return segments
+
+
+def drawShapePoints(pen, points):
+    # draw one row of 16 points, as returned by RoundShape.points or
+    # calculateShapes, into a segment pen
+    for segmentType, pts in pointsToSegments(points):
+        getattr(pen, segmentType)(*pts)
+    pen.closePath()
+    return pen
+
+
+def calculateShapes(bounds, flatFactors, bcpFactors):
+    """
+    Calculate many round shapes in one go.
+
+    `bounds` is a sequence of (xMin, yMin, xMax, yMax) boxes, `flatFactors`
+    and `bcpFactors` are sequences of (x, y) factors, one per box.
+    Returns the points of each contour in drawing order: with numpy an
+    array shaped (N, 16, 2), without numpy a list of point lists.
+    The values are the same, to the bit, as RoundShape calculates them.
+    """
+    numpy = getNumpy()
+    if numpy is None:
+        return _calculateShapesScalar(bounds, flatFactors, bcpFactors)
+    bounds = numpy.asarray(bounds, dtype=float).reshape(-1, 4)
+    flatFactors = numpy.asarray(flatFactors, dtype=float).reshape(-1, 2)
+    bcpFactors = numpy.asarray(bcpFactors, dtype=float).reshape(-1, 2)
+    if not len(bounds) == len(flatFactors) == len(bcpFactors):
+        raise ValueError("bounds, flatFactors and bcpFactors need the same length")
+    x1, y1, x2, y2 = bounds.T
+    flatFactor_x, flatFactor_y = flatFactors.T
+    bcpFactor_x, bcpFactor_y = bcpFactors.T
+    # same expressions, same order of operations as RoundShape
+    xMin = numpy.minimum(x1, x2)
+    yMin = numpy.minimum(y1, y2)
+    xMax = numpy.maximum(x1, x2)
+    yMax = numpy.maximum(y1, y2)
+    width = xMax - xMin
+    height = yMax - yMin
+    t1_v = yMin+.5*height-flatFactor_y*.5*height
+    t2_v = yMin+.5*height+flatFactor_y*.5*height
+    t1_h = xMin+.5*width-flatFactor_x*.5*width
+    t2_h = xMin+.5*width+flatFactor_x*.5*width
+    values = dict(
+        xMin=xMin, yMin=yMin, xMax=xMax, yMax=yMax,
+        t1_v=t1_v, t2_v=t2_v, t1_h=t1_h, t2_h=t2_h,
+        b1_v=yMin + bcpFactor_y*(t1_v-yMin),
+        b2_v=t2_v + (1-bcpFactor_y)*(yMax-t2_v),
+        b1_h=xMin + bcpFactor_x * (t1_h-xMin),
+        b2_h=t2_h + (1-bcpFactor_x) * (xMax-t2_h),
+    )
+    result = numpy.empty((len(bounds), shapePointCount, 2))
+    for index, (xName, yName) in enumerate(shapePointNames):
+        result[:, index, 0] = values[xName]
+        result[:, index, 1] = values[yName]
+    return result
+
+
+def _calculateShapesScalar(bounds, flatFactors, bcpFactors):
+    bounds = list(bounds)
+    flatFactors = list(flatFactors)
+    bcpFactors = list(bcpFactors)
+    if not len(bounds) == len(flatFactors) == len(bcpFactors):
+        raise ValueError("bounds, flatFactors and bcpFactors need the same length")
+    result = []
+    for (x1, y1, x2, y2), (flatFactor_x, flatFactor_y), (bcpFactor_x, bcpFactor_y) in zip(bounds, flatFactors, bcpFactors):
+        shape = RoundShape(
+            min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2),
+            flatFactor_x, flatFactor_y, bcpFactor_x, bcpFactor_y
+        )
+        result.append(shape.points())
+    return result
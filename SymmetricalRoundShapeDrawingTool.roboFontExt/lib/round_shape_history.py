@@ -0,0 +1,78 @@
+"""
+The recent states of a drag, to step back and forth through them.
+"""
+
+from array import array
+
+
+class ParameterHistory(object):
+
+    """
+    The last `size` snapshots of a fixed number of float parameters,
+    packed in one array of doubles, so the memory does not grow with
+    the length of the drag.
+
+    `record` adds a snapshot after the current one and forgets the ones
+    that were stepped back over, the way undo does. A snapshot equal to
+    the current one is not recorded again.
+    """
+
+    def __init__(self, fieldCount, size=256):
+        self.fieldCount = fieldCount
+        self.size = size
+        self._values = array("d", bytes(8 * fieldCount * size))
+        self._first = 0
+        self._count = 0
+        self._cursor = -1
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def position(self):
+        # index of the current snapshot, 0 is the oldest
+        return self._cursor
+
+    def clear(self):
+        self._first = 0
+        self._count = 0
+        self._cursor = -1
+
+    def _offset(self, index):
+        return ((self._first + index) % self.size) * self.fieldCount
+
+    def _get(self, index):
+        offset = self._offset(index)
+        return tuple(self._values[offset:offset + self.fieldCount])
+
+    def current(self):
+        if self._cursor < 0:
+            return None
+        return self._get(self._cursor)
+
+    def record(self, values):
+        if len(values) != self.fieldCount:
+            raise ValueError("expected %d values, got %d" % (self.fieldCount, len(values)))
+        if self._cursor >= 0 and self._get(self._cursor) == tuple(values):
+            return False
+        # forget what was stepped back over
+        self._count = self._cursor + 1
+        if self._count == self.size:
+            self._first = (self._first + 1) % self.size
+            self._count -= 1
+        offset = self._offset(self._count)
+        self._values[offset:offset + self.fieldCount] = array("d", values)
+        self._count += 1
+        self._cursor = self._count - 1
+        return True
+
+    def step(self, steps):
+        """
+        Move `steps` back (negative) or forward (positive) and return the
+        snapshot there, or None when there is no snapshot to move to.
+        """
+        cursor = max(0, min(self._cursor + steps, self._count - 1))
+        if cursor == self._cursor or self._count == 0:
+            return None
+        self._cursor = cursor
+        return self._get(cursor)
@@ -0,0 +1,85 @@
+"""
+Retained state for the layers of the symmetrical round shape drawing tool.
+
+The layers are only written to when a value actually changed. Any object
+with the merz layer methods will do.
+"""
+
+
+class RetainedSymbolLayers(object):
+
+    """
+    Keep the last position, size and colour of a list of symbol sublayers.
+
+    `update` takes one (position, size, fillColor) per layer and only sets
+    the properties that differ from what the layer already shows. The image
+    settings are only replaced when the size or the colour changed.
+    `writeCount` counts the property writes.
+    """
+
+    def __init__(self, layers, symbolName="oval"):
+        self.layers = list(layers)
+        self.symbolName = symbolName
+        self.writeCount = 0
+        self.reset()
+
+    def reset(self):
+        # forget what the layers show, the next update writes everything
+        self._positions = [None] * len(self.layers)
+        self._imageSettings = [None] * len(self.layers)
+
+    def update(self, attributes):
+        positions = self._positions
+        imageSettings = self._imageSettings
+        for index, (position, size, fillColor) in enumerate(attributes):
+            settings = (size, fillColor)
+            positionChanged = position != positions[index]
+            settingsChanged = settings != imageSettings[index]
+            if not positionChanged and not settingsChanged:
+                continue
+            layer = self.layers[index]
+            with layer.propertyGroup():
+                if positionChanged:
+                    layer.setPosition(position)
+                    positions[index] = position
+                    self.writeCount += 1
+                if settingsChanged:
+                    layer.setImageSettings(
+                        dict(name=self.symbolName,
+                             size=(size, size),
+                             fillColor=fillColor)
+                    )
+                    imageSettings[index] = settings
+                    self.writeCount += 1
+
+
+class RetainedTextLayer(object):
+
+    """
+    Keep the last position and text of a text line sublayer.
+    """
+
+    def __init__(self, layer):
+        self.layer = layer
+        self.writeCount = 0
+        self.reset()
+
+    def reset(self):
+        self._position = None
+        self._text = None
+
+    def update(self, position, text):
+        positionChanged = position != self._position
+        textChanged = text != self._text
+        if not positionChanged and not textChanged:
+            return
+        layer = self.layer
+        with layer.propertyGroup():
+            if positionChanged:
+                layer.setPosition(position)
+                self._position = position
+                self.writeCount += 1
+            if textChanged:
+                layer.setText(text)
+                self._text = text
+                self.writeCount += 1
@@ -0,0 +1,226 @@
+"""
+Area, length, extrema and smoothness of a round shape, in closed form.
+
+The metrics are calculated from the 16 points of the shape, as
+RoundShape.points and calculateShapes return them, without flattening:
+the area with Green's theorem for each line and cubic, the length with a
+Gauss-Legendre quadrature of the speed of each cubic. `batchMetrics` does
+many shapes at once, with numpy when it is installed.
+"""
+
+import math
+
+from round_shape_geometry import getNumpy, shapeSegments
+
+
+# 8 point Gauss-Legendre nodes and weights on [-1, 1]
+_gaussLegendre = [
+    (-0.9602898564975363, 0.1012285362903763),
+    (-0.7966664774136267, 0.2223810344533745),
+    (-0.5255324099163290, 0.3137066458778873),
+    (-0.1834346424956498, 0.3626837833783620),
+    (0.1834346424956498, 0.3626837833783620),
+    (0.5255324099163290, 0.3137066458778873),
+    (0.7966664774136267, 0.2223810344533745),
+    (0.9602898564975363, 0.1012285362903763),
+]
+
+# per node on [0, 1]: the weight and the factors of the three control
+# point differences in the derivative of a cubic
+lengthTable = []
+for _node, _weight in _gaussLegendre:
+    _t = .5 * (_node + 1)
+    _mt = 1 - _t
+    lengthTable.append((.5 * _weight, 3 * _mt * _mt, 6 * _mt * _t, 3 * _t * _t))
+
+# index of the first point of each segment, the moveTo has none
+_segmentStarts = []
+_index = 0
+for _segmentType, _count in shapeSegments:
+    _segmentStarts.append((_segmentType, _index))
+    _index += _count
+onCurveIndexes = [0, 3, 4, 7, 8, 11, 12, 15]
+
+del _node, _weight, _t, _mt, _index, _segmentType, _count
+
+
+class ShapeMetrics(object):
+
+    """
+    `area` is signed, negative for the clockwise contour the tool draws.
+    `length` is the length of the outline, `bounds` the box of the curves,
+    which can be larger than the box of the shape with negative bcp
+    factors. `joinCurvature` is the largest curvature where a curve meets
+    a flat, times half the smaller side: about 1 for a circle, 0 when the
+    curves start as straight as the flats.
+    """
+
+    __slots__ = ("area", "length", "bounds", "joinCurvature")
+
+    def __init__(self, area, length, bounds, joinCurvature):
+        self.area = area
+        self.length = length
+        self.bounds = bounds
+        self.joinCurvature = joinCurvature
+
+    def __repr__(self):
+        return "<ShapeMetrics area %.1f length %.1f join %.3f>" % (self.area, self.length, self.joinCurvature)
+
+
+def _cubicArea(p0, p1, p2, p3):
+    # Green's theorem, the integral of (x dy - y dx) / 2 over the cubic
+    x0, y0 = p0
+    x1, y1 = p1
+    x2, y2 = p2
+    x3, y3 = p3
+    return (
+        6 * (x0*y1 - x1*y0) + 3 * (x0*y2 - x2*y0) + (x0*y3 - x3*y0)
+        + 3 * (x1*y2 - x2*y1) + 3 * (x1*y3 - x3*y1) + 6 * (x2*y3 - x3*y2)
+    ) / 20
+
+
+def _cubicLength(p0, p1, p2, p3):
+    ax = p1[0] - p0[0]
+    ay = p1[1] - p0[1]
+    bx = p2[0] - p1[0]
+    by = p2[1] - p1[1]
+    cx = p3[0] - p2[0]
+    cy = p3[1] - p2[1]
+    length = 0
+    for weight, a, b, c in lengthTable:
+        length += weight * math.hypot(a*ax + b*bx + c*cx, a*ay + b*by + c*cy)
+    return length
+
+
+def _cubicExtrema(p0, p1, p2, p3, axis):
+    # the values of the cubic where its derivative on one axis is 0
+    v0 = p0[axis]
+    v1 = p1[axis]
+    v2 = p2[axis]
+    v3 = p3[axis]
+    a = -v0 + 3*v1 - 3*v2 + v3
+    b = 2 * (v0 - 2*v1 + v2)
+    c = v1 - v0
+    if abs(a) < 1e-12:
+        roots = [-c / b] if abs(b) > 1e-12 else []
+    else:
+        d = b*b - 4*a*c
+        if d < 0:
+            return []
+        d = math.sqrt(d)
+        roots = [(-b + d) / (2*a), (-b - d) / (2*a)]
+    values = []
+    for t in roots:
+        if 0 < t < 1:
+            mt = 1 - t
+            values.append(mt*mt*mt*v0 + 3*mt*mt*t*v1 + 3*mt*t*t*v2 + t*t*t*v3)
+    return values
+
+
+def _endCurvature(p0, p1, p2):
+    # curvature of a cubic at p0, towards p1 and p2
+    dx = p1[0] - p0[0]
+    dy = p1[1] - p0[1]
+    handle = math.hypot(dx, dy)
+    if handle == 0:
+        return math.inf
+    ex = p2[0] - p1[0]
+    ey = p2[1] - p1[1]
+    return 2 * abs(dx*ey - dy*ex) / (3 * handle * handle * handle)
+
+
+def shapeMetrics(points):
+    """
+    The ShapeMetrics of the 16 points of one shape.
+    """
+    area = 0
+    length = 0
+    joinCurvature = 0
+    # the extremes of the curves, and then the on curve points
+    onCurveXs = []
+    onCurveYs = []
+    previous = points[0]
+    for segmentType, start in _segmentStarts:
+        if segmentType == "moveTo":
+            continue
+        if segmentType == "lineTo":
+            point = points[start]
+            area += (previous[0]*point[1] - point[0]*previous[1]) / 2
+            length += math.hypot(point[0] - previous[0], point[1] - previous[1])
+            previous = point
+            continue
+        p1, p2, p3 = points[start:start+3]
+        area += _cubicArea(previous, p1, p2, p3)
+        length += _cubicLength(previous, p1, p2, p3)
+        onCurveXs.extend(_cubicExtrema(previous, p1, p2, p3, 0))
+        onCurveYs.extend(_cubicExtrema(previous, p1, p2, p3, 1))
+        joinCurvature = max(joinCurvature, _endCurvature(previous, p1, p2), _endCurvature(p3, p2, p1))
+        previous = p3
+    # the closing flat
+    point = points[0]
+    area += (previous[0]*point[1] - point[0]*previous[1]) / 2
+    length += math.hypot(point[0] - previous[0], point[1] - previous[1])
+    # the on curve points are on the box of the shape
+    onCurves = [points[index] for index in onCurveIndexes]
+    xs = [point[0] for point in onCurves]
+    ys = [point[1] for point in onCurves]
+    radius = .5 * min(max(xs) - min(xs), max(ys) - min(ys))
+    onCurveXs.extend(xs)
+    onCurveYs.extend(ys)
+    bounds = min(onCurveXs), min(onCurveYs), max(onCurveXs), max(onCurveYs)
+    if radius == 0:
+        # no curvature for a shape without width or height
+        joinCurvature = 0
+    return ShapeMetrics(area, length, bounds, joinCurvature * radius)
+
+
+def batchMetrics(points):
+    """
+    Area, length and join curvature of many shapes, `points` shaped
+    (N, 16, 2) as calculateShapes returns them. With numpy the result is
+    a dict of arrays, without numpy a list of ShapeMetrics.
+    """
+    numpy = getNumpy()
+    if numpy is None or not hasattr(points, "shape"):
+        return [shapeMetrics(row) for row in points]
+    points = numpy.asarray(points, dtype=float)
+    x = points[..., 0]
+    y = points[..., 1]
+    area = numpy.zeros(len(points))
+    length = numpy.zeros(len(points))
+    joinCurvature = numpy.zeros(len(points))
+    previous = 0
+    for segmentType, start in _segmentStarts:
+        if segmentType == "moveTo":
+            continue
+        if segmentType == "lineTo":
+            area += (x[:, previous]*y[:, start] - x[:, start]*y[:, previous]) / 2
+            length += numpy.hypot(x[:, start] - x[:, previous], y[:, start] - y[:, previous])
+            previous = start
+            continue
+        i0, i1, i2, i3 = previous, start, start + 1, start + 2
+        x0, x1, x2, x3 = x[:, i0], x[:, i1], x[:, i2], x[:, i3]
+        y0, y1, y2, y3 = y[:, i0], y[:, i1], y[:, i2], y[:, i3]
+        area += (
+            6 * (x0*y1 - x1*y0) + 3 * (x0*y2 - x2*y0) + (x0*y3 - x3*y0)
+            + 3 * (x1*y2 - x2*y1) + 3 * (x1*y3 - x3*y1) + 6 * (x2*y3 - x3*y2)
+        ) / 20
+        ax, ay = x1 - x0, y1 - y0
+        bx, by = x2 - x1, y2 - y1
+        cx, cy = x3 - x2, y3 - y2
+        for weight, a, b, c in lengthTable:
+            length += weight * numpy.hypot(a*ax + b*bx + c*cx, a*ay + b*by + c*cy)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            for dx, dy, ex, ey in ((ax, ay, bx, by), (-cx, -cy, -bx, -by)):
+                handle = numpy.hypot(dx, dy)
+                curvature = 2 * numpy.abs(dx*ey - dy*ex) / (3 * handle**3)
+                curvature[handle == 0] = numpy.inf
+                joinCurvature = numpy.maximum(joinCurvature, curvature)
+        previous = i3
+    area += (x[:, previous]*y[:, 0] - x[:, 0]*y[:, previous]) / 2
+    length += numpy.hypot(x[:, 0] - x[:, previous], y[:, 0] - y[:, previous])
+    x = x[:, onCurveIndexes]
+    y = y[:, onCurveIndexes]
+    radius = .5 * numpy.minimum(x.max(axis=1) - x.min(axis=1), y.max(axis=1) - y.min(axis=1))
+    joinCurvature[radius == 0] = 0
+    return dict(area=area, length=length, joinCurvature=joinCurvature * radius)
@@ -0,0 +1,239 @@
+"""
+Symmetrical round polygons with any number of sides.
+
+The corners of a regular polygon with `sides` corners are fitted in the
+box of the shape, with a vertical flat on the left. Each side has its own
+flat factor, each corner its own bcp factors, one for the bcp on the side
+before it and one for the side after it. The angles are worked out once
+per number of sides into a table of box relative values, so a shape is a
+few multiplications and additions per point.
+
+With 4 sides and the factors from `roundShapeFactors` the points are the
+same, to the bit, as RoundShape.points.
+"""
+
+import math
+
+
+# table values this close to a multiple of 1/8 are that multiple, so the
+# 4 sided table has exact 0, .5 and 1 where the trigonometry is off by a bit
+_exactStep = 8
+_exactTolerance = 1e-12
+
+_tables = {}
+
+
+def _exact(value):
+    rounded = round(value * _exactStep) / _exactStep
+    if abs(value - rounded) < _exactTolerance:
+        return rounded
+    return value
+
+
+class PolygonTable(object):
+
+    """
+    The box relative geometry of a polygon with `sides` corners, in
+    clockwise order. Corner j is at vertices[j], side j goes from corner j
+    to corner j+1, side 0 is the vertical side on the left going up.
+    `middles` are the centers of the sides, `halves` half the vector along
+    each side, all in units of the width and height of the box.
+    """
+
+    def __init__(self, sides):
+        if sides < 3:
+            raise ValueError("a round polygon needs 3 sides or more, not %r" % sides)
+        self.sides = sides
+        step = 2 * math.pi / sides
+        start = math.pi + .5 * step
+        cosines = [math.cos(start - index * step) for index in range(sides)]
+        sines = [math.sin(start - index * step) for index in range(sides)]
+        # fit the corners in the box
+        xLow, xHigh = min(cosines), max(cosines)
+        yLow, yHigh = min(sines), max(sines)
+        self.vertices = [
+            (_exact((x - xLow) / (xHigh - xLow)), _exact((y - yLow) / (yHigh - yLow)))
+            for x, y in zip(cosines, sines)
+        ]
+        self.middles = []
+        self.halves = []
+        for index in range(sides):
+            (ax, ay), (bx, by) = self.vertices[index], self.vertices[(index + 1) % sides]
+            self.middles.append((_exact(.5 * (ax + bx)), _exact(.5 * (ay + by))))
+            self.halves.append((_exact(.5 * (bx - ax)), _exact(.5 * (by - ay))))
+
+
+def polygonTable(sides):
+    # one table per number of sides, made when it is first asked for
+    table = _tables.get(sides)
+    if table is None:
+        table = _tables[sides] = PolygonTable(sides)
+    return table
+
+
+def roundShapeFactors(flatFactor_x, flatFactor_y, bcpFactor_x, bcpFactor_y):
+    """
+    The per side flat factors and per corner bcp factors of 4 sides for
+    the factors of a RoundShape: the x factors go with the horizontal
+    sides, the y factors with the vertical sides.
+    """
+    flatFactors = [flatFactor_y, flatFactor_x, flatFactor_y, flatFactor_x]
+    bcpFactors = [
+        (bcpFactor_x, bcpFactor_y),
+        (bcpFactor_y, bcpFactor_x),
+        (bcpFactor_x, bcpFactor_y),
+        (bcpFactor_y, bcpFactor_x),
+    ]
+    return flatFactors, bcpFactors
+
+
+def _boxValue(low, high, size, unit):
+    # a box relative value, exactly on the sides of the box
+    if unit == 0:
+        return low
+    if unit == 1:
+        return high
+    return low + unit * size
+
+
+def _bcpValue(corner, tangent, cornerUnit, middleUnit, factor):
+    # from the corner towards the tangent, the other way on the high side,
+    # the way RoundShape calculates its bcps
+    if cornerUnit == middleUnit:
+        # the side is level in this direction
+        return corner
+    if cornerUnit < middleUnit:
+        return corner + factor * (tangent - corner)
+    return tangent + (1 - factor) * (corner - tangent)
+
+
+class RoundPolygon(object):
+
+    """
+    One round polygon in the box xMin, yMin, xMax, yMax.
+
+    `flatFactors` is one factor for all sides or one per side, `bcpFactors`
+    one factor for all bcps, one per corner, or a pair per corner: the
+    bcp on the side into the corner and the bcp on the side out of it.
+    """
+
+    __slots__ = ("xMin", "yMin", "xMax", "yMax", "width", "height", "sides", "flatFactors", "bcpFactors", "_points")
+
+    def __init__(self, xMin, yMin, xMax, yMax, sides, flatFactors, bcpFactors, width=None, height=None):
+        # the table checks the number of sides
+        polygonTable(sides)
+        if width is None:
+            width = xMax - xMin
+        if height is None:
+            height = yMax - yMin
+        if isinstance(flatFactors, (int, float)):
+            flatFactors = [flatFactors] * sides
+        if isinstance(bcpFactors, (int, float)):
+            bcpFactors = [bcpFactors] * sides
+        bcpFactors = [factor if isinstance(factor, (tuple, list)) else (factor, factor) for factor in bcpFactors]
+        if len(flatFactors) != sides or len(bcpFactors) != sides:
+            raise ValueError("%d sides need %d flat factors and bcp factors" % (sides, sides))
+        self.xMin = xMin
+        self.yMin = yMin
+        self.xMax = xMax
+        self.yMax = yMax
+        self.width = width
+        self.height = height
+        self.sides = sides
+        self.flatFactors = tuple(flatFactors)
+        self.bcpFactors = tuple(tuple(factor) for factor in bcpFactors)
+        self._points = None
+
+    @classmethod
+    def fromRoundShape(cls, shape):
+        # the 4 sided polygon with the bounds and factors of a RoundShape
+        flatFactors, bcpFactors = roundShapeFactors(shape.flatFactor_x, shape.flatFactor_y, shape.bcpFactor_x, shape.bcpFactor_y)
+        return cls(shape.xMin, shape.yMin, shape.xMax, shape.yMax, 4, flatFactors, bcpFactors, width=shape.width, height=shape.height)
+
+    def tangents(self):
+        """
+        The two ends of the flat of every side, (start, end) per side.
+        """
+        table = polygonTable(self.sides)
+        xMin, yMin, xMax, yMax = self.xMin, self.yMin, self.xMax, self.yMax
+        width, height = self.width, self.height
+        tangents = []
+        for (mx, my), (hx, hy), flatFactor in zip(table.middles, table.halves, self.flatFactors):
+            x = _boxValue(xMin, xMax, width, mx)
+            y = _boxValue(yMin, yMax, height, my)
+            if hx == 0:
+                x1 = x2 = x
+            else:
+                x1 = x - flatFactor * hx * width
+                x2 = x + flatFactor * hx * width
+            if hy == 0:
+                y1 = y2 = y
+            else:
+                y1 = y - flatFactor * hy * height
+                y2 = y + flatFactor * hy * height
+            tangents.append(((x1, y1), (x2, y2)))
+        return tangents
+
+    def points(self):
+        """
+        All 4 * sides points of the contour, in drawing order: the end of
+        the flat on side 0, then a curve and a flat for every next side.
+        """
+        if self._points is not None:
+            return list(self._points)
+        table = polygonTable(self.sides)
+        sides = self.sides
+        xMin, yMin, xMax, yMax = self.xMin, self.yMin, self.xMax, self.yMax
+        width, height = self.width, self.height
+        tangents = self.tangents()
+        points = [tangents[0][1]]
+        for index in range(1, sides + 1):
+            corner = index % sides
+            before = index - 1
+            after = corner
+            ux, uy = table.vertices[corner]
+            cx = _boxValue(xMin, xMax, width, ux)
+            cy = _boxValue(yMin, yMax, height, uy)
+            factorIn, factorOut = self.bcpFactors[corner]
+            end = tangents[before][1]
+            mx, my = table.middles[before]
+            points.append((
+                _bcpValue(cx, end[0], ux, mx, factorIn),
+                _bcpValue(cy, end[1], uy, my, factorIn),
+            ))
+            start = tangents[after][0]
+            mx, my = table.middles[after]
+            points.append((
+                _bcpValue(cx, start[0], ux, mx, factorOut),
+                _bcpValue(cy, start[1], uy, my, factorOut),
+            ))
+            points.append(start)
+            if index < sides:
+                points.append(tangents[after][1])
+        self._points = tuple(points)
+        return points
+
+    def segments(self):
+        # the segments the way buildShapePath draws them, closing with a flat
+        points = self.points()
+        segments = [("moveTo", (points[0],))]
+        index = 1
+        for side in range(self.sides):
+            segments.append(("curveTo", tuple(points[index:index+3])))
+            index += 3
+            if side < self.sides - 1:
+                segments.append(("lineTo", (points[index],)))
+                index += 1
+        return segments
+
+    def draw(self, pen, flatTolerance=None):
+        # with a flatTolerance the flats that are too short are left out
+        previous = None
+        for segmentType, pts in self.segments():
+            if segmentType == "lineTo" and flatTolerance is not None:
+                if math.hypot(pts[0][0] - previous[0], pts[0][1] - previous[1]) <= flatTolerance:
+                    continue
+            getattr(pen, segmentType)(*pts)
+            previous = pts[-1]
+        pen.closePath()
+        return pen
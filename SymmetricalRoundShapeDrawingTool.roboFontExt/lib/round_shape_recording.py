@@ -0,0 +1,100 @@
+"""
+Record the events the drawing tool receives, to replay them later.
+
+A session is a JSONL file. The first line is a header, every other line
+is one event as a short list:
+
+    ["d", t, x, y, clickCount]      mouseDown
+    ["g", t, x, y, dx, dy]          mouseDragged
+    ["m", t, modifiers]             modifiersChanged
+    ["u", t, x, y]                  mouseUp
+
+`t` is the time in seconds since the start of the session and
+`modifiers` a bit mask of the modifier keys.
+"""
+
+import json
+import time
+
+
+sessionVersion = 1
+
+modifierBits = [
+    ("shiftDown", 1),
+    ("controlDown", 2),
+    ("optionDown", 4),
+    ("commandDown", 8),
+]
+
+
+def packModifiers(modifiers):
+    mask = 0
+    for name, bit in modifierBits:
+        if modifiers.get(name):
+            mask |= bit
+    return mask
+
+
+def unpackModifiers(mask):
+    return {name: bool(mask & bit) for name, bit in modifierBits}
+
+
+class SessionRecorder(object):
+
+    """
+    Write the events of the tool to a session file, one line per event.
+    """
+
+    def __init__(self, path, glyphInfo=None, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.eventCount = 0
+        self._start = clock()
+        self._file = open(path, "w", encoding="utf-8")
+        header = dict(version=sessionVersion)
+        if glyphInfo:
+            header["glyph"] = glyphInfo
+        self._write(header)
+
+    def _write(self, data):
+        self._file.write(json.dumps(data, separators=(",", ":")))
+        self._file.write("\n")
+
+    def _event(self, *data):
+        self.eventCount += 1
+        self._write([data[0], round(self.clock() - self._start, 6)] + list(data[1:]))
+
+    def mouseDown(self, point, clickCount):
+        self._event("d", point.x, point.y, clickCount)
+
+    def mouseDragged(self, point, delta):
+        self._event("g", point.x, point.y, delta.x, delta.y)
+
+    def modifiersChanged(self, modifiers):
+        self._event("m", packModifiers(modifiers))
+
+    def mouseUp(self, point):
+        self._event("u", point.x, point.y)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def readSession(path):
+    """
+    Return the header of a session file and a generator of its events.
+    """
+    f = open(path, encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("version") != sessionVersion:
+        f.close()
+        raise ValueError("%s: unknown session version %r" % (path, header.get("version")))
+
+    def events():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, events()
@@ -0,0 +1,182 @@
+"""
+Copies of one round shape in a grid or along a guide contour.
+
+The outline is calculated once, the copies are translations of its
+points, all in one go with numpy when it is installed. The copies draw
+into one pen, one path with a contour per copy.
+"""
+
+import bisect
+import math
+
+from round_shape_geometry import getNumpy, shapePointCount
+
+
+def gridOffsets(columns, rows, stepX, stepY):
+    # the offsets of a grid, row by row, the first copy stays where it is
+    return [(column * stepX, row * stepY) for row in range(rows) for column in range(columns)]
+
+
+_flattenPenClass = None
+
+
+def _makeFlattenPen(steps):
+    # fontTools is imported for the first guide, not when RoboFont starts the tool
+    global _flattenPenClass
+    if _flattenPenClass is None:
+        from fontTools.pens.basePen import BasePen
+
+        class _FlattenPen(BasePen):
+            # collects the contours drawn into it as polylines
+
+            def __init__(self, steps=16):
+                BasePen.__init__(self, None)
+                self.steps = steps
+                self.contours = []
+
+            def _moveTo(self, pt):
+                self.contours.append(([pt], False))
+
+            def _lineTo(self, pt):
+                self.contours[-1][0].append(pt)
+
+            def _curveToOne(self, pt1, pt2, pt3):
+                x0, y0 = self._getCurrentPoint()
+                steps = self.steps
+                polyline = self.contours[-1][0]
+                for step in range(1, steps + 1):
+                    t = step / steps
+                    mt = 1 - t
+                    a = mt * mt * mt
+                    b = 3 * mt * mt * t
+                    c = 3 * mt * t * t
+                    d = t * t * t
+                    polyline.append((
+                        a*x0 + b*pt1[0] + c*pt2[0] + d*pt3[0],
+                        a*y0 + b*pt1[1] + c*pt2[1] + d*pt3[1],
+                    ))
+
+            def _closePath(self):
+                polyline, closed = self.contours[-1]
+                self.contours[-1] = polyline, True
+
+        _flattenPenClass = _FlattenPen
+    return _flattenPenClass(steps)
+
+
+class GuidePath(object):
+
+    """
+    A polyline with the distance along it at every point, to put copies
+    at equal distances. A closed guide goes back to its first point.
+    """
+
+    def __init__(self, points, closed=True):
+        points = list(points)
+        if closed and points and points[0] != points[-1]:
+            points.append(points[0])
+        self.points = points
+        self.closed = closed
+        distances = [0]
+        for index in range(1, len(points)):
+            x0, y0 = points[index - 1]
+            x1, y1 = points[index]
+            distances.append(distances[-1] + math.hypot(x1 - x0, y1 - y0))
+        self.distances = distances
+
+    @classmethod
+    def fromContour(cls, contour, steps=16):
+        # a guide from the first contour drawn by a glyph contour, or anything with a draw method
+        pen = _makeFlattenPen(steps)
+        contour.draw(pen)
+        if not pen.contours:
+            return None
+        points, closed = pen.contours[0]
+        return cls(points, closed)
+
+    @property
+    def length(self):
+        return self.distances[-1]
+
+    def pointAt(self, distance):
+        distances = self.distances
+        index = bisect.bisect_right(distances, distance)
+        if index <= 0:
+            return self.points[0]
+        if index >= len(distances):
+            return self.points[-1]
+        start = distances[index - 1]
+        span = distances[index] - start
+        t = (distance - start) / span if span else 0
+        x0, y0 = self.points[index - 1]
+        x1, y1 = self.points[index]
+        return x0 + t * (x1 - x0), y0 + t * (y1 - y0)
+
+    def distribute(self, count):
+        """
+        `count` points at equal distances along the guide, from its start.
+        On an open guide the last point is on the end.
+        """
+        if count < 1 or not self.points:
+            return []
+        if self.closed:
+            step = self.length / count
+        elif count > 1:
+            step = self.length / (count - 1)
+        else:
+            step = 0
+        return [self.pointAt(index * step) for index in range(count)]
+
+
+def pathOffsets(guide, count, center):
+    # the offsets that put the center of the shape on points along the guide
+    cx, cy = center
+    return [(x - cx, y - cy) for x, y in guide.distribute(count)]
+
+
+def arrayPoints(outline, offsets):
+    """
+    The 16 points of every copy of a ShapeOutline, one per offset: with
+    numpy an array shaped (N, 16, 2), without numpy a list of point lists.
+    """
+    numpy = getNumpy()
+    if numpy is not None:
+        points = numpy.asarray(outline.coordinates, dtype=float).reshape(1, shapePointCount, 2)
+        offsets = numpy.asarray(offsets, dtype=float).reshape(-1, 1, 2)
+        return points + offsets
+    c = outline.coordinates
+    return [
+        [(c[i] + dx, c[i+1] + dy) for i in range(0, 2 * shapePointCount, 2)]
+        for dx, dy in offsets
+    ]
+
+
+def drawArray(pen, points):
+    # all copies into one segment pen, as buildShapePath draws one
+    if hasattr(points, "tolist"):
+        points = points.tolist()
+    moveTo = pen.moveTo
+    lineTo = pen.lineTo
+    curveTo = pen.curveTo
+    closePath = pen.closePath
+    for p in points:
+        moveTo(tuple(p[0]))
+        curveTo(tuple(p[1]), tuple(p[2]), tuple(p[3]))
+        lineTo(tuple(p[4]))
+        curveTo(tuple(p[5]), tuple(p[6]), tuple(p[7]))
+        lineTo(tuple(p[8]))
+        curveTo(tuple(p[9]), tuple(p[10]), tuple(p[11]))
+        lineTo(tuple(p[12]))
+        curveTo(tuple(p[13]), tuple(p[14]), tuple(p[15]))
+        closePath()
+    return pen
+
+
+def arrayContourPoints(contourPoints, offsets):
+    """
+    Yield the (pt, segmentType, smooth) points of each copy, from the
+    points of one contour as ShapeOutline.contourPoints returns them, so
+    the short flats are left out of all copies alike.
+    """
+    for dx, dy in offsets:
+        yield [((pt[0] + dx, pt[1] + dy), segmentType, smooth) for pt, segmentType, smooth in contourPoints]
@@ -0,0 +1,300 @@
+"""
+Add one round shape to many glyphs, layers and fonts in one pass.
+
+Works with fontParts glyphs.
+"""
+
+import time
+
+from round_shape_array import arrayContourPoints
+from round_shape_geometry import MasterShapes, jointKeptFlats, flatTolerance as defaultFlatTolerance
+from round_shape_lib import existingIdentifiers, getFontShapeIndex, makeIdentifier, removeShapeContour, storeShape, storeShapes
+from round_shape_duplicates import getFontContourIndex, shapeContourKey
+
+
+class BulkReport(object):
+
+    """
+    What happened in one addOutlineToGlyphs call, and how long it took.
+    """
+
+    def __init__(self):
+        self.glyphCount = 0
+        # contours drawn, more than the glyphs with copies
+        self.contourCount = 0
+        self.skipped = []
+        # glyphs that already had the contour
+        self.duplicates = []
+        self.scaleTime = 0
+        self.writeTime = 0
+        self.notifyTime = 0
+
+    @property
+    def totalTime(self):
+        return self.scaleTime + self.writeTime + self.notifyTime
+
+    def __repr__(self):
+        return "<BulkReport %d glyphs, %d skipped, %.1f ms>" % (
+            self.glyphCount, len(self.skipped), self.totalTime * 1000
+        )
+
+    def asText(self):
+        lines = [
+            "round shape added to %d glyphs" % self.glyphCount,
+            "    scale   %8.2f ms" % (self.scaleTime * 1000),
+            "    write   %8.2f ms" % (self.writeTime * 1000),
+            "    notify  %8.2f ms" % (self.notifyTime * 1000),
+            "    total   %8.2f ms" % (self.totalTime * 1000),
+        ]
+        if self.glyphCount:
+            lines.append("    %.3f ms per glyph" % (self.totalTime * 1000 / self.glyphCount))
+        if self.skipped:
+            lines.append("    skipped: %s" % ", ".join(self.skipped))
+        if self.duplicates:
+            lines.append("    already there: %s" % ", ".join(self.duplicates))
+        return "\n".join(lines)
+
+
+def collectTargetGlyphs(fonts, glyphNames, layerNames=None, report=None):
+    """
+    Yield the glyphs with `glyphNames` in each of the `fonts`. With
+    `layerNames` the glyphs in those layers, use "*" for all layers.
+    Missing glyphs are not created, their names go in report.skipped.
+    """
+    for font in fonts:
+        if layerNames is None:
+            layers = [font]
+        elif layerNames == "*":
+            layers = font.layers
+        else:
+            layers = [font.getLayer(layerName) for layerName in layerNames]
+        for layer in layers:
+            for glyphName in glyphNames:
+                if glyphName not in layer:
+                    if report is not None:
+                        report.skipped.append(glyphName)
+                    continue
+                yield layer[glyphName]
+
+
+def _holdNotifications(glyph):
+    # hold the notifications of the defcon glyph behind a fontParts glyph
+    naked = glyph.naked() if hasattr(glyph, "naked") else glyph
+    if hasattr(naked, "holdNotifications"):
+        naked.holdNotifications()
+        return naked
+    return None
+
+
+def _drawPoints(glyph, drawPoints, undoTitle):
+    if hasattr(glyph, "undo"):
+        with glyph.undo(undoTitle):
+            drawPoints(glyph.getPointPen())
+    else:
+        drawPoints(glyph.getPointPen())
+
+
+def addOutlineToGlyphs(outline, glyphs, scaleForGlyph=None, flatTolerance=defaultFlatTolerance, undoTitle="Add RoundShape", report=None, compatible=False, storeParameters=False, duplicates=None):
+    """
+    Draw one ShapeOutline into all `glyphs`, with one undo entry per glyph.
+
+    The geometry is not recalculated per glyph. `scaleForGlyph(glyph)` can
+    return a scale factor, the outline is then scaled from the origin, once
+    per distinct factor. With `compatible` the short flats are left out
+    of all scaled outlines or none, so the contours interpolate. With
+    `storeParameters` the shape goes in the glyph lib, see round_shape_lib.
+    With `duplicates` "skip" a glyph that already has the same contour is
+    left alone, with "replace" that contour is taken out first, see
+    round_shape_duplicates.
+    Glyph notifications are held until all glyphs are written.
+    Returns a BulkReport, the one passed in or a new one.
+    """
+    if report is None:
+        report = BulkReport()
+    scaled = {1: outline}
+    # contour key per scale, for the duplicates
+    contourKeys = {}
+    keptFlats = None
+    if compatible:
+        start = time.monotonic()
+        glyphs = list(glyphs)
+        if scaleForGlyph is not None:
+            for glyph in glyphs:
+                scale = scaleForGlyph(glyph)
+                if scale not in scaled:
+                    scaled[scale] = outline.scaled(scale)
+        keptFlats = jointKeptFlats(scaled.values(), flatTolerance)
+        report.scaleTime += time.monotonic() - start
+    held = []
+    try:
+        for glyph in glyphs:
+            start = time.monotonic()
+            scale = 1
+            if scaleForGlyph is not None:
+                scale = scaleForGlyph(glyph)
+            glyphOutline = scaled.get(scale)
+            if glyphOutline is None:
+                glyphOutline = scaled[scale] = outline.scaled(scale)
+            now = time.monotonic()
+            report.scaleTime += now - start
+            start = now
+            contourKey = duplicate = None
+            if duplicates is not None:
+                contourKey = contourKeys.get(scale)
+                if contourKey is None:
+                    contourKey = contourKeys[scale] = shapeContourKey(glyphOutline.contourPoints(flatTolerance, keptFlats))
+                duplicate = getFontContourIndex(getattr(glyph, "font", None)).find(glyph, contourKey)
+                if duplicate is not None:
+                    report.duplicates.append(glyph.name)
+                    if duplicates == "skip":
+                        report.writeTime += time.monotonic() - start
+                        continue
+            naked = _holdNotifications(glyph)
+            if naked is not None:
+                held.append(naked)
+            identifier = None
+            if storeParameters and glyphOutline.shape is not None:
+                identifier = makeIdentifier(existingIdentifiers(glyph))
+
+            def drawPoints(pointPen):
+                if duplicate is not None:
+                    removeShapeContour(glyph, duplicate)
+                glyphOutline.drawPoints(pointPen, flatTolerance=flatTolerance, keptFlats=keptFlats, identifier=identifier)
+                if identifier is not None:
+                    storeShape(glyph, identifier, glyphOutline.shape)
+
+            _drawPoints(glyph, drawPoints, undoTitle)
+            if identifier is not None or duplicate is not None:
+                getFontShapeIndex(getattr(glyph, "font", None)).glyphChanged(glyph)
+            if duplicate is not None:
+                getFontContourIndex(getattr(glyph, "font", None)).glyphChanged(glyph)
+            elif contourKey is not None:
+                getFontContourIndex(getattr(glyph, "font", None)).contourAdded(glyph, contourKey)
+            report.glyphCount += 1
+            report.contourCount += 1
+            report.writeTime += time.monotonic() - start
+    finally:
+        start = time.monotonic()
+        for naked in held:
+            naked.releaseHeldNotifications()
+        report.notifyTime += time.monotonic() - start
+    return report
+
+
+def addOutlineCopiesToGlyph(outline, glyph, offsets, flatTolerance=defaultFlatTolerance, undoTitle="Add RoundShapes", report=None, storeParameters=False, duplicates=None):
+    """
+    Draw copies of one ShapeOutline into one glyph, moved by each of the
+    (dx, dy) `offsets`, all in one undo entry.
+
+    The contour points are made once, with the same flats left out of all
+    copies, and moved for each copy. `storeParameters` and `duplicates`
+    work as they do in addOutlineToGlyphs, per copy.
+    Returns a BulkReport, the one passed in or a new one.
+    """
+    if report is None:
+        report = BulkReport()
+    start = time.monotonic()
+    contourPoints = outline.contourPoints(flatTolerance)
+    copies = list(zip(offsets, arrayContourPoints(contourPoints, offsets)))
+    now = time.monotonic()
+    report.scaleTime += now - start
+    start = now
+    contourIndex = getFontContourIndex(getattr(glyph, "font", None))
+    replaced = []
+    if duplicates is not None:
+        kept = []
+        for offset, points in copies:
+            duplicate = contourIndex.find(glyph, shapeContourKey(points))
+            if duplicate is None:
+                kept.append((offset, points))
+                continue
+            if glyph.name not in report.duplicates:
+                report.duplicates.append(glyph.name)
+            if duplicates == "replace":
+                replaced.append(duplicate)
+                kept.append((offset, points))
+        copies = kept
+    if not copies:
+        report.writeTime += time.monotonic() - start
+        return report
+    naked = _holdNotifications(glyph)
+    try:
+
+        def drawPoints(pointPen):
+            for index in sorted(set(replaced), reverse=True):
+                removeShapeContour(glyph, index)
+            existing = set(existingIdentifiers(glyph)) if storeParameters else None
+            shapes = {}
+            for (dx, dy), points in copies:
+                identifier = None
+                if storeParameters and outline.shape is not None:
+                    identifier = makeIdentifier(existing)
+                    existing.add(identifier)
+                    shapes[identifier] = outline.shape.translated(dx, dy)
+                pointPen.beginPath(identifier=identifier)
+                for pt, segmentType, smooth in points:
+                    pointPen.addPoint(pt, segmentType, smooth)
+                pointPen.endPath()
+            storeShapes(glyph, shapes)
+
+        _drawPoints(glyph, drawPoints, undoTitle)
+        getFontShapeIndex(getattr(glyph, "font", None)).glyphChanged(glyph)
+        contourIndex.glyphChanged(glyph)
+        report.glyphCount += 1
+        report.contourCount += len(copies)
+        report.writeTime += time.monotonic() - start
+    finally:
+        start = time.monotonic()
+        if naked is not None:
+            naked.releaseHeldNotifications()
+        report.notifyTime += time.monotonic() - start
+    return report
+
+
+def addMasterShapesToGlyphs(masterShapes, glyphs, undoTitle="Add RoundShape", report=None):
+    """
+    Draw the compatible contours of a MasterShapes into `glyphs`, one
+    glyph per master in the same order, with one undo entry per glyph.
+    Returns a BulkReport, the one passed in or a new one.
+    """
+    if report is None:
+        report = BulkReport()
+    glyphs = list(glyphs)
+    if len(glyphs) != len(masterShapes):
+        raise ValueError("%d glyphs for %d masters" % (len(glyphs), len(masterShapes)))
+    start = time.monotonic()
+    contours = masterShapes.contourPoints()
+    report.scaleTime += time.monotonic() - start
+    held = []
+    try:
+        for glyph, contour in zip(glyphs, contours):
+            start = time.monotonic()
+            naked = _holdNotifications(glyph)
+            if naked is not None:
+                held.append(naked)
+
+            def drawPoints(pointPen):
+                pointPen.beginPath()
+                for pt, segmentType, smooth in contour:
+                    pointPen.addPoint(pt, segmentType, smooth)
+                pointPen.endPath()
+
+            _drawPoints(glyph, drawPoints, undoTitle)
+            report.glyphCount += 1
+            report.writeTime += time.monotonic() - start
+    finally:
+        start = time.monotonic()
+        for naked in held:
+            naked.releaseHeldNotifications()
+        report.notifyTime += time.monotonic() - start
+    return report
+
+
+def addShapeToMasters(bounds, flatFactors, bcpFactors, glyphs, flatTolerance=defaultFlatTolerance, undoTitle="Add RoundShape", report=None):
+    """
+    Calculate a shape with its own bounds and factors per master, all
+    masters in one pass, and add compatible contours to `glyphs`, the
+    glyph of each master in the same order as the bounds.
+    """
+    masterShapes = MasterShapes.calculate(bounds, flatFactors, bcpFactors, flatTolerance)
+    return addMasterShapesToGlyphs(masterShapes, glyphs, undoTitle=undoTitle, report=report)
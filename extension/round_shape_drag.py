@@ -0,0 +1,64 @@
+"""
+Drag event handling for the symmetrical round shape drawing tool.
+"""
+
+import time
+
+
+class DragCoalescer(object):
+
+    """
+    Merge drag events that arrive within one display frame.
+
+    Every event calls `submit` after it has changed the parameters of the
+    shape. The `flush` callback, which calculates and redraws, runs at most
+    once per `frameDuration`. Events arriving in between are merged into the
+    next flush. With a `schedule(delay, callback)` function the pending
+    state is flushed when the frame is over, even if no new event arrives.
+    Call `flush` directly to commit the last state, on mouseUp for instance.
+    """
+
+    def __init__(self, flush, frameDuration=1/60, schedule=None, clock=time.monotonic):
+        self.flushCallback = flush
+        self.frameDuration = frameDuration
+        self.schedule = schedule
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.pending = False
+        self.eventCount = 0
+        self.flushCount = 0
+        # number of events that did not get a flush of their own
+        self.mergedCount = 0
+        self._lastFlush = None
+        self._scheduled = False
+
+    def submit(self):
+        self.eventCount += 1
+        if self.pending:
+            self.mergedCount += 1
+        self.pending = True
+        now = self.clock()
+        if self._lastFlush is None or now - self._lastFlush >= self.frameDuration:
+            self.flush()
+        elif self.schedule is not None and not self._scheduled:
+            self._scheduled = True
+            self.schedule(self.frameDuration - (now - self._lastFlush), self._scheduledFlush)
+
+    def _scheduledFlush(self):
+        self._scheduled = False
+        self.flush()
+
+    def flush(self):
+        # returns True if there was something to flush
+        if not self.pending:
+            return False
+        self.pending = False
+        self._lastFlush = self.clock()
+        self.flushCount += 1
+        self.flushCallback()
+        return True
+
+    def asText(self):
+        return "%d drag events, %d merged, %d redraws" % (self.eventCount, self.mergedCount, self.flushCount)
@@ -0,0 +1,244 @@
+"""
+Keep the parameters of the added round shapes in the glyph lib, so a
+shape can be opened in the tool again.
+
+The glyph lib has a dict of contour identifier to parameters. The index
+of a font reads the lib of a glyph the first time the glyph is asked for
+and again only after the glyph changed, never the whole font.
+Works with fontParts glyphs.
+"""
+
+import math
+import random
+import string
+import weakref
+
+from round_shape_geometry import RoundShape, onCurvePointIndexes, pointsToSegments
+
+
+libKey = "com.letterror.SymmetricalRoundShapeDrawingTool.shapes"
+
+shapeParameterNames = (
+    "xMin", "yMin", "xMax", "yMax",
+    "flatFactor_x", "flatFactor_y", "bcpFactor_x", "bcpFactor_y",
+)
+
+identifierCharacters = string.ascii_letters + string.digits
+
+
+def shapeToLib(shape):
+    return {name: getattr(shape, name) for name in shapeParameterNames}
+
+
+def shapeFromLib(data):
+    return RoundShape(*[float(data[name]) for name in shapeParameterNames])
+
+
+def contourIdentifiers(glyph):
+    return set(getattr(contour, "identifier", None) for contour in getattr(glyph, "contours", ()))
+
+
+def existingIdentifiers(glyph):
+    # the identifiers in use, the defcon glyph keeps a set of them
+    naked = glyph.naked() if hasattr(glyph, "naked") else glyph
+    identifiers = getattr(naked, "identifiers", None)
+    if identifiers is None:
+        identifiers = contourIdentifiers(glyph)
+    return identifiers
+
+
+def makeIdentifier(existing=(), length=10):
+    # a random identifier, the way defcon makes them
+    while True:
+        identifier = "".join(random.choice(identifierCharacters) for i in range(length))
+        if identifier not in existing:
+            return identifier
+
+
+def storeShape(glyph, identifier, shape):
+    storeShapes(glyph, {identifier: shape})
+
+
+def storeShapes(glyph, shapes):
+    # many shapes, {identifier: RoundShape}, the lib is read and written once
+    lib = getattr(glyph, "lib", None)
+    if lib is None or not shapes:
+        return
+    data = dict(lib.get(libKey, {}))
+    for identifier, shape in shapes.items():
+        data[identifier] = shapeToLib(shape)
+    lib[libKey] = data
+
+
+def removeShape(glyph, identifier):
+    lib = getattr(glyph, "lib", None)
+    if lib is None or identifier not in lib.get(libKey, {}):
+        return
+    shapes = dict(lib[libKey])
+    del shapes[identifier]
+    if shapes:
+        lib[libKey] = shapes
+    else:
+        del lib[libKey]
+
+
+def removeShapeContour(glyph, index):
+    # remove a contour from the glyph, and its parameters from the lib
+    contour = glyph[index]
+    identifier = getattr(contour, "identifier", None)
+    glyph.removeContour(contour)
+    if identifier is not None:
+        removeShape(glyph, identifier)
+
+
+def readShapes(glyph):
+    """
+    The round shapes in the lib of a glyph whose contour is still there,
+    as {identifier: RoundShape}.
+    """
+    lib = getattr(glyph, "lib", None)
+    if lib is None:
+        return {}
+    data = lib.get(libKey)
+    if not data:
+        return {}
+    existing = contourIdentifiers(glyph)
+    shapes = {}
+    for identifier, parameters in data.items():
+        if identifier not in existing:
+            continue
+        try:
+            shapes[identifier] = shapeFromLib(parameters)
+        except (KeyError, TypeError, ValueError):
+            pass
+    return shapes
+
+
+def shapeDistance(shape, x, y, steps=16):
+    # distance from a point to the outline, the curves flattened in steps
+    distance = None
+    previous = first = None
+    for segmentType, points in pointsToSegments(shape.points()):
+        if segmentType == "moveTo":
+            previous = first = points[0]
+            continue
+        if segmentType == "lineTo":
+            flattened = [points[0]]
+        else:
+            p1, p2, p3 = points
+            p0 = previous
+            flattened = []
+            for step in range(1, steps + 1):
+                t = step / steps
+                mt = 1 - t
+                a = mt * mt * mt
+                b = 3 * mt * mt * t
+                c = 3 * mt * t * t
+                d = t * t * t
+                flattened.append((
+                    a*p0[0] + b*p1[0] + c*p2[0] + d*p3[0],
+                    a*p0[1] + b*p1[1] + c*p2[1] + d*p3[1],
+                ))
+        for point in flattened:
+            segmentDistance = _segmentDistance(previous, point, x, y)
+            if distance is None or segmentDistance < distance:
+                distance = segmentDistance
+            previous = point
+    segmentDistance = _segmentDistance(previous, first, x, y)
+    if distance is None or segmentDistance < distance:
+        distance = segmentDistance
+    return distance
+
+
+def onCurveDistance(shape, x, y):
+    # distance from a point to the nearest on curve point of the shape
+    points = shape.points()
+    return min(math.hypot(points[index][0] - x, points[index][1] - y) for index in onCurvePointIndexes)
+
+
+def _segmentDistance(p0, p1, x, y):
+    dx = p1[0] - p0[0]
+    dy = p1[1] - p0[1]
+    length = dx * dx + dy * dy
+    t = 0
+    if length:
+        t = max(0, min(1, ((x - p0[0]) * dx + (y - p0[1]) * dy) / length))
+    return math.hypot(p0[0] + t * dx - x, p0[1] + t * dy - y)
+
+
+class FontShapeIndex(object):
+
+    """
+    The round shapes of the glyphs of one font, read from the glyph libs
+    when a glyph is first asked for. Call `glyphChanged` when a glyph
+    changes, only that glyph is read again. A shape that `hitTest` finds
+    is checked against the contours of the glyph before it is returned.
+    """
+
+    def __init__(self):
+        self._glyphs = {}
+        self.readCount = 0
+
+    def _key(self, glyph):
+        layer = getattr(glyph, "layer", None)
+        return getattr(layer, "name", None), glyph.name
+
+    def shapes(self, glyph):
+        key = self._key(glyph)
+        shapes = self._glyphs.get(key)
+        if shapes is None:
+            shapes = self._glyphs[key] = readShapes(glyph)
+            self.readCount += 1
+        return shapes
+
+    def glyphChanged(self, glyph):
+        self._glyphs.pop(self._key(glyph), None)
+
+    def clear(self):
+        self._glyphs.clear()
+
+    def hitTest(self, glyph, x, y, distance=8, onCurve=False):
+        """
+        The (identifier, RoundShape) with the outline nearest to x, y
+        within `distance`, or None. With `onCurve` only the on curve
+        points of the shapes count.
+        """
+        best = None
+        bestDistance = distance
+        for identifier, shape in self.shapes(glyph).items():
+            # the curves stay within the bounds of their points, the off
+            # curve points can be outside the box of the shape
+            points = shape.points()
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            if not (min(xs) - distance <= x <= max(xs) + distance and min(ys) - distance <= y <= max(ys) + distance):
+                continue
+            if onCurve:
+                pointDistance = onCurveDistance(shape, x, y)
+            else:
+                pointDistance = shapeDistance(shape, x, y)
+            if pointDistance <= bestDistance:
+                best = identifier, shape
+                bestDistance = pointDistance
+        if best is not None and best[0] not in contourIdentifiers(glyph):
+            # the contour went away without a glyphChanged, read the glyph again
+            self.glyphChanged(glyph)
+            return self.hitTest(glyph, x, y, distance, onCurve)
+        return best
+
+
+_indexes = weakref.WeakKeyDictionary()
+# for glyphs without a font
+_fontlessIndex = FontShapeIndex()
+
+
+def getFontShapeIndex(font):
+    # one index per font, it goes away with the font
+    if font is None:
+        return _fontlessIndex
+    if hasattr(font, "naked"):
+        font = font.naked()
+    index = _indexes.get(font)
+    if index is None:
+        index = _indexes[font] = FontShapeIndex()
+    return index
@@ -0,0 +1,116 @@
+"""
+Timing of the stages of a drag event.
+
+The tool only calls into this when a profiler is switched on, otherwise
+it costs nothing.
+"""
+
+import math
+import time
+from array import array
+
+
+class RingBuffer(object):
+
+    """
+    The last `size` values, in a fixed size array of doubles.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self._values = array("d", bytes(8 * size))
+        self._index = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.size
+        if self._count < self.size:
+            self._count += 1
+
+    def values(self):
+        if self._count < self.size:
+            return self._values[:self._count]
+        return self._values[self._index:] + self._values[:self._index]
+
+    def clear(self):
+        self._index = 0
+        self._count = 0
+
+    def percentile(self, fraction, values=None):
+        # nearest rank percentile
+        if values is None:
+            values = sorted(self.values())
+        if not values:
+            return 0
+        index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+        return values[index]
+
+
+class DragProfiler(object):
+
+    """
+    Time the stages of each drag event with a monotonic clock.
+
+    Each stage keeps its last `size` timings, `summary` has p50, p95 and
+    max per stage. A stage that takes longer than `budget` seconds is
+    reported to `log` once per drag and counted in `overBudget`.
+    """
+
+    def __init__(self, size=256, budget=0.016, showInCaption=True, logOnMouseUp=True, log=print, clock=time.perf_counter):
+        self.size = size
+        self.budget = budget
+        self.showInCaption = showInCaption
+        self.logOnMouseUp = logOnMouseUp
+        self.log = log
+        self.clock = clock
+        self.stages = {}
+        self.overBudget = {}
+        self._warned = set()
+
+    def startDrag(self):
+        self._warned.clear()
+
+    def time(self, stage, callback, *args):
+        clock = self.clock
+        start = clock()
+        result = callback(*args)
+        self.record(stage, clock() - start)
+        return result
+
+    def record(self, stage, seconds):
+        timings = self.stages.get(stage)
+        if timings is None:
+            timings = self.stages[stage] = RingBuffer(self.size)
+        timings.append(seconds)
+        if self.budget is not None and seconds > self.budget:
+            self.overBudget[stage] = self.overBudget.get(stage, 0) + 1
+            if stage not in self._warned:
+                self._warned.add(stage)
+                self.log("%s took %.2f ms, over the %.2f ms budget" % (stage, seconds * 1000, self.budget * 1000))
+
+    def summary(self):
+        # {stage: (p50, p95, max)} in seconds
+        result = {}
+        for stage, timings in self.stages.items():
+            values = sorted(timings.values())
+            if values:
+                result[stage] = timings.percentile(.5, values), timings.percentile(.95, values), values[-1]
+        return result
+
+    def asText(self):
+        lines = ["%-17s %7s %7s %7s" % ("ms", "p50", "p95", "max")]
+        for stage, (p50, p95, maximum) in self.summary().items():
+            line = "%-17s %7.3f %7.3f %7.3f" % (stage, p50 * 1000, p95 * 1000, maximum * 1000)
+            if self.overBudget.get(stage):
+                line += " %d over budget" % self.overBudget[stage]
+            lines.append(line)
+        return "\n".join(lines)
+
+    def clear(self):
+        self.stages.clear()
+        self.overBudget.clear()
+        self._warned.clear()
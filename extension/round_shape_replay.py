@@ -0,0 +1,645 @@
+"""
+Replay drag sessions against the drawing tool, without RoboFont.
+
+    python round_shape_replay.py                      run the benchmarks
+    python round_shape_replay.py session.jsonl        replay recorded sessions
+    python round_shape_replay.py --save base.json
+    python round_shape_replay.py --compare base.json  fail on slower p95
+    python round_shape_replay.py --startup            time a cold import, install and first drag
+    python round_shape_replay.py --emit 500           time adding a shape to a glyph
+
+When mojo can not be imported, small stand-ins for the mojo layers, pens
+and glyphs are installed. The time of the recorded events drives the
+clock of the tool, so events are merged per frame as they were recorded.
+Sessions are recorded in the tool with the r key, see
+round_shape_recording.py for the format.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import sys
+import time
+import types
+
+from round_shape_recording import readSession, unpackModifiers
+from round_shape_profiling import DragProfiler
+from round_shape_geometry import RoundShape, ShapeOutline
+
+
+# stand-ins for mojo
+
+class StubPoint(object):
+
+    __slots__ = ("x", "y", "type")
+
+    def __init__(self, x, y, type=None):
+        self.x = x
+        self.y = y
+        self.type = type
+
+
+class StubContour(object):
+
+    def __init__(self, identifier=None):
+        self.points = []
+        self.identifier = identifier
+
+
+class StubPen(object):
+
+    """
+    Segment pen that collects contours of StubPoints.
+    """
+
+    def __init__(self, contours=None):
+        if contours is None:
+            contours = []
+        self.contours = contours
+        self._contour = None
+
+    def moveTo(self, pt):
+        self._contour = StubContour()
+        self._contour.points.append(StubPoint(pt[0], pt[1], "move"))
+
+    def lineTo(self, pt):
+        self._contour.points.append(StubPoint(pt[0], pt[1], "line"))
+
+    def curveTo(self, *pts):
+        for x, y in pts[:-1]:
+            self._contour.points.append(StubPoint(x, y))
+        x, y = pts[-1]
+        self._contour.points.append(StubPoint(x, y, "curve"))
+
+    def qCurveTo(self, *pts):
+        for x, y in pts[:-1]:
+            self._contour.points.append(StubPoint(x, y))
+        x, y = pts[-1]
+        self._contour.points.append(StubPoint(x, y, "qcurve"))
+
+    def closePath(self):
+        contour = self._contour
+        if contour is not None and contour.points:
+            first = contour.points[0]
+            if first.type == "move":
+                first.type = "line"
+            self.contours.append(contour)
+        self._contour = None
+
+    endPath = closePath
+
+    def addComponent(self, glyphName, transformation):
+        pass
+
+
+class StubPointPen(object):
+
+    """
+    Point pen that collects contours of StubPoints.
+    """
+
+    def __init__(self, contours=None):
+        if contours is None:
+            contours = []
+        self.contours = contours
+        self._contour = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._contour = StubContour(identifier)
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self._contour.points.append(StubPoint(pt[0], pt[1], segmentType))
+
+    def endPath(self):
+        self.contours.append(self._contour)
+        self._contour = None
+
+    def addComponent(self, glyphName, transformation, identifier=None, **kwargs):
+        pass
+
+
+class StubLayer(object):
+
+    """
+    A merz layer that remembers what was set.
+    """
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self.sublayers = []
+        self.visible = True
+        self.position = None
+        self.imageSettings = None
+        self.text = None
+        self.contours = []
+        self.writeCount = 0
+
+    def _appendSublayer(self, **settings):
+        layer = StubLayer(**settings)
+        self.sublayers.append(layer)
+        return layer
+
+    appendBaseSublayer = _appendSublayer
+    appendSymbolSublayer = _appendSublayer
+    appendTextLineSublayer = _appendSublayer
+    appendPathSublayer = _appendSublayer
+
+    def getSublayers(self):
+        return list(self.sublayers)
+
+    def clearSublayers(self):
+        self.sublayers = []
+
+    def setVisible(self, value):
+        self.visible = value
+
+    def propertyGroup(self):
+        return contextlib.nullcontext()
+
+    def setPosition(self, position):
+        self.position = position
+        self.writeCount += 1
+
+    def setImageSettings(self, settings):
+        self.imageSettings = settings
+        self.writeCount += 1
+
+    def setText(self, text):
+        self.text = text
+        self.writeCount += 1
+
+    def getPen(self):
+        self.contours = []
+        self.writeCount += 1
+        return StubPen(self.contours)
+
+
+class StubInfo(object):
+
+    def __init__(self):
+        self.unitsPerEm = 1000
+
+
+class StubLayerName(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+class StubGlyph(object):
+
+    def __init__(self, name="a", font=None):
+        self.name = name
+        self.font = font
+        self.layer = StubLayerName("foreground")
+        self.contours = []
+        self.lib = {}
+        self.undoCount = 0
+
+    def __len__(self):
+        return len(self.contours)
+
+    def __getitem__(self, index):
+        return self.contours[index]
+
+    def removeContour(self, contour):
+        self.contours.remove(contour)
+
+    def getPen(self):
+        return StubPen(self.contours)
+
+    def getPointPen(self):
+        return StubPointPen(self.contours)
+
+    @contextlib.contextmanager
+    def undo(self, title=None):
+        self.undoCount += 1
+        yield
+
+
+class StubFont(object):
+
+    def __init__(self):
+        self.info = StubInfo()
+        self.selectedGlyphNames = []
+        self.glyphs = {}
+        self.layers = [self]
+
+    def __contains__(self, glyphName):
+        return glyphName in self.glyphs
+
+    def __getitem__(self, glyphName):
+        return self.glyphs[glyphName]
+
+    def newGlyph(self, glyphName):
+        glyph = self.glyphs[glyphName] = StubGlyph(glyphName, self)
+        return glyph
+
+    def getLayer(self, layerName):
+        return self
+
+
+class StubBaseEventTool(object):
+
+    def __init__(self):
+        self._modifiers = {}
+        self._containers = {}
+        self.setup()
+
+    def setup(self):
+        pass
+
+    def getModifiers(self):
+        return self._modifiers
+
+    def extensionContainer(self, identifier, location=None, clear=False):
+        container = self._containers.get(identifier)
+        if container is None or clear:
+            container = self._containers[identifier] = StubLayer(location=location)
+        return container
+
+
+class StubExtensionBundle(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def getResourceImage(self, name):
+        return None
+
+
+class StubWorld(object):
+    # what CurrentGlyph, CurrentFont and AllFonts return
+    font = None
+    glyph = None
+
+
+def installStubMojo():
+    """
+    Put the stand-ins in sys.modules, unless the real mojo is available.
+    Returns True if the stand-ins are used.
+    """
+    try:
+        import mojo.events  # noqa: F401
+        return False
+    except ImportError:
+        pass
+    mojo = types.ModuleType("mojo")
+    events = types.ModuleType("mojo.events")
+    events.BaseEventTool = StubBaseEventTool
+    events.installTool = lambda tool: None
+    roboFont = types.ModuleType("mojo.roboFont")
+    roboFont.CurrentGlyph = lambda: StubWorld.glyph
+    roboFont.CurrentFont = lambda: StubWorld.font
+    roboFont.AllFonts = lambda: [StubWorld.font] if StubWorld.font is not None else []
+    extensions = types.ModuleType("mojo.extensions")
+    extensions.ExtensionBundle = StubExtensionBundle
+    extensions.getExtensionDefault = lambda key, fallback=None: fallback
+    mojo.events = events
+    mojo.roboFont = roboFont
+    mojo.extensions = extensions
+    sys.modules.update({
+        "mojo": mojo,
+        "mojo.events": events,
+        "mojo.roboFont": roboFont,
+        "mojo.extensions": extensions,
+    })
+    return True
+
+
+def makeGlyph(contourCount=0, glyphName="a"):
+    # a current font and glyph with a number of round shapes in it
+    font = StubFont()
+    glyph = font.newGlyph(glyphName)
+    pen = glyph.getPen()
+    columns = max(1, int(math.sqrt(contourCount)))
+    for index in range(contourCount):
+        x = (index % columns) * 30
+        y = (index // columns) * 30
+        ShapeOutline(RoundShape(x, y, x + 20, y + 20, .25, 0, .2, .2)).draw(pen)
+    StubWorld.font = font
+    StubWorld.glyph = glyph
+    return glyph
+
+
+# replay
+
+class ReplayClock(object):
+
+    """
+    Clock and callLater for the tool, driven by the time of the events.
+    """
+
+    def __init__(self):
+        self.now = 0
+        self._timers = []
+
+    def __call__(self):
+        return self.now
+
+    def callLater(self, delay, callback):
+        self._timers.append((self.now + delay, callback))
+
+    def advance(self, now):
+        while self._timers:
+            self._timers.sort(key=lambda timer: timer[0])
+            due, callback = self._timers[0]
+            if due > now:
+                break
+            del self._timers[0]
+            self.now = due
+            callback()
+        self.now = max(self.now, now)
+
+
+class SessionPlayer(object):
+
+    """
+    Feed the events of a session to a tool and time each of them.
+    """
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.clock = ReplayClock()
+        tool.dragCoalescer.clock = self.clock
+        tool.dragCoalescer.schedule = self.clock.callLater
+        # stage timings of the tool
+        tool.profiler = DragProfiler(size=4096, budget=None, showInCaption=False, logOnMouseUp=False)
+        self.events = DragProfiler(size=4096, budget=None)
+        self.mergedCount = 0
+        self.flushCount = 0
+
+    def play(self, events):
+        tool = self.tool
+        timer = time.perf_counter
+        for event in events:
+            kind, t = event[0], event[1]
+            self.clock.advance(t)
+            start = timer()
+            if kind == "g":
+                tool.mouseDragged(StubPoint(event[2], event[3]), StubPoint(event[4], event[5]))
+                stage = "mouseDragged"
+            elif kind == "m":
+                tool._modifiers = unpackModifiers(event[2])
+                tool.modifiersChanged()
+                stage = "modifiersChanged"
+            elif kind == "d":
+                tool.mouseDown(StubPoint(event[2], event[3]), event[4])
+                stage = "mouseDown"
+            elif kind == "u":
+                tool.mouseUp(StubPoint(event[2], event[3]))
+                self.mergedCount += tool.dragCoalescer.mergedCount
+                self.flushCount += tool.dragCoalescer.flushCount
+                stage = "mouseUp"
+            else:
+                raise ValueError("unknown event %r" % kind)
+            self.events.record(stage, timer() - start)
+        self.clock.advance(self.clock.now + 1)
+
+    def results(self):
+        stages = dict(self.tool.profiler.summary())
+        stages.update(self.events.summary())
+        return dict(
+            stages=stages,
+            merged=self.mergedCount,
+            flushes=self.flushCount,
+        )
+
+
+def dragEvents(start, steps, dx, dy, rate=240, t=0, modifiers=0):
+    # mouseDown, a straight drag of `steps` events at `rate` events per second, mouseUp
+    x, y = start
+    events = [["m", t, modifiers], ["d", t, x, y, 1]]
+    for step in range(steps):
+        t += 1 / rate
+        x += dx
+        y += dy
+        events.append(["g", t, x, y, dx, dy])
+    events.append(["u", t, x, y])
+    return events
+
+
+def sizeThenModifiedDrag(steps, modifiers, rate=240):
+    # size the shape first, then drag with modifiers for `steps` events
+    events = dragEvents((0, 0), 60, 4, 3, rate=rate)[:-1]
+    t = events[-1][1]
+    x, y = events[-1][2:4]
+    events.append(["m", t, modifiers])
+    for step in range(steps):
+        t += 1 / rate
+        dx = math.sin(step / 50) * 2
+        dy = math.cos(step / 70) * 2
+        x += dx
+        y += dy
+        events.append(["g", t, x, y, dx, dy])
+    events.append(["u", t, x, y])
+    return events
+
+
+def benchmarks():
+    # name, contours in the glyph, events
+    return [
+        ("small glyph", 4, dragEvents((0, 0), 400, 2, 1)),
+        ("huge glyph", 2000, dragEvents((0, 0), 400, 2, 1)),
+        ("long curves drag", 4, sizeThenModifiedDrag(5000, 4)),
+        ("fine control drag", 4, sizeThenModifiedDrag(2000, 2 | 8)),
+    ]
+
+
+def runSession(name, contourCount, events):
+    import the_symmetrical_round_shape_drawing_tool as toolModule
+    makeGlyph(contourCount)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    player = SessionPlayer(tool)
+    player.play(events)
+    return name, player.results()
+
+
+# imported by the tool on first use, not at launch
+deferredImports = ("numpy", "fontTools.pens.basePen", "fontTools.pens.pointPen", "booleanOperations")
+
+
+def _startupRun():
+    """
+    One cold start, in a fresh interpreter: import the tool, install it
+    the way RoboFont does at launch, then use it for the first time.
+    Prints the timings as JSON.
+    """
+    timer = time.perf_counter
+    installStubMojo()
+    # the harness imported some modules of the tool, import them again
+    for name in list(sys.modules):
+        if name.startswith("round_shape_") and name != "round_shape_replay":
+            del sys.modules[name]
+    timings = {}
+    start = timer()
+    import the_symmetrical_round_shape_drawing_tool as toolModule
+    timings["importTool"] = timer() - start
+    loaded = [name for name in deferredImports if name in sys.modules]
+    makeGlyph(20)
+    start = timer()
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    toolModule.installTool(tool)
+    tool.getToolbarIcon()
+    timings["install"] = timer() - start
+    start = timer()
+    tool.becomeActive()
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.mouseDown(StubPoint(0, 0), 1)
+    for step in range(1, 20):
+        tool.mouseDragged(StubPoint(step * 10, step * 8), StubPoint(10, 8))
+    tool.mouseUp(StubPoint(190, 152))
+    timings["firstDrag"] = timer() - start
+    # what the tool no longer pays at launch
+    for name in deferredImports:
+        start = timer()
+        try:
+            __import__(name)
+        except ImportError:
+            continue
+        timings["later: " + name] = timer() - start
+    print(json.dumps(dict(timings=timings, loadedAtImport=loaded)))
+
+
+def measureStartup(repeat=10):
+    """
+    Time importing the tool, installing it and the first drag, each run in
+    a fresh interpreter, so nothing the tool imports is loaded yet. The
+    RoboFont parts are the stand-ins, so install and the layers cost next
+    to nothing here, the imports are what RoboFont pays at launch.
+    Returns the median timings and the modules that were still imported
+    with the tool.
+    """
+    import os
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = "import round_shape_replay; round_shape_replay._startupRun()"
+    timings = {}
+    loaded = set()
+    for index in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=here, check=True, capture_output=True, text=True).stdout
+        run = json.loads(output.splitlines()[-1])
+        for name, value in run["timings"].items():
+            timings.setdefault(name, []).append(value)
+        loaded.update(run["loadedAtImport"])
+    return {name: sorted(values)[len(values) // 2] for name, values in timings.items()}, sorted(loaded)
+
+
+def formatStartup(result):
+    timings, loaded = result
+    lines = ["%-36s %8.3f ms" % (name, value * 1000) for name, value in timings.items()]
+    deferred = sum(value for name, value in timings.items() if name.startswith("later: "))
+    lines.append("%-36s %8.3f ms" % ("not at launch anymore", deferred * 1000))
+    if loaded:
+        lines.append("still imported at launch: %s" % ", ".join(loaded))
+    return "\n".join(lines)
+
+
+def measureEmission(contourCount=500, repeat=1000):
+    """
+    Time adding a shape to a glyph that already has `contourCount`
+    contours, with segment pen calls and with one point pen pass.
+    Uses fontParts glyphs when fontParts is installed.
+    """
+    from round_shape_geometry import flatTolerance
+    try:
+        from fontParts.fontshell import RFont
+    except ImportError:
+        RFont = None
+
+    def newGlyph():
+        if RFont is None:
+            return makeGlyph(contourCount)
+        glyph = RFont().newGlyph("a")
+        pen = glyph.getPointPen()
+        for index in range(contourCount):
+            ShapeOutline(RoundShape(index, 0, index + 20, 20, .25, 0, .2, .2)).drawPoints(pen)
+        return glyph
+
+    outline = ShapeOutline(RoundShape(0, 0, 300, 200, .25, .1, .2, .2))
+    timer = time.perf_counter
+    timings = {}
+    glyph = newGlyph()
+    start = timer()
+    for index in range(repeat):
+        outline.draw(glyph.getPen(), flatTolerance=flatTolerance)
+    timings["segment pen"] = (timer() - start) / repeat
+    glyph = newGlyph()
+    start = timer()
+    for index in range(repeat):
+        outline.drawPoints(glyph.getPointPen(), flatTolerance=flatTolerance)
+    timings["point pen"] = (timer() - start) / repeat
+    return "fontParts" if RFont is not None else "stub", timings
+
+
+def formatResults(results):
+    lines = []
+    for name, result in results.items():
+        lines.append("%s: %d merged, %d flushes" % (name, result["merged"], result["flushes"]))
+        lines.append("    %-17s %8s %8s %8s" % ("ms", "p50", "p95", "max"))
+        for stage, (p50, p95, maximum) in result["stages"].items():
+            lines.append("    %-17s %8.3f %8.3f %8.3f" % (stage, p50 * 1000, p95 * 1000, maximum * 1000))
+    return "\n".join(lines)
+
+
+def compareResults(results, baseline, tolerance):
+    # the stages with a p95 more than `tolerance` slower than the baseline
+    regressions = []
+    for name, result in results.items():
+        baseStages = baseline.get(name, {}).get("stages", {})
+        for stage, (p50, p95, maximum) in result["stages"].items():
+            if stage not in baseStages:
+                continue
+            baseP95 = baseStages[stage][1]
+            if baseP95 and p95 > baseP95 * (1 + tolerance):
+                regressions.append((name, stage, baseP95, p95))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Replay drag sessions against the symmetrical round shape drawing tool.")
+    parser.add_argument("sessions", nargs="*", help="recorded session files, the benchmarks run when there are none")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the p95 timings with this JSON file")
+    parser.add_argument("--tolerance", type=float, default=.25, help="allowed p95 slowdown, .25 is 25%%")
+    parser.add_argument("--startup", action="store_true", help="time a cold import, install and first drag of the tool, in fresh interpreters")
+    parser.add_argument("--emit", type=int, metavar="CONTOURS", help="time adding a shape to a glyph with this many contours")
+    options = parser.parse_args(args)
+
+    installStubMojo()
+    if options.startup:
+        print(formatStartup(measureStartup()))
+        return 0
+    if options.emit is not None:
+        kind, timings = measureEmission(options.emit)
+        for name, value in timings.items():
+            print("%s glyph, %d contours, %-12s %8.3f ms" % (kind, options.emit, name, value * 1000))
+        return 0
+    if options.sessions:
+        runs = []
+        for path in options.sessions:
+            header, events = readSession(path)
+            contourCount = header.get("glyph", {}).get("contours", 0)
+            runs.append((path, contourCount, list(events)))
+    else:
+        runs = benchmarks()
+    results = dict(runSession(*run) for run in runs)
+    print(formatResults(results))
+    if options.save:
+        with open(options.save, "w") as f:
+            json.dump(results, f, indent=1)
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        regressions = compareResults(results, baseline, options.tolerance)
+        for name, stage, before, after in regressions:
+            print("slower: %s %s p95 %.3f ms -> %.3f ms" % (name, stage, before * 1000, after * 1000))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
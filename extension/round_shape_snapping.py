@@ -0,0 +1,232 @@
+"""
+Snap the corners of the shape to what is already in the glyph, and the
+factors to a table of targets.
+
+The glyph only needs to look like a fontParts glyph.
+"""
+
+import bisect
+import json
+import math
+
+from round_shape_geometry import circleFactor
+
+
+class PointIndex(object):
+
+    """
+    Points in a uniform grid of square cells, for nearest point queries.
+
+    A query only looks at the cells within the threshold, so it does not
+    get slower with the number of points in the rest of the glyph.
+    """
+
+    def __init__(self, points=(), cellSize=64):
+        self.cellSize = cellSize
+        self._cells = {}
+        self._count = 0
+        for x, y in points:
+            self.add(x, y)
+
+    def __len__(self):
+        return self._count
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cellSize)), int(math.floor(y / self.cellSize))
+
+    def add(self, x, y):
+        self._cells.setdefault(self._cell(x, y), []).append((x, y))
+        self._count += 1
+
+    def clear(self):
+        self._cells.clear()
+        self._count = 0
+
+    def nearest(self, x, y, threshold):
+        # the nearest point within threshold, or None. Of points at the same
+        # distance the largest wins, as in nearestValue, in whatever cell
+        # or order they were added.
+        cells = self._cells
+        if not cells:
+            return None
+        cx, cy = self._cell(x, y)
+        reach = int(math.ceil(threshold / self.cellSize))
+        best = None
+        bestDistance = threshold * threshold
+        for ix in range(cx - reach, cx + reach + 1):
+            for iy in range(cy - reach, cy + reach + 1):
+                for point in cells.get((ix, iy), ()):
+                    dx = point[0] - x
+                    dy = point[1] - y
+                    distance = dx * dx + dy * dy
+                    if distance < bestDistance or (distance == bestDistance and (best is None or point > best)):
+                        best = point
+                        bestDistance = distance
+        return best
+
+
+def nearestValue(values, value, threshold):
+    # nearest value within threshold in a sorted list, or None
+    index = bisect.bisect_left(values, value)
+    best = None
+    bestDistance = threshold
+    for candidate in values[max(0, index - 1):index + 1]:
+        distance = abs(candidate - value)
+        if distance <= bestDistance:
+            best = candidate
+            bestDistance = distance
+    return best
+
+
+verticalMetricsAttributes = ("descender", "xHeight", "capHeight", "ascender")
+
+
+class GlyphSnapper(object):
+
+    """
+    Snap targets taken from a glyph: its on curve points, the x and y of
+    its bounds and the vertical metrics of its font.
+
+    `snap` moves a point to the nearest on curve point within `threshold`,
+    otherwise it snaps x and y separately to the nearest line.
+    """
+
+    def __init__(self, threshold=8, cellSize=None):
+        self.threshold = threshold
+        if cellSize is None:
+            # a query then looks at no more than 3 x 3 cells
+            cellSize = 2 * threshold
+        self.points = PointIndex(cellSize=cellSize)
+        self.xValues = []
+        self.yValues = []
+
+    def clear(self):
+        self.points.clear()
+        self.xValues = []
+        self.yValues = []
+
+    def build(self, glyph):
+        self.clear()
+        points = self.points
+        for contour in glyph.contours:
+            for point in contour.points:
+                if point.type not in (None, "offcurve"):
+                    points.add(point.x, point.y)
+        xValues = set()
+        yValues = set([0])
+        bounds = getattr(glyph, "bounds", None)
+        if bounds is not None:
+            xMin, yMin, xMax, yMax = bounds
+            xValues.update((xMin, xMax))
+            yValues.update((yMin, yMax))
+        font = getattr(glyph, "font", None)
+        info = getattr(font, "info", None)
+        for attribute in verticalMetricsAttributes:
+            value = getattr(info, attribute, None)
+            if value is not None:
+                yValues.add(value)
+        self.xValues = sorted(xValues)
+        self.yValues = sorted(yValues)
+
+    def snap(self, x, y):
+        threshold = self.threshold
+        point = self.points.nearest(x, y, threshold)
+        if point is not None:
+            return point
+        snappedX = nearestValue(self.xValues, x, threshold)
+        snappedY = nearestValue(self.yValues, y, threshold)
+        return (x if snappedX is None else snappedX), (y if snappedY is None else snappedY)
+
+
+class SnapTable(object):
+
+    """
+    Snap targets for a pair of factors, sorted per axis.
+
+    `snap` moves a value to the nearest target on its axis within
+    `threshold`. Lookups bisect, so the table can be large.
+    """
+
+    axes = ("x", "y")
+
+    def __init__(self, values=(), threshold=0.02):
+        self.threshold = threshold
+        self.values = dict(x=[], y=[])
+        self.addValues(values)
+
+    def __len__(self):
+        return len(self.values["x"]) + len(self.values["y"])
+
+    def add(self, value, axis=None):
+        # add to one axis, or to both
+        for name in self.axes if axis is None else (axis,):
+            values = self.values[name]
+            index = bisect.bisect_left(values, value)
+            if index == len(values) or values[index] != value:
+                values.insert(index, value)
+
+    def addValues(self, values, axis=None):
+        for value in values:
+            self.add(value, axis)
+
+    def clear(self):
+        for values in self.values.values():
+            del values[:]
+
+    def snap(self, value, axis):
+        snapped = nearestValue(self.values[axis], value, self.threshold)
+        if snapped is None:
+            return value
+        return snapped
+
+    def update(self, data):
+        """
+        Add the targets from `data`: a list of values for both axes, or a
+        dict with "x", "y" and / or "both" lists and an optional "threshold".
+        """
+        if isinstance(data, dict):
+            for key, values in data.items():
+                if key == "threshold":
+                    self.threshold = float(values)
+                elif key == "both":
+                    self.addValues(float(value) for value in values)
+                elif key in self.axes:
+                    self.addValues((float(value) for value in values), key)
+                else:
+                    raise ValueError("unknown snap table key %r" % key)
+        else:
+            self.addValues(float(value) for value in data)
+
+
+def defaultSnapTables():
+    # the bcps snap to the circle and to straight lines, the flats only
+    # to the targets from a file
+    return dict(
+        bcps=SnapTable([circleFactor, 0]),
+        flats=SnapTable(),
+    )
+
+
+def readSnapTables(path, tables=None):
+    """
+    Add the snap targets in the JSON file at `path` to `tables`, the
+    default tables when not given. The file has a "bcps" and / or a
+    "flats" entry, each in a form SnapTable.update understands:
+
+        {"bcps": {"both": [0.3, 0.4], "x": [0.25], "threshold": 0.01},
+         "flats": [0, 0.5]}
+    """
+    if tables is None:
+        tables = defaultSnapTables()
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("%s: expected a dict with bcps and / or flats" % path)
+    for name, values in data.items():
+        if name not in tables:
+            raise ValueError("%s: unknown snap table %r" % (path, name))
+        try:
+            tables[name].update(values)
+        except (TypeError, ValueError) as error:
+            raise ValueError("%s, %s: %s" % (path, name, error))
+    return tables
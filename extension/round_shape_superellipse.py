@@ -0,0 +1,206 @@
+"""
+Bcp factors for superellipse corners.
+
+The quarter of a superellipse |x|**n + |y|**n = 1 from (1, 0) to (0, 1) is
+drawn as one cubic curve with handles of length `k` along the tangents,
+the same way the tool draws a corner. For each exponent the handle length
+with the smallest maximum radial deviation from the true superellipse is
+looked for once, offline. The table of those ships next to this module
+and the tool only interpolates in it. The bcp factor of the tool is 1 - k.
+
+    python round_shape_superellipse.py          print the table
+    python round_shape_superellipse.py --build  build the table again
+"""
+
+import json
+import math
+import os
+from array import array
+
+
+tableVersion = 1
+
+defaultTablePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "round_shape_superellipse.json")
+
+# samples along the curve for the deviation, the curve is symmetric
+# so only the first half is measured
+deviationSamples = 64
+
+goldenRatio = (math.sqrt(5) - 1) / 2
+
+
+def superellipseRadius(angle, exponent):
+    # distance from the center to the superellipse at angle, first quadrant
+    c = abs(math.cos(angle))
+    s = abs(math.sin(angle))
+    return (c ** exponent + s ** exponent) ** (-1 / exponent)
+
+
+def curveDeviation(handle, exponent, samples=deviationSamples):
+    """
+    Maximum radial distance between the cubic quarter with handles of
+    length `handle` and the superellipse, in units of the corner radius.
+    """
+    maximum = 0
+    for index in range(samples + 1):
+        t = .5 * index / samples
+        mt = 1 - t
+        a = mt * mt * mt
+        b = 3 * mt * mt * t
+        c = 3 * mt * t * t
+        d = t * t * t
+        # P0 (1, 0), P1 (1, k), P2 (k, 1), P3 (0, 1)
+        x = a + b + c * handle
+        y = b * handle + c + d
+        deviation = abs(math.hypot(x, y) - superellipseRadius(math.atan2(y, x), exponent))
+        if deviation > maximum:
+            maximum = deviation
+    return maximum
+
+
+def fitHandle(exponent, low=0, high=1.5, tolerance=1e-7):
+    """
+    Golden section search for the handle length with the smallest maximum
+    deviation. Returns the handle length and its deviation.
+    """
+    a, b = low, high
+    c = b - goldenRatio * (b - a)
+    d = a + goldenRatio * (b - a)
+    fc = curveDeviation(c, exponent)
+    fd = curveDeviation(d, exponent)
+    while b - a > tolerance:
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - goldenRatio * (b - a)
+            fc = curveDeviation(c, exponent)
+        else:
+            a, c, fc = c, d, fd
+            d = a + goldenRatio * (b - a)
+            fd = curveDeviation(d, exponent)
+    handle = .5 * (a + b)
+    return handle, curveDeviation(handle, exponent)
+
+
+class SuperellipseTable(object):
+
+    """
+    Bcp factors for evenly spaced exponents, with the maximum deviation
+    of each entry. Lookups interpolate linearly between the entries and
+    clamp to the range of the table.
+    """
+
+    def __init__(self, minimum, step, bcpFactors, deviations):
+        self.minimum = minimum
+        self.step = step
+        self.bcpFactors = array("d", bcpFactors)
+        self.deviations = array("d", deviations)
+
+    def __len__(self):
+        return len(self.bcpFactors)
+
+    @property
+    def maximum(self):
+        return self.minimum + (len(self) - 1) * self.step
+
+    def exponents(self):
+        return [self.minimum + index * self.step for index in range(len(self))]
+
+    @classmethod
+    def build(cls, minimum=1, maximum=10, step=.01):
+        count = int(round((maximum - minimum) / step)) + 1
+        bcpFactors = []
+        deviations = []
+        for index in range(count):
+            handle, deviation = fitHandle(minimum + index * step)
+            bcpFactors.append(1 - handle)
+            deviations.append(deviation)
+        return cls(minimum, step, bcpFactors, deviations)
+
+    def _interpolate(self, values, exponent):
+        position = (exponent - self.minimum) / self.step
+        position = max(0, min(position, len(values) - 1))
+        index = min(int(position), len(values) - 2)
+        f = position - index
+        return values[index] + f * (values[index + 1] - values[index])
+
+    def bcpFactor(self, exponent):
+        return self._interpolate(self.bcpFactors, exponent)
+
+    def deviation(self, exponent):
+        # the interpolated maximum deviation, in units of the corner radius
+        return self._interpolate(self.deviations, exponent)
+
+    def write(self, path):
+        data = dict(
+            version=tableVersion,
+            minimum=self.minimum,
+            step=self.step,
+            bcpFactors=list(self.bcpFactors),
+            deviations=list(self.deviations),
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def read(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != tableVersion:
+            raise ValueError("%s: unknown table version %r" % (path, data.get("version")))
+        return cls(data["minimum"], data["step"], data["bcpFactors"], data["deviations"])
+
+    @classmethod
+    def load(cls, path=defaultTablePath):
+        # the table at path, built and written there when there is none
+        if path is not None and os.path.exists(path):
+            try:
+                return cls.read(path)
+            except (OSError, ValueError, KeyError):
+                pass
+        table = cls.build()
+        if path is not None:
+            try:
+                table.write(path)
+            except OSError:
+                pass
+        return table
+
+    def asText(self, every=1):
+        lines = ["%8s %10s %10s" % ("exponent", "bcpFactor", "deviation")]
+        for index in range(0, len(self), every):
+            lines.append("%8.2f %10.6f %10.6f" % (self.minimum + index * self.step, self.bcpFactors[index], self.deviations[index]))
+        return "\n".join(lines)
+
+
+_table = None
+
+
+def getSuperellipseTable():
+    # the table, loaded on first use
+    global _table
+    if _table is None:
+        _table = SuperellipseTable.load()
+    return _table
+
+
+def main(args=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Print the table of superellipse bcp factors."
+    )
+    parser.add_argument("--build", action="store_true", help="build the table again")
+    parser.add_argument("--path", default=defaultTablePath, help="path of the table")
+    parser.add_argument("--every", type=int, default=10, help="print every so many entries")
+    options = parser.parse_args(args)
+    if options.build:
+        table = SuperellipseTable.build()
+        table.write(options.path)
+    else:
+        table = SuperellipseTable.load(options.path)
+    print(table.asText(options.every))
+    index = max(range(len(table)), key=table.deviations.__getitem__)
+    print("largest deviation %.6f at exponent %.2f" % (table.deviations[index], table.exponents()[index]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,77 @@
-import math
+import os
+import time
 from mojo.events import BaseEventTool, installTool
-from mojo.roboFont import CurrentGlyph
-from mojo.extensions import ExtensionBundle
-
-
-bundle = ExtensionBundle("SymmetricalRoundShapeDrawingTool")
-toolbarImage = bundle.getResourceImage("toolbar")
+from mojo.roboFont import CurrentGlyph, CurrentFont, AllFonts
+from mojo.extensions import ExtensionBundle, getExtensionDefault
+
+try:
+    from PyObjCTools.AppHelper import callAfter, callLater
+except ImportError:
+    callAfter = callLater = None
+
+from round_shape_geometry import RoundShape, ShapeOutline, circleFactor, flatTolerance
+from round_shape_drag import DragCoalescer
+from round_shape_layers import RetainedSymbolLayers, RetainedTextLayer
+from round_shape_bulk import BulkReport, addOutlineCopiesToGlyph, addOutlineToGlyphs, collectTargetGlyphs
+from round_shape_array import GuidePath, arrayPoints, drawArray, gridOffsets, pathOffsets
+from round_shape_profiling import DragProfiler
+from round_shape_recording import SessionRecorder
+from round_shape_snapping import GlyphSnapper, defaultSnapTables, readSnapTables
+from round_shape_superellipse import getSuperellipseTable
+from round_shape_lib import existingIdentifiers, getFontShapeIndex, makeIdentifier, removeShape, removeShapeContour, storeShape
+from round_shape_duplicates import getFontContourIndex, shapeContourKey
+from round_shape_history import ParameterHistory
+from round_shape_metrics import shapeMetrics
+from round_shape_boolean import (
+    BooleanPreview, ContourSnapshot, getBooleanOperationManager,
+    booleanOperationNames, booleanShape, drawContours, drawPointContours, glyphSnapshot
+)
+
+
+# loaded when the toolbar asks for the icon, not on import
+bundle = None
+toolbarImage = None
+
+
+def getToolbarImage():
+    global bundle, toolbarImage
+    if toolbarImage is None:
+        bundle = ExtensionBundle("SymmetricalRoundShapeDrawingTool")
+        toolbarImage = bundle.getResourceImage("toolbar")
+    return toolbarImage
+
+
+# a JSON file with more snap targets for the factors, see readSnapTables
+snapTargetsPathKey = "com.letterror.SymmetricalRoundShapeDrawingTool.snapTargetsPath"
 
 
 class SymmetricalRoundShapeDrawingTool(BaseEventTool):
 
     BASE_DOT_SIZE = 4
+    # press b to cycle where the shape is added
+    BULK_MODES = [None, "selection", "layers", "masters"]
+    BULK_MODE_NAMES = {
+        "selection": "selected glyphs",
+        "layers": "selected glyphs, all layers",
+        "masters": "selected glyphs, all open fonts",
+    }
+    # print the timing of bulk adds to this many glyphs, or more
+    BULK_REPORT_THRESHOLD = 20
+    # the parameters of a drag frame, press [ and ] to step through them
+    HISTORY_FIELDS = (
+        "xMin", "yMin", "xMax", "yMax",
+        "flatFactor_x", "flatFactor_y", "bcpFactor_x", "bcpFactor_y",
+        "xComp", "yComp", "superellipseExponent",
+    )
+    HISTORY_SIZE = 256
+    # press u to preview the shape merged with the glyph
+    BOOLEAN_OPERATIONS = [None, "union", "subtract"]
+    # seconds mouseUp waits for the worker before merging by itself
+    BOOLEAN_WAIT = 1
+    # press a to add copies in a grid or along the selected contour
+    ARRAY_MODES = [None, "grid", "path"]
+    # drag this far with command and option for one more or one less copy
+    ARRAY_DRAG_STEP = 20
 
     def setup(self):
         self. minimumWidth = self.minimumHeight = 20
@@ -19,7 +80,11 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
         self.xMin = self.yMin = None
         self.xMax = self.yMax = None
         self.lastPt = None
-        self._didCalculate = False
+        self.shape = None
+        self._outline = None
+        # what changed since the last calculate: "bounds", "flats" and / or "bcps"
+        self._dirty = set()
+        self._calculatedShiftDown = None
         self.flatFactor_x = .25
         self.flatFactor_y = 0
         self.bcpFactor_x = 0.2
@@ -29,8 +94,60 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
         self._orientation = None
         self._shiftDown = False
         self._controlDown = False
-        self._circleFactor = 1-0.552284749831
-
+        self._circleFactor = circleFactor
+        self.bulkMode = None
+        self.lastBulkReport = None
+        # press p to time the drag stages
+        self.profiler = None
+        # press r to record the events to a session file
+        self.recorder = None
+        # press s to snap the corners to the glyph while sizing
+        self.snapToGlyph = True
+        self.glyphSnapper = GlyphSnapper()
+        self._snapIndexStale = True
+        # the glyph we get change notifications from
+        self._observedGlyph = None
+        # True while addShape writes, it updates the contour index itself
+        self._addingShape = False
+        # click an on curve point of an added shape, or its outline with
+        # control, to edit it: (identifier, shape)
+        self.editing = None
+        # the factors snap to these while dragging with command or option
+        self.snapTables = defaultSnapTables()
+        self._snapTargetsSource = None
+        # the factors as the drag moved them, before snapping: name: (value, snapped)
+        self._unsnappedFactors = {}
+        # press e to drag a superellipse exponent instead of the bcps
+        self.superellipseMode = False
+        self.superellipseExponent = 2
+        # a shape that is already in the glyph: "skip" it, "replace" it or None to add it anyway
+        self.duplicateContours = "skip"
+        # copies of the shape: columns and rows of the grid, the space
+        # between the copies relative to the shape, the copies along a guide
+        self.arrayMode = None
+        self.arrayColumns = 3
+        self.arrayRows = 1
+        self.arraySpacing = .5
+        self.arrayCount = 8
+        self.arrayGuide = None
+        self._arrayDrag = [0, 0]
+        self._arrayPoints = None
+        # the drag frames, to step back and forth
+        self.history = ParameterHistory(len(self.HISTORY_FIELDS) + 1, self.HISTORY_SIZE)
+        # press u to union or subtract with the glyph, m to merge on mouse up
+        self.booleanOperation = None
+        self.mergeOnMouseUp = False
+        self.booleanPreview = BooleanPreview(notify=self.notifyBooleanPreview)
+        self._booleanSnapshot = None
+        # calculate and redraw at most once per frame
+        self.dragCoalescer = DragCoalescer(self.redraw, schedule=callLater)
+        # the layers are made when the tool is first used
+        self.dots = None
+
+    def setupLayers(self):
+        # make the layers once, they are reused every time the tool is active
+        if self.dots is not None:
+            return
         foregroundContainer = self.extensionContainer(
             identifier="com.letterror.SymmetricalRoundShapeDrawingTool.foreground",
             location="foreground",
@@ -46,6 +163,8 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
                     fillColor=(0, 0, 0, 0)
                 )
             )
+        # only write the dot properties that changed
+        self.dotLayers = RetainedSymbolLayers(self.dots.getSublayers())
 
         self.captionLayer = foregroundContainer.appendTextLineSublayer(
             size=(400, 100),
@@ -54,6 +173,7 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
             fillColor=(1, 0.5, 0, 1),
             horizontalAlignment="left"
         )
+        self.caption = RetainedTextLayer(self.captionLayer)
         self.shapeLayer = foregroundContainer.appendPathSublayer(
             fillColor=(0, 0, 0, 0.03),
             strokeWidth=.5,
@@ -74,17 +194,23 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
         self.layersVisibility(False)
 
     def layersVisibility(self, value):
+        if self.dots is None:
+            return
         self.dots.setVisible(value)
         self.captionLayer.setVisible(value)
         self.shapeLayer.setVisible(value)
         self.previewPathLayer.setVisible(value)
 
     def getToolbarIcon(self):
-        return toolbarImage
+        return getToolbarImage()
 
     def modifiersChanged(self):
+        # calculate the pending drag state with the modifiers it was made with
+        self.dragCoalescer.flush()
         # get modifier keys
         modifiers = self.getModifiers()
+        if self.recorder is not None:
+            self.recorder.modifiersChanged(modifiers)
         if modifiers.get("shiftDown"):
             self._shiftDown = True
         else:
@@ -93,7 +219,10 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
             self._controlDown = True
         else:
             self._controlDown = False
-        if modifiers.get("commandDown"):
+        if self.arrayActive() and modifiers.get("commandDown") and modifiers.get("optionDown"):
+            # the number of copies
+            self.dragState = "array"
+        elif modifiers.get("commandDown"):
             # draggin with command
             self.dragState = "flats"
         elif modifiers.get("optionDown"):
@@ -104,11 +233,200 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
         self.updatePreview()
         self.updateForeground()
 
+    def keyDown(self, event):
+        if event.characters() == "b":
+            index = self.BULK_MODES.index(self.bulkMode)
+            self.bulkMode = self.BULK_MODES[(index + 1) % len(self.BULK_MODES)]
+            self.updateForeground()
+        elif event.characters() == "p":
+            if self.profiler is None:
+                self.profiler = DragProfiler()
+            else:
+                self.profiler = None
+            self.updateForeground()
+        elif event.characters() == "r":
+            self.toggleRecording()
+        elif event.characters() == "s":
+            self.snapToGlyph = not self.snapToGlyph
+            self.updateForeground()
+        elif event.characters() in ("[", "]") and self.shape is not None:
+            self.stepHistory(-1 if event.characters() == "[" else 1)
+        elif event.characters() == "u":
+            if getBooleanOperationManager() is None:
+                print("SymmetricalRoundShapeDrawingTool: booleanOperations is not installed")
+                return
+            index = self.BOOLEAN_OPERATIONS.index(self.booleanOperation)
+            self.booleanOperation = self.BOOLEAN_OPERATIONS[(index + 1) % len(self.BOOLEAN_OPERATIONS)]
+            self.updateForeground()
+        elif event.characters() == "m":
+            self.mergeOnMouseUp = not self.mergeOnMouseUp
+            self.updateForeground()
+        elif event.characters() == "a":
+            index = self.ARRAY_MODES.index(self.arrayMode)
+            self.arrayMode = self.ARRAY_MODES[(index + 1) % len(self.ARRAY_MODES)]
+            if self.arrayMode == "path":
+                self.arrayGuide = self.findArrayGuide(CurrentGlyph())
+            self.redrawArray()
+        elif event.characters() in ("-", "=") and self.arrayMode is not None:
+            step = -.1 if event.characters() == "-" else .1
+            self.arraySpacing = max(-.9, round(self.arraySpacing + step, 3))
+            self.redrawArray()
+        elif event.characters() == "e":
+            self.superellipseMode = not self.superellipseMode
+            if self.superellipseMode:
+                self.setSuperellipseExponent(self.superellipseExponent)
+                if self.shape is not None:
+                    self.redraw()
+            self.updateForeground()
+
+    def recordHistory(self):
+        # one snapshot per calculated frame, the orientation goes last
+        if self.shape is None:
+            return
+        values = [getattr(self, name) for name in self.HISTORY_FIELDS]
+        values.append(-1 if self._orientation is None else int(self._orientation))
+        self.history.record(values)
+
+    def stepHistory(self, steps):
+        # back to the parameters of an earlier frame, without leaving the drag
+        self.dragCoalescer.flush()
+        values = self.history.step(steps)
+        if values is None:
+            return
+        for name, value in zip(self.HISTORY_FIELDS, values):
+            setattr(self, name, value)
+        orientation = values[-1]
+        self._orientation = None if orientation < 0 else bool(orientation)
+        # the orientation matches the bounds, the full calculate does not flip
+        self._dirty.add("bounds")
+        self.redraw()
+
+    def setSuperellipseExponent(self, exponent):
+        # both bcp factors from the table, no fitting here
+        table = getSuperellipseTable()
+        self.superellipseExponent = max(table.minimum, min(exponent, table.maximum))
+        self.bcpFactor_x = self.bcpFactor_y = table.bcpFactor(self.superellipseExponent)
+        self._dirty.add("bcps")
+
+    def observeGlyph(self, glyph):
+        # follow the changes of the current glyph, for the snap and shape indexes
+        naked = glyph.naked() if hasattr(glyph, "naked") else glyph
+        if naked is self._observedGlyph:
+            return
+        self.stopObservingGlyph()
+        self._observedGlyph = naked
+        if hasattr(naked, "addObserver"):
+            naked.addObserver(self, "observedGlyphChanged", "Glyph.Changed")
+
+    def observedGlyphChanged(self, notification):
+        glyph = notification.object
+        self._snapIndexStale = True
+        getFontShapeIndex(getattr(glyph, "font", None)).glyphChanged(glyph)
+        if not self._addingShape:
+            getFontContourIndex(getattr(glyph, "font", None)).glyphChanged(glyph)
+
+    def stopObservingGlyph(self):
+        glyph = self._observedGlyph
+        if glyph is not None:
+            if hasattr(glyph, "removeObserver"):
+                glyph.removeObserver(self, "Glyph.Changed")
+            # nothing tells the indexes about changes from now on, forget the glyph
+            getFontShapeIndex(getattr(glyph, "font", None)).glyphChanged(glyph)
+            getFontContourIndex(getattr(glyph, "font", None)).glyphChanged(glyph)
+        self._observedGlyph = None
+        self._snapIndexStale = True
+
+    def prepareGlyphSnapping(self, glyph):
+        # index the points of the glyph, only when it changed since the last drag
+        if glyph is None:
+            self.glyphSnapper.clear()
+            return
+        if self._snapIndexStale:
+            self.glyphSnapper.build(glyph)
+            # without notifications the index is built on every drag
+            self._snapIndexStale = not hasattr(self._observedGlyph, "addObserver")
+
+    def reopenShape(self, glyph, point):
+        # a click on an on curve point of a shape in the glyph lib opens it
+        # again, with control anywhere on its outline: a drag that starts
+        # next to a shape draws a new one
+        self.editing = None
+        if glyph is None:
+            return False
+        hit = getFontShapeIndex(getattr(glyph, "font", None)).hitTest(glyph, point.x, point.y, onCurve=not self._controlDown)
+        if hit is None:
+            return False
+        identifier, shape = hit
+        self.editing = hit
+        # the corner nearest to the click follows the mouse, the opposite one stays
+        if abs(point.x - shape.xMin) < abs(point.x - shape.xMax):
+            self.xMin, self.xMax = shape.xMax, shape.xMin
+        else:
+            self.xMin, self.xMax = shape.xMin, shape.xMax
+        if abs(point.y - shape.yMin) < abs(point.y - shape.yMax):
+            self.yMin, self.yMax = shape.yMax, shape.yMin
+        else:
+            self.yMin, self.yMax = shape.yMin, shape.yMax
+        self.xComp = self.xMax - round(point.x)
+        self.yComp = self.yMax - round(point.y)
+        self.flatFactor_x = shape.flatFactor_x
+        self.flatFactor_y = shape.flatFactor_y
+        self.bcpFactor_x = shape.bcpFactor_x
+        self.bcpFactor_y = shape.bcpFactor_y
+        # the factors are already the right way around for this box
+        self._orientation = shape.width > shape.height
+        self.shape = shape
+        self._outline = None
+        self._calculatedShiftDown = self._shiftDown
+        self._dirty.clear()
+        self.layersVisibility(True)
+        self.updatePreview()
+        self.updateForeground()
+        return True
+
+    def toggleRecording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            print("recorded %d events to %s" % (self.recorder.eventCount, self.recorder.path))
+            self.recorder = None
+            return
+        glyphInfo = None
+        glyph = CurrentGlyph()
+        if glyph is not None:
+            glyphInfo = dict(
+                name=glyph.name,
+                contours=len(glyph.contours),
+                points=sum(len(contour.points) for contour in glyph.contours)
+            )
+        path = os.path.join(os.path.expanduser("~"), time.strftime("roundShapeSession %Y-%m-%d %H.%M.%S.jsonl"))
+        self.recorder = SessionRecorder(path, glyphInfo)
+        print("recording to %s" % path)
+
     def mouseDown(self, point, clickCount):
+        if self.recorder is not None:
+            self.recorder.mouseDown(point, clickCount)
+        self.setupLayers()
+        glyph = CurrentGlyph()
+        if glyph is not None:
+            self.observeGlyph(glyph)
+        if self.snapToGlyph:
+            self.prepareGlyphSnapping(glyph)
         if self.start is None:
             self.start = point.x, point.y
+        self.dragCoalescer.reset()
+        self.history.clear()
+        if self.reopenShape(glyph, point):
+            self.recordHistory()
+        self.startBooleanPreview(glyph)
+        if self.arrayMode == "path":
+            self.arrayGuide = self.findArrayGuide(glyph)
+        self._arrayDrag = [0, 0]
+        if self.profiler is not None:
+            self.profiler.startDrag()
 
     def mouseDragged(self, point, delta):
+        if self.recorder is not None:
+            self.recorder.mouseDragged(point, delta)
         if not self.lastPt:
             self.lastPt = round(point.x), round(point.y)
             return
@@ -123,6 +441,7 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
         flatExtrapolateLimit = .5
 
         if self.dragState in [None, 'size']:
+            startCorner = self.xMin is None and self.yMin is None
             if self.xMin is None:
                 self.xMin = round(point.x)
             if self.yMin is None:
@@ -133,7 +452,11 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
             if self.yMax is None:
                 self.yMax = round(point.y)
             self.xMax, self.yMax = round(point.x)+self.xComp, round(point.y)+self.yComp
-            self.calculate()
+            if self.snapToGlyph:
+                if startCorner:
+                    self.xMin, self.yMin = self.glyphSnapper.snap(self.xMin, self.yMin)
+                self.xMax, self.yMax = self.glyphSnapper.snap(self.xMax, self.yMax)
+            self._dirty.add("bounds")
             self.lastPt = round(point.x), round(point.y)
 
         elif self.dragState == "curves":
@@ -141,113 +464,341 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
             dy = self.lastPt[1]-point.y
             self.xComp += dx
             self.yComp += dy
-            if dx > 0:
-                self.bcpFactor_x += dx * stepValue
-                self.bcpFactor_x = max(bcpExtrapolateLimit, min(self.bcpFactor_x, 1))
+            if self.superellipseMode:
+                # right and down make the shape squarer
+                self.setSuperellipseExponent(self.superellipseExponent + (dy - dx) * stepValue * 4)
             else:
-                self.bcpFactor_x += dx * stepValue
-                self.bcpFactor_x = max(bcpExtrapolateLimit, min(self.bcpFactor_x, 1))
-            if dy > 0:
-                self.bcpFactor_y -= dy * stepValue
-                self.bcpFactor_y = max(bcpExtrapolateLimit, min(self.bcpFactor_y, 1))
-            else:
-                self.bcpFactor_y -= dy * stepValue
-                self.bcpFactor_y = max(bcpExtrapolateLimit, min(self.bcpFactor_y, 1))
+                bcpFactor_x = self.unsnappedFactor("bcpFactor_x")
+                bcpFactor_y = self.unsnappedFactor("bcpFactor_y")
+                if dx > 0:
+                    bcpFactor_x += dx * stepValue
+                    bcpFactor_x = max(bcpExtrapolateLimit, min(bcpFactor_x, 1))
+                else:
+                    bcpFactor_x += dx * stepValue
+                    bcpFactor_x = max(bcpExtrapolateLimit, min(bcpFactor_x, 1))
+                if dy > 0:
+                    bcpFactor_y -= dy * stepValue
+                    bcpFactor_y = max(bcpExtrapolateLimit, min(bcpFactor_y, 1))
+                else:
+                    bcpFactor_y -= dy * stepValue
+                    bcpFactor_y = max(bcpExtrapolateLimit, min(bcpFactor_y, 1))
+
+                # snap to significant bcp factor values
+                bcpSnapTable = self.snapTables["bcps"]
+                self.snapFactor("bcpFactor_x", bcpFactor_x, bcpSnapTable, "x")
+                self.snapFactor("bcpFactor_y", bcpFactor_y, bcpSnapTable, "y")
             self.lastPt = point.x, point.y
+            self._dirty.add("bcps")
 
-            # snap to significant bcp factor values
-            xSnapValues = [self._circleFactor, 0]
-            ySnapValues = [self._circleFactor, 0]
-            thr = 0.02
-            for xSnap in xSnapValues:
-                v = max(self.bcpFactor_x, xSnap)-min(self.bcpFactor_x, xSnap)
-                if v < thr:
-                    self.bcpFactor_x = xSnap
-                    break
-            for ySnap in ySnapValues:
-                v = max(self.bcpFactor_y, ySnap)-min(self.bcpFactor_y, ySnap)
-                if v < thr:
-                    self.bcpFactor_y = ySnap
-                    break
-            self.calculate()
+        elif self.dragState == "array":
+            dx = self.lastPt[0]-point.x
+            dy = self.lastPt[1]-point.y
+            self.xComp += dx
+            self.yComp += dy
+            # right and up for more copies
+            self._arrayDrag[0] -= dx
+            self._arrayDrag[1] -= dy
+            columns = int(self._arrayDrag[0] / self.ARRAY_DRAG_STEP)
+            rows = int(self._arrayDrag[1] / self.ARRAY_DRAG_STEP)
+            self._arrayDrag[0] -= columns * self.ARRAY_DRAG_STEP
+            self._arrayDrag[1] -= rows * self.ARRAY_DRAG_STEP
+            if self.arrayMode == "path":
+                self.arrayCount = max(1, self.arrayCount + columns + rows)
+            else:
+                self.arrayColumns = max(1, self.arrayColumns + columns)
+                self.arrayRows = max(1, self.arrayRows + rows)
+            self.lastPt = point.x, point.y
 
         elif self.dragState == "flats":
             dx = self.lastPt[0]-point.x
             dy = self.lastPt[1]-point.y
             self.xComp += dx
             self.yComp += dy
+            flatFactor_x = self.unsnappedFactor("flatFactor_x")
+            flatFactor_y = self.unsnappedFactor("flatFactor_y")
             if dx > 0:
-                self.flatFactor_x -= dx * stepValue
-                self.flatFactor_x = max(0, min(self.flatFactor_x, 1+flatExtrapolateLimit))
+                flatFactor_x -= dx * stepValue
+                flatFactor_x = max(0, min(flatFactor_x, 1+flatExtrapolateLimit))
             else:
-                self.flatFactor_x -= dx * stepValue
-                self.flatFactor_x = max(0, min(self.flatFactor_x, 1+flatExtrapolateLimit))
+                flatFactor_x -= dx * stepValue
+                flatFactor_x = max(0, min(flatFactor_x, 1+flatExtrapolateLimit))
             if dy > 0:
-                self.flatFactor_y += dy * stepValue
-                self.flatFactor_y = max(0, min(self.flatFactor_y, 1+flatExtrapolateLimit))
+                flatFactor_y += dy * stepValue
+                flatFactor_y = max(0, min(flatFactor_y, 1+flatExtrapolateLimit))
             else:
-                self.flatFactor_y += dy * stepValue
-                self.flatFactor_y = max(0, min(self.flatFactor_y, 1+flatExtrapolateLimit))
+                flatFactor_y += dy * stepValue
+                flatFactor_y = max(0, min(flatFactor_y, 1+flatExtrapolateLimit))
             self.lastPt = point.x, point.y
+            flatSnapTable = self.snapTables["flats"]
+            self.snapFactor("flatFactor_x", flatFactor_x, flatSnapTable, "x")
+            self.snapFactor("flatFactor_y", flatFactor_y, flatSnapTable, "y")
+            self._dirty.add("flats")
+
+        self.dragCoalescer.submit()
+        if self._shiftDown != self._calculatedShiftDown:
+            # the orientation can flip the factors, calculate before the next event changes them
+            self.dragCoalescer.flush()
+
+    def unsnappedFactor(self, name):
+        # the factor before snapping, unless something else set it since
+        value, snapped = self._unsnappedFactors.get(name, (None, None))
+        if value is None or snapped != getattr(self, name):
+            return getattr(self, name)
+        return value
+
+    def snapFactor(self, name, value, table, axis):
+        # the drag goes on from the unsnapped value, so a slow drag can leave a target
+        snapped = table.snap(value, axis)
+        self._unsnappedFactors[name] = value, snapped
+        setattr(self, name, snapped)
+
+    def redraw(self):
+        profiler = self.profiler
+        if profiler is None:
             self.calculate()
-
-        self.updatePreview()
-        self.updateForeground()
+            self.recordHistory()
+            self.updatePreview()
+            self.updateForeground()
+            return
+        start = profiler.clock()
+        profiler.time("calculate", self.calculate)
+        self.recordHistory()
+        profiler.time("updatePreview", self.updatePreview)
+        profiler.time("updateForeground", self.updateShapeLayers)
+        profiler.time("updateCaption", self.updateCaption)
+        profiler.record("frame", profiler.clock() - start)
 
     def mouseUp(self, point):
-        if self._width is not None and self._height is not None:
-            if self._width > self.minimumWidth and self._height > self.minimumHeight:
-                self.addShape()
+        if self.recorder is not None:
+            self.recorder.mouseUp(point)
+        # commit the last state of the drag, merged events included
+        self.dragCoalescer.flush()
+        if self.profiler is not None and self.profiler.logOnMouseUp:
+            self.profiler.log(self.profiler.asText() + "\n" + self.dragCoalescer.asText())
+        if self.shape is not None:
+            if self.shape.width > self.minimumWidth and self.shape.height > self.minimumHeight:
+                if self.arrayActive() and len(self.arrayOffsets()) > 1:
+                    self.addShapeArray()
+                elif self._booleanSnapshot is not None and self.mergeOnMouseUp and self.bulkMode is None:
+                    self.mergeShape()
+                elif self.editing is None:
+                    self.addShape()
+                elif self.shape != self.editing[1]:
+                    self.replaceShape()
+        self.booleanPreview.cancel()
+        self._booleanSnapshot = None
+        self.editing = None
         self.xMin = None
         self.xMax = None
         self.yMin = None
         self.yMax = None
-        self._xMin = self._yMin = self._xMax = self._yMax = None
-        self._width = self._height = None
-        self._didCalculate = False
+        self.shape = None
+        self._outline = None
+        self._arrayPoints = None
+        self._dirty.clear()
         self.lastPt = None
         self.xComp = self.yComp = 0
 
         self.layersVisibility(False)
 
+    def loadSnapTargets(self):
+        # read the snap targets file from the preferences, again when it changed
+        path = getExtensionDefault(snapTargetsPathKey, None)
+        source = None
+        if path and os.path.exists(path):
+            source = path, os.path.getmtime(path)
+        if source == self._snapTargetsSource:
+            return
+        self._snapTargetsSource = source
+        self.snapTables = defaultSnapTables()
+        if source is not None:
+            try:
+                readSnapTables(path, self.snapTables)
+            except (OSError, ValueError) as error:
+                print("SymmetricalRoundShapeDrawingTool: can't read snap targets: %s" % error)
+                self.snapTables = defaultSnapTables()
+
     def becomeActive(self):
+        self.setupLayers()
+        self.loadSnapTargets()
         self.layersVisibility(True)
 
     def becomeInactive(self):
         self.layersVisibility(False)
+        if self.recorder is not None:
+            self.toggleRecording()
+        self.stopObservingGlyph()
 
     def addShape(self):
         # add the final shape to the glyph
         # try to clean up some of the duplicates
-        def notClose(pt1x, pt1y, pt2x, pt2y):
-            d = math.hypot(pt1x-pt2x, pt1y-pt2y)
-            return d > 5
+        if self.bulkMode is not None:
+            self.addShapeToTargets()
+            return
         g = CurrentGlyph()
-        with g.undo("Add RoundShape"):
-            p = g.getPen()
-            p.moveTo((self._xMin, self._t2_v))
-            p.curveTo((self._xMin, self._b2_v), (self._b1_h, self._yMax), (self._t1_h, self._yMax))
-            if notClose(self._t1_h, self._yMax, self._t2_h, self._yMax):
-                p.lineTo((self._t2_h, self._yMax))
-            # do more checking for near-overlaps
-            p.curveTo((self._b2_h, self._yMax), (self._xMax, self._b2_v), (self._xMax, self._t2_v))
-            if notClose(self._xMax, self._t2_v, self._xMax, self._t1_v):
-                p.lineTo((self._xMax, self._t1_v))
-            p.curveTo((self._xMax, self._b1_v), (self._b2_h, self._yMin), (self._t2_h, self._yMin))
-            if notClose(self._t2_h, self._yMin, self._t1_h, self._yMin):
-                p.lineTo((self._t1_h, self._yMin))
-            p.curveTo((self._b1_h, self._yMin), (self._xMin, self._b1_v), (self._xMin, self._t1_v))
-            p.closePath()
+        contourIndex = getFontContourIndex(getattr(g, "font", None))
+        contourKey = duplicate = None
+        if self.duplicateContours is not None:
+            contourKey = shapeContourKey(self.outline().contourPoints(flatTolerance))
+            duplicate = contourIndex.find(g, contourKey)
+            if duplicate is not None and self.duplicateContours == "skip":
+                print("SymmetricalRoundShapeDrawingTool: %s already has this shape" % g.name)
+                return
+        # the parameters go in the glyph lib, under the identifier of the contour
+        identifier = makeIdentifier(existingIdentifiers(g))
+        # the new contour goes in the contour index below, a dict update
+        # instead of reading all contours of the glyph again
+        self._addingShape = True
+        try:
+            with g.undo("Add RoundShape"):
+                if duplicate is not None:
+                    removeShapeContour(g, duplicate)
+                self.outline().drawPoints(g.getPointPen(), flatTolerance=flatTolerance, identifier=identifier)
+                storeShape(g, identifier, self.shape)
+        finally:
+            self._addingShape = False
+        getFontShapeIndex(getattr(g, "font", None)).glyphChanged(g)
+        if duplicate is not None:
+            contourIndex.glyphChanged(g)
+        elif contourKey is not None:
+            contourIndex.contourAdded(g, contourKey)
+
+    def replaceShape(self):
+        # put the edited shape in place of the one that was opened again
+        g = CurrentGlyph()
+        identifier = self.editing[0]
+        with g.undo("Edit RoundShape"):
+            for contour in g.contours:
+                if contour.identifier == identifier:
+                    g.removeContour(contour)
+                    break
+            self.outline().drawPoints(g.getPointPen(), flatTolerance=flatTolerance, identifier=identifier)
+            storeShape(g, identifier, self.shape)
+        getFontShapeIndex(getattr(g, "font", None)).glyphChanged(g)
+
+    def booleanShapeContour(self):
+        # the contour as it is added to the glyph, for booleanOperations
+        return ContourSnapshot(self.outline().contourPoints(flatTolerance))
+
+    def mergeShape(self):
+        # replace the contours the shape overlaps with the merged outline
+        g = CurrentGlyph()
+        snapshot = self._booleanSnapshot
+        result = self.booleanPreview.wait(self.BOOLEAN_WAIT)
+        try:
+            if result is None:
+                involved, contours = booleanShape(snapshot, self.booleanShapeContour(), self.booleanOperation)
+            else:
+                generation, involved, contours = result
+        except Exception as error:
+            # add the shape as it is, the glyph is not touched yet
+            print("SymmetricalRoundShapeDrawingTool: can't merge the shape: %r" % error)
+            if self.editing is None:
+                self.addShape()
+            else:
+                self.replaceShape()
+            return
+        identifiers = [snapshot[index].identifier for index in involved]
+        indexes = [snapshot[index].index for index in involved]
+        if self.editing is not None:
+            identifiers.append(self.editing[0])
+            for index, contour in enumerate(g.contours):
+                if contour.identifier == self.editing[0]:
+                    indexes.append(index)
+        with g.undo("Merge RoundShape"):
+            glyphContours = g.contours
+            for index in sorted(indexes, reverse=True):
+                g.removeContour(glyphContours[index])
+            drawPointContours(g.getPointPen(), contours)
+            # the merged contours are no round shapes anymore
+            for identifier in identifiers:
+                if identifier is not None:
+                    removeShape(g, identifier)
+        getFontShapeIndex(getattr(g, "font", None)).glyphChanged(g)
+
+    def startBooleanPreview(self, glyph):
+        # snapshot the glyph for the worker, without the shape being edited
+        self.booleanPreview.cancel()
+        self._booleanSnapshot = None
+        if self.booleanOperation is None or glyph is None:
+            return
+        skipIdentifier = None
+        if self.editing is not None:
+            skipIdentifier = self.editing[0]
+        self._booleanSnapshot = glyphSnapshot(glyph, skipIdentifier)
+        self.booleanPreview.start(self._booleanSnapshot, self.booleanOperation)
+
+    def notifyBooleanPreview(self):
+        # on the worker thread, draw on the main thread
+        if callAfter is not None:
+            callAfter(self.booleanPreviewFinished)
+
+    def booleanPreviewFinished(self):
+        if self.shape is None or self._booleanSnapshot is None:
+            return
+        result = self.booleanPreview.result()
+        if result is not None:
+            drawContours(self.previewPathLayer.getPen(), result[2])
+        # a failed merge shows in the caption
+        self.updateCaption()
+
+    def addShapeArray(self):
+        # all copies in the current glyph, in one undo
+        g = CurrentGlyph()
+        report = addOutlineCopiesToGlyph(self.outline(), g, self.arrayOffsets(), flatTolerance=flatTolerance, storeParameters=True, duplicates=self.duplicateContours)
+        self.lastBulkReport = report
+        if report.contourCount >= self.BULK_REPORT_THRESHOLD:
+            print(report.asText())
+
+    def addShapeToTargets(self):
+        # add the final shape to the selected glyphs, in one pass
+        font = CurrentFont()
+        glyph = CurrentGlyph()
+        glyphNames = list(font.selectedGlyphNames)
+        if glyph.name not in glyphNames:
+            glyphNames.insert(0, glyph.name)
+        report = BulkReport()
+        scaleForGlyph = None
+        if self.bulkMode == "selection":
+            targets = collectTargetGlyphs([font], glyphNames, [glyph.layer.name], report=report)
+        elif self.bulkMode == "layers":
+            targets = collectTargetGlyphs([font], glyphNames, "*", report=report)
+        else:
+            targets = collectTargetGlyphs(AllFonts(), glyphNames, report=report)
+            unitsPerEm = font.info.unitsPerEm
+
+            def scaleForGlyph(target):
+                # keep the size relative to the em
+                return target.font.info.unitsPerEm / unitsPerEm
+
+        # the fonts can be masters, keep the scaled contours compatible
+        addOutlineToGlyphs(self.outline(), targets, scaleForGlyph=scaleForGlyph, flatTolerance=flatTolerance, report=report, compatible=self.bulkMode == "masters", storeParameters=True, duplicates=self.duplicateContours)
+        self.lastBulkReport = report
+        if report.glyphCount >= self.BULK_REPORT_THRESHOLD:
+            print(report.asText())
 
     def updatePreview(self):
         # only draws if there are already outlines in the glyph
-        if self._xMin is None:
+        if self.shape is None:
             return
+        if self._booleanSnapshot is not None:
+            # the worker merges the new shape, draw the latest merge there is
+            self.booleanPreview.submit(self.booleanShapeContour())
+            result = self.booleanPreview.result()
+            if result is not None:
+                drawContours(self.previewPathLayer.getPen(), result[2])
+                return
 
         self.buildShapePath(self.previewPathLayer.getPen())
 
     def updateForeground(self):
-        if not self._didCalculate:
+        self.updateShapeLayers()
+        self.updateCaption()
+
+    def updateShapeLayers(self):
+        # the dots and the outline
+        s = self.shape
+        if s is None:
             return
 
         bcpDot = tanDot = self.BASE_DOT_SIZE
@@ -256,82 +807,167 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
         elif self.dragState == "curves":
             bcpDot = 10
 
-        stackedbv = self._b1_v == self._b2_v
-        stackedbh = self._b1_h == self._b2_h
-        stackedtv = self._t1_v == self._t2_v
-        stackedth = self._t1_h == self._t2_h
-        center = .5*(self._xMax+self._xMin), .5*(self._yMax+self._yMin)
+        stackedColor = (0, .5, 1, 1)
+        unstackedColor = (1, .5, 0, 1)
+        bvColor = stackedColor if s.b1_v == s.b2_v else unstackedColor
+        bhColor = stackedColor if s.b1_h == s.b2_h else unstackedColor
+        tvColor = stackedColor if s.t1_v == s.t2_v else unstackedColor
+        thColor = stackedColor if s.t1_h == s.t2_h else unstackedColor
+        center = .5*(s.xMax+s.xMin), .5*(s.yMax+s.yMin)
 
         dotsAttributes = [
-            ((self._xMin, self._t1_v), tanDot, stackedtv),
-            ((self._xMax, self._t1_v), tanDot, stackedtv),
-            ((self._xMin, self._t2_v), tanDot, stackedtv),
-            ((self._xMax, self._t2_v), tanDot, stackedtv),
-            ((self._t1_h, self._yMin), tanDot, stackedth),
-            ((self._t1_h, self._yMax), tanDot, stackedth),
-            ((self._t2_h, self._yMin), tanDot, stackedth),
-            ((self._t2_h, self._yMax), tanDot, stackedth),
-            ((self._xMin, self._b1_v), bcpDot, stackedbv),
-            ((self._xMax, self._b1_v), bcpDot, stackedbv),
-            ((self._xMin, self._b2_v), bcpDot, stackedbv),
-            ((self._xMax, self._b2_v), bcpDot, stackedbv),
-            ((self._b1_h, self._yMax), bcpDot, stackedbh),
-            ((self._b2_h, self._yMax), bcpDot, stackedbh),
-            ((self._b1_h, self._yMin), bcpDot, stackedbh),
-            ((self._b2_h, self._yMin), bcpDot, stackedbh),
-            (center, bcpDot, False),   # center point!
+            ((s.xMin, s.t1_v), tanDot, tvColor),
+            ((s.xMax, s.t1_v), tanDot, tvColor),
+            ((s.xMin, s.t2_v), tanDot, tvColor),
+            ((s.xMax, s.t2_v), tanDot, tvColor),
+            ((s.t1_h, s.yMin), tanDot, thColor),
+            ((s.t1_h, s.yMax), tanDot, thColor),
+            ((s.t2_h, s.yMin), tanDot, thColor),
+            ((s.t2_h, s.yMax), tanDot, thColor),
+            ((s.xMin, s.b1_v), bcpDot, bvColor),
+            ((s.xMax, s.b1_v), bcpDot, bvColor),
+            ((s.xMin, s.b2_v), bcpDot, bvColor),
+            ((s.xMax, s.b2_v), bcpDot, bvColor),
+            ((s.b1_h, s.yMax), bcpDot, bhColor),
+            ((s.b2_h, s.yMax), bcpDot, bhColor),
+            ((s.b1_h, s.yMin), bcpDot, bhColor),
+            ((s.b2_h, s.yMin), bcpDot, bhColor),
+            (center, bcpDot, unstackedColor),   # center point!
         ]
-        dotSublayers = self.dots.getSublayers()
-        for index, (pos, size, stacked) in enumerate(dotsAttributes):
-            dot = dotSublayers[index]
-            with dot.propertyGroup():
-                dot.setPosition(pos)
-                dot.setImageSettings(
-                    dict(name='oval',
-                         size=(size, size),
-                         fillColor=(0, .5, 1, 1) if stacked else (1, .5, 0, 1))
-                )
+        self.dotLayers.update(dotsAttributes)
 
         self.buildShapePath(self.shapeLayer.getPen())
 
-        captionComponents = [f"the symmetrical,\nround shape\ndrawing tool\npress command to move the flat\npress option to move the bcps\n\nwidth {self._width:3.3f}\nheight {self._height:3.3f}"]
+    def updateCaption(self):
+        s = self.shape
+        if s is None:
+            return
+        center = .5*(s.xMax+s.xMin), .5*(s.yMax+s.yMin)
+        captionComponents = [f"the symmetrical,\nround shape\ndrawing tool\npress command to move the flat\npress option to move the bcps\npress b to add to more glyphs\npress p to time the drawing\npress s to snap to the glyph\npress e for superellipses\npress [ and ] to step through the drag\npress u to union or subtract\npress m to merge on mouse up\npress a for copies\n\nwidth {s.width:3.3f}\nheight {s.height:3.3f}"]
+        metrics = shapeMetrics(s.points())
+        captionComponents.append(f"area {abs(metrics.area):3.1f}\nlength {metrics.length:3.1f}\njoin curvature {metrics.joinCurvature:3.3f}")
         if self._orientation:
             captionComponents.append("horizontal")
         else:
             captionComponents.append("vertical")
+        if self.history.position < len(self.history) - 1:
+            captionComponents.append(f"frame {self.history.position + 1} of {len(self.history)}")
+        if self.editing is not None:
+            captionComponents.append("editing a shape in the glyph")
+        elif self.bulkMode is not None:
+            captionComponents.append(f"adding to {self.BULK_MODE_NAMES[self.bulkMode]}")
+        arrayMode = self.arrayMode if self.arrayActive() else None
+        if arrayMode == "grid":
+            captionComponents.append(f"{self.arrayColumns} by {self.arrayRows} copies, spacing {self.arraySpacing:3.1f}")
+        elif arrayMode == "path":
+            if self.arrayGuide is None:
+                captionComponents.append("select a contour to put copies along")
+            else:
+                captionComponents.append(f"{self.arrayCount} copies along the selected contour")
+        if self.booleanOperation is not None:
+            booleanCaption = booleanOperationNames[self.booleanOperation]
+            if self.mergeOnMouseUp:
+                booleanCaption += ", merged on mouse up"
+            if self.booleanPreview.lastError is not None:
+                booleanCaption += f"\ncan't merge: {self.booleanPreview.lastError}"
+            captionComponents.append(booleanCaption)
         if self.dragState == "flats":
             captionComponents.append(f"\nyou're changing the flat factor\nx {self.flatFactor_x:3.3f}\ny {self.flatFactor_y:3.3f}")
+        elif self.dragState == "curves" and self.superellipseMode:
+            table = getSuperellipseTable()
+            captionComponents.append(f"\nyou're changing the superellipse\nexponent {self.superellipseExponent:3.3f}\nbcp factor {self.bcpFactor_x:3.3f}\ndeviation {100 * table.deviation(self.superellipseExponent):3.3f}%")
+        elif self.dragState == "array":
+            captionComponents.append("\nyou're changing the number of copies")
         elif self.dragState == "curves":
             captionComponents.append(f"\nyou're changing the bcp factor\nx %{self.bcpFactor_x:3.3f}\ny %{self.bcpFactor_y:3.3f}")
 
-        with self.captionLayer.propertyGroup():
-            self.captionLayer.setPosition(center)
-            self.captionLayer.setText('\n'.join(captionComponents))
+        if self.profiler is not None and self.profiler.showInCaption:
+            captionComponents.append("\n" + self.profiler.asText() + "\n" + self.dragCoalescer.asText())
+
+        self.caption.update(center, '\n'.join(captionComponents))
+
+    def outline(self):
+        # the points of the current shape, calculated once for all layers,
+        # from the shape itself: the same points as the shape in the glyph lib
+        if self._outline is None or not self._outline.matches(self.shape):
+            self._outline = ShapeOutline(self.shape)
+        return self._outline
+
+    def arrayActive(self):
+        # copies are made of a new shape, a shape opened again stays one contour
+        return self.arrayMode is not None and self.editing is None
 
     def buildShapePath(self, pen):
-        pen.moveTo((self._xMin, self._t2_v))
-        pen.curveTo((self._xMin, self._b2_v), (self._b1_h, self._yMax), (self._t1_h, self._yMax))
-        pen.lineTo((self._t2_h, self._yMax))
-        pen.curveTo((self._b2_h, self._yMax), (self._xMax, self._b2_v), (self._xMax, self._t2_v))
-        pen.lineTo((self._xMax, self._t1_v))
-        pen.curveTo((self._xMax, self._b1_v), (self._b2_h, self._yMin), (self._t2_h, self._yMin))
-        pen.lineTo((self._t1_h, self._yMin))
-        pen.curveTo((self._b1_h, self._yMin), (self._xMin, self._b1_v), (self._xMin, self._t1_v))
-        pen.closePath()
-        return pen
+        if self.arrayActive():
+            # all copies in one path
+            return drawArray(pen, self.arrayPoints())
+        return self.outline().draw(pen)
+
+    def arrayOffsets(self):
+        # where the copies go, relative to the shape
+        s = self.shape
+        if self.arrayMode == "path":
+            if self.arrayGuide is None:
+                return [(0, 0)]
+            center = .5*(s.xMax+s.xMin), .5*(s.yMax+s.yMin)
+            return pathOffsets(self.arrayGuide, self.arrayCount, center)
+        # the grid goes on in the direction of the drag
+        stepX = s.width * (1 + self.arraySpacing)
+        stepY = s.height * (1 + self.arraySpacing)
+        if self.xMax is not None and self.xMin is not None and self.xMax < self.xMin:
+            stepX = -stepX
+        if self.yMax is not None and self.yMin is not None and self.yMax < self.yMin:
+            stepY = -stepY
+        return gridOffsets(self.arrayColumns, self.arrayRows, stepX, stepY)
+
+    def arrayPoints(self):
+        # the points of all copies, once per frame for both layers
+        outline = self.outline()
+        key = outline, self.arrayMode, self.arrayColumns, self.arrayRows, self.arraySpacing, self.arrayCount, self.arrayGuide
+        if self._arrayPoints is None or self._arrayPoints[0] != key:
+            self._arrayPoints = key, arrayPoints(outline, self.arrayOffsets())
+        return self._arrayPoints[1]
+
+    def findArrayGuide(self, glyph):
+        # the first contour with selected points is the guide
+        if glyph is None:
+            return None
+        for contour in glyph.contours:
+            if getattr(contour, "selectedPoints", None):
+                return GuidePath.fromContour(contour)
+        return None
+
+    def redrawArray(self):
+        if self.shape is not None:
+            self.updatePreview()
+        self.updateForeground()
 
     def calculate(self):
         if self.xMin is None or self.xMax is None or self.yMin is None or self.yMax is None:
             return
-        self._didCalculate = True
-        self._width = max(self.xMax, self.xMin) - min(self.xMax, self.xMin)
-        self._height = max(self.yMax, self.yMin) - min(self.yMax, self.yMin)
+        dirty = self._dirty
+        if self.shape is not None and "bounds" not in dirty and self._shiftDown == self._calculatedShiftDown:
+            # the bounds did not change, so neither did the orientation:
+            # only recalculate what depends on the changed factors.
+            if "flats" in dirty:
+                self.shape = self.shape.withFlatFactors(
+                    self.flatFactor_x, self.flatFactor_y,
+                    self.bcpFactor_x, self.bcpFactor_y
+                )
+            elif "bcps" in dirty:
+                self.shape = self.shape.withBcpFactors(self.bcpFactor_x, self.bcpFactor_y)
+            dirty.clear()
+            return
+        dirty.clear()
+        self._calculatedShiftDown = self._shiftDown
+        width = max(self.xMax, self.xMin) - min(self.xMax, self.xMin)
+        height = max(self.yMax, self.yMin) - min(self.yMax, self.yMin)
 
         # need different kind of constrain on shift.
         if self._shiftDown:
-            self._height = self._width
+            height = width
         # see if we have changed our orientation, flip flats and bcp factors if we did.
-        if self._width > self._height:
+        if width > height:
             isHorizontal = True
         else:
             isHorizontal = False
@@ -339,40 +975,26 @@ class SymmetricalRoundShapeDrawingTool(BaseEventTool):
             self._orientation = isHorizontal
             self.flatFactor_x, self.flatFactor_y = self.flatFactor_y, self.flatFactor_x
             self.bcpFactor_x, self.bcpFactor_y = self.bcpFactor_y, self.bcpFactor_x
+            unsnapped = self._unsnappedFactors
+            for x, y in (("flatFactor_x", "flatFactor_y"), ("bcpFactor_x", "bcpFactor_y")):
+                unsnapped[x], unsnapped[y] = unsnapped.get(y, (None, None)), unsnapped.get(x, (None, None))
 
         if self._shiftDown:
-            self._xMin = min(self.xMin, self.xMax)
-            self._xMax = self._xMin + self._width
-            self._yMin = min(self.yMin, self.yMax)
-            self._yMax = self._yMin + self._height
+            xMin = min(self.xMin, self.xMax)
+            xMax = xMin + width
+            yMin = min(self.yMin, self.yMax)
+            yMax = yMin + height
         else:
-            self._xMin = min(self.xMin, self.xMax)
-            self._yMin = min(self.yMin, self.yMax)
-            self._xMax = max(self.xMin, self.xMax)
-            self._yMax = max(self.yMin, self.yMax)
-        # tangent 1, vertical
-        self._t1_v = self._yMin+.5*self._height-self.flatFactor_y*.5*self._height
-        # tangent 2, vertical
-        self._t2_v = self._yMin+.5*self._height+self.flatFactor_y*.5*self._height
-
-        # tangent 1, horizontal
-        self._t1_h = self._xMin+.5*self._width-self.flatFactor_x*.5*self._width
-        # tangent 2, horizontal
-        self._t2_h = self._xMin+.5*self._width+self.flatFactor_x*.5*self._width
-        # tangent 1, vertical
-        self._t1_v = self._yMin+.5*self._height-self.flatFactor_y*.5*self._height
-        # tangent 2, vertical
-        self._t2_v = self._yMin+.5*self._height+self.flatFactor_y*.5*self._height
-        # tangent 1, horizontal
-        self._t1_h = self._xMin+.5*self._width-self.flatFactor_x*.5*self._width
-        # tangent 2, horizontal
-        self._t2_h = self._xMin+.5*self._width+self.flatFactor_x*.5*self._width
-
-        # bcps
-        self._b1_v = self._yMin + self.bcpFactor_y*(self._t1_v-self._yMin)
-        self._b2_v = self._t2_v + (1-self.bcpFactor_y)*(self._yMax-self._t2_v)
-        self._b1_h = self._xMin + self.bcpFactor_x * (self._t1_h-self._xMin)
-        self._b2_h = self._t2_h + (1-self.bcpFactor_x) * (self._xMax-self._t2_h)
+            xMin = min(self.xMin, self.xMax)
+            yMin = min(self.yMin, self.yMax)
+            xMax = max(self.xMin, self.xMax)
+            yMax = max(self.yMin, self.yMax)
+        self.shape = RoundShape(
+            xMin, yMin, xMax, yMax,
+            self.flatFactor_x, self.flatFactor_y,
+            self.bcpFactor_x, self.bcpFactor_y,
+            width=width, height=height
+        )
 
     def canSelectWithMarque(self):
         return False
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# the modules of the tool live next to it in the extension folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "extension"))
+
+from round_shape_replay import installStubMojo  # noqa: E402
+
+# the tool imports mojo, use the stand-ins of the replay harness outside RoboFont
+installStubMojo()
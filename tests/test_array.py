@@ -0,0 +1,103 @@
+from round_shape_array import arrayContourPoints, gridOffsets
+from round_shape_bulk import addOutlineCopiesToGlyph
+from round_shape_geometry import RoundShape, ShapeOutline, flatTolerance
+from round_shape_lib import libKey, readShapes
+from round_shape_replay import StubPoint, makeGlyph
+
+import the_symmetrical_round_shape_drawing_tool as toolModule
+
+
+SHAPE = RoundShape(0, 0, 300, 200, .25, 0, .2, .2)
+
+
+def glyphContours(glyph):
+    return [[((point.x, point.y), point.type) for point in contour.points] for contour in glyph.contours]
+
+
+def test_array_contour_points():
+    contourPoints = ShapeOutline(SHAPE).contourPoints(flatTolerance)
+    offsets = [(0, 0), (400, 0), (0, -250.5)]
+    copies = list(arrayContourPoints(contourPoints, offsets))
+    assert len(copies) == 3
+    assert copies[0] == contourPoints
+    for (dx, dy), copy in zip(offsets, copies):
+        # the same structure, the same flats left out, moved
+        assert [(segmentType, smooth) for pt, segmentType, smooth in copy] == [(segmentType, smooth) for pt, segmentType, smooth in contourPoints]
+        assert [pt for pt, segmentType, smooth in copy] == [(x + dx, y + dy) for (x, y), segmentType, smooth in contourPoints]
+        # the copy is the contour of the moved shape
+        assert copy == ShapeOutline(SHAPE.translated(dx, dy)).contourPoints(flatTolerance)
+
+
+def test_add_copies_to_glyph():
+    glyph = makeGlyph(0)
+    offsets = gridOffsets(3, 2, 450, 300)
+    report = addOutlineCopiesToGlyph(ShapeOutline(SHAPE), glyph, offsets, storeParameters=True)
+    assert report.contourCount == 6
+    assert glyph.undoCount == 1
+    expected = [ShapeOutline(SHAPE.translated(dx, dy)).contourPoints(flatTolerance) for dx, dy in offsets]
+    assert [[(pt, segmentType) for pt, segmentType, smooth in contour] for contour in expected] == glyphContours(glyph)
+    # every copy has its own parameters in the lib
+    shapes = readShapes(glyph)
+    assert len(shapes) == len(glyph.lib[libKey]) == 6
+    assert sorted(shapes.values(), key=lambda shape: (shape.xMin, shape.yMin)) == sorted(
+        [SHAPE.translated(dx, dy) for dx, dy in offsets], key=lambda shape: (shape.xMin, shape.yMin))
+
+
+def test_add_copies_duplicates():
+    glyph = makeGlyph(0)
+    outline = ShapeOutline(SHAPE)
+    addOutlineCopiesToGlyph(outline, glyph, [(0, 0), (400, 0)], storeParameters=True)
+    report = addOutlineCopiesToGlyph(outline, glyph, [(0, 0), (400, 0), (800, 0)], storeParameters=True, duplicates="skip")
+    assert report.contourCount == 1
+    assert report.duplicates == [glyph.name]
+    assert len(glyph.contours) == 3
+    identifiers = [contour.identifier for contour in glyph.contours]
+    report = addOutlineCopiesToGlyph(outline, glyph, [(0, 0), (400, 0)], storeParameters=True, duplicates="replace")
+    assert report.contourCount == 2
+    assert len(glyph.contours) == 3
+    # the replaced contours and their parameters are gone, the third one stays
+    assert identifiers[2] in [contour.identifier for contour in glyph.contours]
+    assert len(readShapes(glyph)) == len(glyph.lib[libKey]) == 3
+
+
+def makeTool():
+    glyph = makeGlyph(0)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.becomeActive()
+    return glyph, tool
+
+
+def drag(tool, start, steps, dx=10, dy=6):
+    x, y = start
+    tool.mouseDown(StubPoint(x, y), 1)
+    for step in range(steps):
+        x += dx
+        y += dy
+        tool.mouseDragged(StubPoint(x, y), StubPoint(dx, dy))
+    tool.dragCoalescer.flush()
+    return x, y
+
+
+def test_reopened_shape_stays_one_contour():
+    glyph, tool = makeTool()
+    tool.arrayMode = "grid"
+    x, y = drag(tool, (0, 0), 30)
+    assert len(tool.shapeLayer.contours) == 3
+    assert "3 by 1 copies" in tool.captionLayer.text
+    tool.mouseUp(StubPoint(x, y))
+    assert len(glyph.contours) == 3
+    # open the first shape again from its top right tangent and drag it bigger
+    shape = readShapes(glyph)[glyph.contours[0].identifier]
+    x, y = drag(tool, (shape.t2_h, shape.yMax), 5, dx=0, dy=4)
+    assert tool.editing is not None
+    # the preview shows what mouse up adds: one contour
+    assert len(tool.shapeLayer.contours) == 1
+    assert len(tool.previewPathLayer.contours) == 1
+    assert "by 1 copies" not in tool.captionLayer.text
+    tool.mouseUp(StubPoint(x, y))
+    assert len(glyph.contours) == 3
+    edited = readShapes(glyph)[glyph.contours[-1].identifier]
+    assert edited.yMax == shape.yMax + 20
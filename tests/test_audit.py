@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from round_shape_audit import RoundShapeFinder, isRoundShapeStructure, solveRoundShape
+from round_shape_geometry import RoundShape, ShapeOutline, flatTolerance
+
+pytest.importorskip("fontTools")
+from fontTools.pens.pointPen import ReverseContourPointPen  # noqa: E402
+
+
+class ContourRecorder(object):
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.points = []
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, **kwargs):
+        self.points.append((pt[0], pt[1], segmentType))
+
+    def endPath(self):
+        pass
+
+
+def contourOf(shape, reverse=False, start=0, rounded=False):
+    recorder = ContourRecorder()
+    ShapeOutline(shape).drawPoints(ReverseContourPointPen(recorder) if reverse else recorder, flatTolerance=flatTolerance)
+    points = recorder.points
+    if rounded:
+        points = [(round(x), round(y), segmentType) for x, y, segmentType in points]
+    start %= len(points)
+    return points[start:] + points[:start]
+
+
+def randomShape(rng, maximumFlat=1.5):
+    x, y = rng.randint(-500, 500), rng.randint(-500, 500)
+    return RoundShape(
+        x, y, x + rng.randint(21, 800), y + rng.randint(21, 800),
+        rng.choice([0, rng.uniform(0, maximumFlat)]), rng.choice([0, rng.uniform(0, maximumFlat)]),
+        rng.uniform(-.5, 1), rng.uniform(-.5, 1)
+    )
+
+
+def assertSameShape(found, shape, tolerance=1e-6):
+    assert found is not None
+    for name in ("xMin", "yMin", "xMax", "yMax", "flatFactor_x", "flatFactor_y", "bcpFactor_x", "bcpFactor_y"):
+        assert abs(getattr(found, name) - getattr(shape, name)) <= tolerance, name
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_round_trip(seed):
+    rng = random.Random(seed)
+    for index in range(200):
+        shape = randomShape(rng)
+        points = contourOf(shape, reverse=rng.random() < .5, start=rng.randrange(16))
+        assert isRoundShapeStructure([point[2] for point in points])
+        assertSameShape(solveRoundShape(points), shape)
+
+
+@pytest.mark.parametrize("flatFactor", [1, 1.01, 1.2, 1.4, 1.5])
+def test_flats_over_1(flatFactor):
+    for shape in (
+        RoundShape(0, 0, 300, 200, flatFactor, 0, .2, .2),
+        RoundShape(0, 0, 300, 200, 0, flatFactor, .2, .2),
+        RoundShape(-40, 10, 160, 400, flatFactor, .9 + flatFactor / 5, -.3, .55),
+    ):
+        for reverse in (False, True):
+            found = solveRoundShape(contourOf(shape, reverse=reverse, start=5))
+            assert found is not None
+            # with a flat of 1 the tangent is in the corner and any bcp factor draws the same points
+            deviation = max(abs(a - b) for a, b in zip(ShapeOutline(found).coordinates, ShapeOutline(shape).coordinates))
+            assert deviation < 1e-6
+            if flatFactor != 1:
+                assertSameShape(found, shape)
+
+
+def test_rounded_contours_are_found():
+    rng = random.Random(7)
+    for index in range(500):
+        shape = randomShape(rng)
+        found = solveRoundShape(contourOf(shape, start=rng.randrange(16), rounded=True))
+        assert found is not None
+        # drawn again, every point is within a unit of the contour
+        deviation = max(abs(a - b) for a, b in zip(ShapeOutline(found).coordinates, ShapeOutline(shape).coordinates))
+        assert deviation <= 1.5
+
+
+def test_other_contours_are_skipped():
+    shape = RoundShape(0, 0, 300, 200, .25, 0, .2, .2)
+    points = contourOf(shape)
+    # one bcp off by more than the tolerance
+    x, y, segmentType = points[1]
+    moved = points[:1] + [(x + 10, y, segmentType)] + points[2:]
+    assert isRoundShapeStructure([point[2] for point in moved])
+    assert solveRoundShape(moved) is None
+    # a flat that is not in the middle of its side
+    index = [point[2] for point in points].index("line")
+    x, y, segmentType = points[index]
+    moved = points[:index] + [(x + 30 if y in (0, 200) else x, y + 30 if x in (0, 300) else y, segmentType)] + points[index+1:]
+    assert solveRoundShape(moved) is None
+
+
+def test_finder():
+    shapes = [RoundShape(0, 0, 300, 200, .25, 0, .2, .2), RoundShape(400, 0, 500, 700, 1.3, .5, .6, -.2)]
+    finder = RoundShapeFinder()
+    for shape in shapes:
+        ShapeOutline(shape).drawPoints(finder, flatTolerance=flatTolerance, identifier="id%d" % shapes.index(shape))
+    # a triangle is not a round shape
+    finder.beginPath()
+    for pt in ((0, 0), (100, 0), (50, 80)):
+        finder.addPoint(pt, "line")
+    finder.endPath()
+    assert finder.contourCount == 3
+    assert [(index, identifier) for index, identifier, shape in finder.shapes] == [(0, "id0"), (1, "id1")]
+    for (index, identifier, found), shape in zip(finder.shapes, shapes):
+        assertSameShape(found, shape)
@@ -0,0 +1,121 @@
+import threading
+
+import round_shape_boolean
+from round_shape_boolean import BooleanPreview
+from round_shape_replay import StubPoint, makeGlyph
+
+import the_symmetrical_round_shape_drawing_tool as toolModule
+
+
+class StubBoolean(object):
+
+    # stands in for booleanShape, a job can be held until it is released
+
+    def __init__(self, hold=False):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def __call__(self, snapshot, shapeContour, operation):
+        self.calls.append(shapeContour)
+        self.started.set()
+        self.release.wait(5)
+        if shapeContour == "fail":
+            raise ValueError("no contours")
+        return [snapshot], [shapeContour]
+
+
+def test_submit_finishes(monkeypatch):
+    stub = StubBoolean()
+    monkeypatch.setattr(round_shape_boolean, "booleanShape", stub)
+    notified = []
+    preview = BooleanPreview(notify=lambda: notified.append(True))
+    assert preview.submit("a") is None
+    preview.start("glyph", "union")
+    generation = preview.submit("a")
+    assert preview.wait(5) == (generation, ["glyph"], ["a"])
+    assert preview.finishedCount == 1
+    assert preview.cancelledCount == 0
+    assert notified == [True]
+
+
+def test_waiting_jobs_are_cancelled(monkeypatch):
+    stub = StubBoolean(hold=True)
+    monkeypatch.setattr(round_shape_boolean, "booleanShape", stub)
+    preview = BooleanPreview()
+    preview.start("glyph", "union")
+    preview.submit("first")
+    assert stub.started.wait(5)
+    # the first job runs, each new job replaces the one that waits
+    for name in ("second", "third", "fourth"):
+        generation = preview.submit(name)
+    stub.release.set()
+    assert preview.wait(5) == (generation, ["glyph"], ["fourth"])
+    assert stub.calls == ["first", "fourth"]
+    assert preview.cancelledCount == 2
+    assert preview.finishedCount == 2
+
+
+def test_older_results_are_dropped(monkeypatch):
+    stub = StubBoolean(hold=True)
+    monkeypatch.setattr(round_shape_boolean, "booleanShape", stub)
+    preview = BooleanPreview()
+    preview.start("old glyph", "union")
+    preview.submit("old")
+    assert stub.started.wait(5)
+    # a new start while the old job runs
+    preview.start("new glyph", "subtract")
+    stub.release.set()
+    assert preview.wait(5) is None
+    assert preview.result() is None
+    assert preview.finishedCount == 0
+    generation = preview.submit("new")
+    assert preview.wait(5) == (generation, ["new glyph"], ["new"])
+    assert preview.finishedCount == 1
+    # a cancel drops the result
+    preview.cancel()
+    assert preview.result() is None
+
+
+def test_failed_job_keeps_the_error(monkeypatch):
+    stub = StubBoolean()
+    monkeypatch.setattr(round_shape_boolean, "booleanShape", stub)
+    notified = []
+    preview = BooleanPreview(notify=lambda: notified.append(True))
+    preview.start("glyph", "union")
+    preview.submit("fail")
+    assert preview.wait(5) is None
+    assert isinstance(preview.lastError, ValueError)
+    assert preview.failedCount == 1
+    assert preview.finishedCount == 0
+    assert notified == [True]
+    # the worker is still there, a newer result clears the error
+    generation = preview.submit("a")
+    assert preview.wait(5) == (generation, ["glyph"], ["a"])
+    assert preview.lastError is None
+    preview.submit("fail")
+    preview.wait(5)
+    assert preview.lastError is not None
+    preview.cancel()
+    assert preview.lastError is None
+
+
+def test_error_in_caption():
+    makeGlyph(0)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.becomeActive()
+    tool.mouseDown(StubPoint(0, 0), 1)
+    for step in range(1, 6):
+        tool.mouseDragged(StubPoint(20 * step, 20 * step), StubPoint(20, 20))
+    tool.dragCoalescer.flush()
+    tool.booleanOperation = "union"
+    tool.updateCaption()
+    assert "can't merge" not in tool.captionLayer.text
+    tool.booleanPreview.lastError = ValueError("no contours")
+    tool.updateCaption()
+    assert "can't merge: no contours" in tool.captionLayer.text
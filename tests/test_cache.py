@@ -0,0 +1,38 @@
+import random
+
+from round_shape_cache import OutlineCache
+from round_shape_geometry import RoundShape
+
+
+def randomShape(rng):
+    x, y = rng.uniform(-500, 500), rng.uniform(-500, 500)
+    return RoundShape(
+        x, y, x + rng.uniform(1, 800), y + rng.uniform(1, 800),
+        rng.uniform(0, 1.5), rng.uniform(0, 1.5), rng.uniform(-.5, 1), rng.uniform(-.5, 1)
+    )
+
+
+def outlinePoints(outline):
+    c = outline.coordinates
+    return [(c[index], c[index+1]) for index in range(0, len(c), 2)]
+
+
+def test_cached_outlines_are_the_shape_points():
+    rng = random.Random(9)
+    cache = OutlineCache(maxSize=50)
+    shapes = [randomShape(rng) for index in range(100)]
+    for shape in shapes + shapes[-40:]:
+        assert outlinePoints(cache.outline(shape)) == shape.points()
+    assert cache.stats() == dict(size=50, maxSize=50, hits=40, misses=100, evictions=50)
+
+
+def test_shapes_a_bit_apart_have_their_own_outline():
+    cache = OutlineCache()
+    shape = RoundShape(0, 0, 300, 200, .25, 0, .2, .2)
+    nearby = RoundShape(0, 0, 300, 200, .25 + 1e-12, 0, .2, .2)
+    assert outlinePoints(cache.outline(shape)) == shape.points()
+    assert outlinePoints(cache.outline(nearby)) == nearby.points()
+    assert cache.misses == 2
+    # the same parameters in a new RoundShape are a hit
+    cache.outline(RoundShape(0, 0, 300, 200, .25, 0, .2, .2))
+    assert cache.hits == 1
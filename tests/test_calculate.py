@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+import round_shape_geometry
+from round_shape_geometry import RoundShape, calculateShapes
+
+
+def randomShapes(seed, count=200):
+    # random boxes with the corners in any order, and the factors the tool uses
+    rng = random.Random(seed)
+    bounds = []
+    flatFactors = []
+    bcpFactors = []
+    for index in range(count):
+        x1, x2 = rng.uniform(-1000, 1000), rng.choice([rng.uniform(-1000, 1000), rng.randint(-1000, 1000)])
+        y1, y2 = rng.uniform(-1000, 1000), rng.choice([rng.uniform(-1000, 1000), rng.randint(-1000, 1000)])
+        bounds.append((x1, y1, x2, y2))
+        flatFactors.append((rng.choice([0, .25, rng.uniform(0, 1.5)]), rng.choice([0, rng.uniform(0, 1.5)])))
+        bcpFactors.append((rng.choice([.2, rng.uniform(-.5, 1)]), rng.choice([.2, rng.uniform(-.5, 1)])))
+    return bounds, flatFactors, bcpFactors
+
+
+def expectedPoints(bounds, flatFactors, bcpFactors):
+    # the points of each shape, one RoundShape at a time
+    return [
+        RoundShape(
+            min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2),
+            flatFactor_x, flatFactor_y, bcpFactor_x, bcpFactor_y
+        ).points()
+        for (x1, y1, x2, y2), (flatFactor_x, flatFactor_y), (bcpFactor_x, bcpFactor_y) in zip(bounds, flatFactors, bcpFactors)
+    ]
+
+
+def asTuples(points):
+    return [[(float(x), float(y)) for x, y in row] for row in points]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_calculate_shapes_numpy(seed):
+    pytest.importorskip("numpy")
+    bounds, flatFactors, bcpFactors = randomShapes(seed)
+    points = calculateShapes(bounds, flatFactors, bcpFactors)
+    assert points.shape == (len(bounds), 16, 2)
+    # the same to the bit
+    assert asTuples(points) == asTuples(expectedPoints(bounds, flatFactors, bcpFactors))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_calculate_shapes_without_numpy(seed, monkeypatch):
+    monkeypatch.setattr(round_shape_geometry, "_numpy", None)
+    bounds, flatFactors, bcpFactors = randomShapes(seed)
+    points = calculateShapes(bounds, flatFactors, bcpFactors)
+    assert isinstance(points, list)
+    assert points == expectedPoints(bounds, flatFactors, bcpFactors)
+
+
+def test_calculate_shapes_lengths():
+    with pytest.raises(ValueError):
+        calculateShapes([(0, 0, 100, 100)], [(0, 0)], [])
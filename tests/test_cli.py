@@ -0,0 +1,104 @@
+import json
+import random
+
+import pytest
+
+from round_shape_geometry import RoundShape, ShapeOutline, flatTolerance
+
+pytest.importorskip("fontTools.ufoLib")
+from fontTools.pens.recordingPen import RecordingPointPen  # noqa: E402
+from fontTools.ufoLib import UFOReader  # noqa: E402
+
+from round_shape_cli import addShapesToUFO  # noqa: E402
+
+
+SPECS = [
+    {"glyph": "o", "xMin": 40, "yMin": 0, "xMax": 160, "yMax": 120},
+    {"glyph": "o", "xMin": 300, "yMin": 510, "xMax": 200, "yMax": 0.5,
+     "flatFactor_x": 0, "flatFactor_y": 0.3, "bcpFactor_x": 0.55, "bcpFactor_y": -0.1},
+    {"glyph": "period", "xMin": 0, "yMin": 0, "xMax": 80, "yMax": 80, "layer": "background",
+     "flatFactor_x": 0, "flatFactor_y": 0, "bcpFactor_x": 0.552, "bcpFactor_y": 0.552},
+]
+
+
+def specShape(spec):
+    # the shape the tool makes for these bounds and factors
+    return RoundShape(
+        min(spec["xMin"], spec["xMax"]), min(spec["yMin"], spec["yMax"]),
+        max(spec["xMin"], spec["xMax"]), max(spec["yMin"], spec["yMax"]),
+        spec.get("flatFactor_x", .25), spec.get("flatFactor_y", 0),
+        spec.get("bcpFactor_x", .2), spec.get("bcpFactor_y", .2)
+    )
+
+
+def readContours(ufoPath, glyphName, layerName=None):
+    reader = UFOReader(ufoPath)
+    glyphSet = reader.getGlyphSet(layerName)
+    pen = RecordingPointPen()
+    glyphSet.readGlyph(glyphName, None, pen)
+    contours = []
+    for method, args, kwargs in pen.value:
+        if method == "beginPath":
+            contours.append([])
+        elif method == "addPoint":
+            contours[-1].append((args[0], args[1], kwargs.get("smooth", args[2] if len(args) > 2 else False)))
+    return contours
+
+
+def writeSpecs(path, specs):
+    with open(path, "w", encoding="utf-8") as f:
+        for spec in specs:
+            f.write(json.dumps(spec) + "\n")
+
+
+def test_written_contours_are_the_tool_contours(tmp_path):
+    specPath = tmp_path / "shapes.jsonl"
+    ufoPath = str(tmp_path / "Test.ufo")
+    writeSpecs(specPath, SPECS)
+    result = addShapesToUFO(str(specPath), ufoPath)
+    assert result["shapes"] == 3
+    assert result["glyphWrites"] == 2
+    contours = readContours(ufoPath, "o")
+    expected = [ShapeOutline(specShape(spec)).contourPoints(flatTolerance) for spec in SPECS[:2]]
+    assert contours == expected
+    # whole numbers are written as ints, the way the tool writes them
+    assert contours[0][0][0] == (40, 60.0)
+    assert [type(value) for value in contours[0][0][0]] == [int, float]
+    contours = readContours(ufoPath, "period", "background")
+    assert contours == [ShapeOutline(specShape(SPECS[2])).contourPoints(flatTolerance)]
+
+
+def test_existing_contours_are_kept(tmp_path):
+    ufoPath = str(tmp_path / "Test.ufo")
+    first = tmp_path / "first.jsonl"
+    second = tmp_path / "second.csv"
+    writeSpecs(first, SPECS[:1])
+    addShapesToUFO(str(first), ufoPath)
+    with open(second, "w", encoding="utf-8") as f:
+        f.write("glyph,xMin,yMin,xMax,yMax,flatFactor_x\n")
+        f.write("o,0,0,100,50,\n")
+    addShapesToUFO(str(second), ufoPath)
+    contours = readContours(ufoPath, "o")
+    expected = [
+        ShapeOutline(specShape(SPECS[0])).contourPoints(flatTolerance),
+        ShapeOutline(specShape(dict(xMin=0, yMin=0, xMax=100, yMax=50))).contourPoints(flatTolerance),
+    ]
+    assert contours == expected
+
+
+def test_random_shapes_are_written_exactly(tmp_path):
+    rng = random.Random(3)
+    specs = []
+    for index in range(200):
+        x, y = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        specs.append(dict(
+            glyph="a", xMin=x, yMin=y, xMax=x + rng.uniform(30, 800), yMax=y + rng.uniform(30, 800),
+            flatFactor_x=rng.uniform(0, 1.5), flatFactor_y=rng.uniform(0, 1.5),
+            bcpFactor_x=rng.uniform(-.5, 1), bcpFactor_y=rng.uniform(-.5, 1),
+        ))
+    specPath = tmp_path / "shapes.jsonl"
+    ufoPath = str(tmp_path / "Test.ufo")
+    writeSpecs(specPath, specs)
+    addShapesToUFO(str(specPath), ufoPath)
+    expected = [ShapeOutline(specShape(spec)).contourPoints(flatTolerance) for spec in specs]
+    assert readContours(ufoPath, "a") == expected
@@ -0,0 +1,90 @@
+import pytest
+
+import the_symmetrical_round_shape_drawing_tool as toolModule
+from round_shape_drag import DragCoalescer
+from round_shape_replay import ReplayClock, StubPoint, makeGlyph
+
+
+def makeCoalescer():
+    clock = ReplayClock()
+    flushes = []
+    coalescer = DragCoalescer(lambda: flushes.append(clock.now), frameDuration=.01, schedule=clock.callLater, clock=clock)
+    return coalescer, clock, flushes
+
+
+def test_events_in_one_frame_flush_once():
+    coalescer, clock, flushes = makeCoalescer()
+    # the first event draws right away
+    coalescer.submit()
+    assert flushes == [0]
+    # the next four arrive within the frame and wait for its end
+    for now in (.001, .002, .003, .004):
+        clock.advance(now)
+        coalescer.submit()
+    assert flushes == [0]
+    assert coalescer.pending
+    assert coalescer.eventCount == 5
+    assert coalescer.mergedCount == 3
+    clock.advance(.02)
+    assert flushes == [0, pytest.approx(.01)]
+    assert coalescer.flushCount == 2
+    assert not coalescer.pending
+    assert coalescer.flush() is False
+    assert coalescer.asText() == "5 drag events, 3 merged, 2 redraws"
+
+
+def test_event_after_the_frame_flushes():
+    coalescer, clock, flushes = makeCoalescer()
+    coalescer.submit()
+    clock.advance(.05)
+    coalescer.submit()
+    assert flushes == [0, .05]
+    assert coalescer.mergedCount == 0
+    coalescer.reset()
+    assert (coalescer.eventCount, coalescer.mergedCount, coalescer.flushCount) == (0, 0, 0)
+
+
+def dragTool(coalesce):
+    # draw a shape, then drag the flats in steps of 2, all within one frame when coalesced
+    makeGlyph(0)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    clock = ReplayClock()
+    tool.dragCoalescer.clock = clock
+    tool.dragCoalescer.schedule = clock.callLater
+    tool.mouseDown(StubPoint(0, 0), 1)
+    x = y = 0
+    for step in range(20):
+        x += 10
+        y += 7
+        tool.mouseDragged(StubPoint(x, y), StubPoint(10, 7))
+        tool.dragCoalescer.flush()
+    tool.dragCoalescer.reset()
+    tool._modifiers = {"commandDown": True}
+    tool.modifiersChanged()
+    for step in range(8):
+        x += 2
+        y -= 2
+        tool.mouseDragged(StubPoint(x, y), StubPoint(2, -2))
+        if not coalesce:
+            tool.dragCoalescer.flush()
+    tool.dragCoalescer.flush()
+    return tool
+
+
+def test_tool_merges_drag_deltas():
+    tool = dragTool(coalesce=True)
+    coalescer = tool.dragCoalescer
+    # one redraw for the first event, one for the other seven
+    assert coalescer.eventCount == 8
+    assert coalescer.flushCount == 2
+    assert coalescer.mergedCount == 6
+    # the merged redraw has the sum of the deltas
+    assert tool.flatFactor_y == pytest.approx(8 * 2 * .005)
+    each = dragTool(coalesce=False)
+    assert each.dragCoalescer.flushCount == 8
+    assert each.dragCoalescer.mergedCount == 0
+    assert tool.shape.points() == each.shape.points()
+    assert tool.outline().coordinates == each.outline().coordinates
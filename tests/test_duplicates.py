@@ -0,0 +1,57 @@
+import contextlib
+
+import pytest
+
+import the_symmetrical_round_shape_drawing_tool as toolModule
+from round_shape_duplicates import getFontContourIndex
+from round_shape_geometry import RoundShape, ShapeOutline
+from round_shape_replay import StubPoint, StubWorld
+
+fontshell = pytest.importorskip("fontParts.fontshell")
+
+
+@pytest.fixture
+def glyph(monkeypatch):
+    # a fontParts glyph, it posts Glyph.Changed like the glyphs in RoboFont
+    monkeypatch.setattr(fontshell.RGlyph, "undo", lambda self, title=None: contextlib.nullcontext(), raising=False)
+    font = fontshell.RFont()
+    glyph = font.newGlyph("o")
+    pointPen = glyph.getPointPen()
+    for index in range(100):
+        x = (index % 10) * 30
+        y = (index // 10) * 30
+        ShapeOutline(RoundShape(x, y, x + 20, y + 20, .25, 0, .2, .2)).drawPoints(pointPen)
+    monkeypatch.setattr(StubWorld, "font", font)
+    monkeypatch.setattr(StubWorld, "glyph", glyph)
+    return glyph
+
+
+def drawShape(tool, x, y, steps=30):
+    tool.mouseDown(StubPoint(x, y), 1)
+    for step in range(steps):
+        x += 10
+        y += 6
+        tool.mouseDragged(StubPoint(x, y), StubPoint(10, 6))
+    tool.mouseUp(StubPoint(x, y))
+
+
+def test_adding_shapes_reads_the_glyph_once(glyph):
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    index = getFontContourIndex(glyph.font)
+    readCount = index.readCount
+    for shape in range(5):
+        drawShape(tool, 500 + shape * 400, 0)
+    assert len(glyph) == 105
+    assert index.readCount == readCount + 1
+    # the same shape again is found without reading the glyph
+    drawShape(tool, 500, 0)
+    assert len(glyph) == 105
+    assert index.readCount == readCount + 1
+    # an edit of the glyph is not the tool's own write
+    glyph[-1].moveBy((0, 1000))
+    drawShape(tool, 500 + 4 * 400, 0)
+    assert len(glyph) == 106
+    assert index.readCount == readCount + 2
@@ -0,0 +1,108 @@
+import pytest
+
+import the_symmetrical_round_shape_drawing_tool as toolModule
+from round_shape_history import ParameterHistory
+from round_shape_replay import StubPoint, makeGlyph
+
+
+def recorded(history):
+    # all snapshots, oldest first, without moving the cursor for good
+    position = history.position
+    history.step(-len(history))
+    snapshots = [history.current()]
+    while True:
+        values = history.step(1)
+        if values is None:
+            break
+        snapshots.append(values)
+    history.step(position - history.position)
+    return snapshots
+
+
+def test_record_and_current():
+    history = ParameterHistory(2, size=4)
+    assert len(history) == 0
+    assert history.current() is None
+    assert history.step(-1) is None
+    assert history.record([1, 2])
+    # the same snapshot again is not recorded
+    assert not history.record((1, 2))
+    assert len(history) == 1
+    assert history.current() == (1.0, 2.0)
+    with pytest.raises(ValueError):
+        history.record([1, 2, 3])
+    history.clear()
+    assert len(history) == 0
+    assert history.position == -1
+
+
+def test_wraparound():
+    history = ParameterHistory(2, size=4)
+    for index in range(10):
+        history.record([index, -index])
+    # only the last 4 are left, the oldest first
+    assert len(history) == 4
+    assert history.position == 3
+    assert recorded(history) == [(6, -6), (7, -7), (8, -8), (9, -9)]
+    assert history.step(-10) == (6, -6)
+    assert history.position == 0
+    assert history.step(-1) is None
+
+
+def test_step_back_and_forward():
+    history = ParameterHistory(1, size=4)
+    for index in range(6):
+        history.record([index])
+    assert history.step(-1) == (4,)
+    assert history.step(-2) == (2,)
+    assert history.step(1) == (3,)
+    # forward stops at the newest
+    assert history.step(5) == (5,)
+    assert history.step(1) is None
+    assert history.current() == (5,)
+
+
+def test_record_after_step_back_drops_the_redo_frames():
+    history = ParameterHistory(1, size=4)
+    for index in range(6):
+        history.record([index])
+    history.step(-2)
+    assert history.record([10])
+    assert len(history) == 3
+    assert recorded(history) == [(2,), (3,), (10,)]
+    assert history.step(1) is None
+    # filling it up again wraps around from there
+    for index in range(11, 14):
+        history.record([index])
+    assert recorded(history) == [(10,), (11,), (12,), (13,)]
+
+
+def test_tool_history_wraps_around():
+    makeGlyph(0)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.mouseDown(StubPoint(0, 0), 1)
+    frames = []
+    x = y = 0
+    for step in range(tool.HISTORY_SIZE + 50):
+        x += 1
+        y += 2
+        tool.mouseDragged(StubPoint(x, y), StubPoint(1, 2))
+        tool.dragCoalescer.flush()
+        if tool.shape is not None:
+            frames.append((tool.xMax, tool.yMax))
+    assert len(frames) > tool.HISTORY_SIZE
+    assert len(tool.history) == tool.HISTORY_SIZE
+    # back 10 frames, and forward 4
+    tool.stepHistory(-10)
+    assert (tool.shape.xMax, tool.shape.yMax) == frames[-11]
+    tool.stepHistory(4)
+    assert (tool.shape.xMax, tool.shape.yMax) == frames[-7]
+    # the next drag goes on from there and forgets the frames after it
+    position = tool.history.position
+    tool.mouseDragged(StubPoint(x + 1, y + 2), StubPoint(1, 2))
+    tool.dragCoalescer.flush()
+    assert tool.history.position == position + 1
+    assert len(tool.history) == position + 2
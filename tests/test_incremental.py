@@ -0,0 +1,100 @@
+import copy
+import random
+
+import pytest
+
+import the_symmetrical_round_shape_drawing_tool as toolModule
+from round_shape_replay import StubPoint, makeGlyph
+
+
+MODIFIERS = [
+    {},
+    {"commandDown": True},
+    {"optionDown": True},
+    {"shiftDown": True},
+    {"commandDown": True, "controlDown": True},
+    {"optionDown": True, "controlDown": True},
+    {"optionDown": True, "shiftDown": True},
+]
+
+
+def fullRecompute(tool):
+    # the shape calculate() makes when it has to do everything again
+    full = copy.copy(tool)
+    full._dirty = {"bounds"}
+    full.calculate()
+    return full.shape
+
+
+def assertSameShape(shape, expected):
+    assert shape.key() == expected.key()
+    assert shape.tangents() == expected.tangents()
+    assert shape.bcps() == expected.bcps()
+    assert shape.points() == expected.points()
+
+
+def playSession(seed, steps=120):
+    rng = random.Random(seed)
+    makeGlyph(4)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    x, y = rng.randint(-200, 200), rng.randint(-200, 200)
+    tool.mouseDown(StubPoint(x, y), 1)
+    checked = 0
+    for step in range(steps):
+        if rng.random() < .08:
+            tool._modifiers = rng.choice(MODIFIERS)
+            tool.modifiersChanged()
+        dx, dy = rng.uniform(-12, 12), rng.uniform(-12, 12)
+        x += dx
+        y += dy
+        tool.mouseDragged(StubPoint(x, y), StubPoint(dx, dy))
+        # calculate every event, not once per frame
+        tool.dragCoalescer.flush()
+        if tool.shape is None:
+            continue
+        assertSameShape(tool.shape, fullRecompute(tool))
+        checked += 1
+    tool.mouseUp(StubPoint(x, y))
+    return checked
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_incremental_matches_full_recompute(seed):
+    assert playSession(seed) > 0
+
+
+def test_flats_and_curves_drags_are_incremental():
+    # after sizing, flats and curves drags do not make a new RoundShape
+    makeGlyph(4)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.mouseDown(StubPoint(0, 0), 1)
+    for step in range(1, 30):
+        tool.mouseDragged(StubPoint(step * 10, step * 7), StubPoint(10, 7))
+        tool.dragCoalescer.flush()
+    calls = []
+    original = toolModule.RoundShape
+
+    def countingRoundShape(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    toolModule.RoundShape = countingRoundShape
+    try:
+        for modifiers in ({"commandDown": True}, {"optionDown": True}):
+            tool._modifiers = modifiers
+            tool.modifiersChanged()
+            for step in range(20):
+                tool.mouseDragged(StubPoint(290 + step, 203 - step), StubPoint(1, -1))
+                tool.dragCoalescer.flush()
+                assertSameShape(tool.shape, fullRecompute(tool))
+            # fullRecompute makes one per event, the drag itself none
+            assert len(calls) == 20
+            del calls[:]
+    finally:
+        toolModule.RoundShape = original
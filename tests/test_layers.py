@@ -0,0 +1,164 @@
+import the_symmetrical_round_shape_drawing_tool as toolModule
+from round_shape_layers import RetainedSymbolLayers, RetainedTextLayer
+from round_shape_replay import StubLayer, StubPoint, makeGlyph
+
+
+# the dots in the order updateShapeLayers passes them
+VERTICAL_TANGENTS = range(0, 4)
+HORIZONTAL_TANGENTS = range(4, 8)
+VERTICAL_BCPS = range(8, 12)
+HORIZONTAL_BCPS = range(12, 16)
+CENTER = 16
+
+STACKED = (0, .5, 1, 1)
+UNSTACKED = (1, .5, 0, 1)
+
+
+def test_symbol_layers_only_write_changes():
+    layers = [StubLayer() for index in range(3)]
+    retained = RetainedSymbolLayers(layers)
+    attributes = [((0, 0), 4, UNSTACKED), ((10, 0), 4, UNSTACKED), ((20, 0), 4, STACKED)]
+    retained.update(attributes)
+    assert [layer.writeCount for layer in layers] == [2, 2, 2]
+    retained.update(attributes)
+    assert retained.writeCount == 6
+    # one dot moves, one changes colour
+    attributes[0] = ((1, 0), 4, UNSTACKED)
+    attributes[2] = ((20, 0), 4, UNSTACKED)
+    retained.update(attributes)
+    assert [layer.writeCount for layer in layers] == [3, 2, 3]
+    assert layers[0].position == (1, 0)
+    assert layers[2].imageSettings["fillColor"] == UNSTACKED
+    retained.reset()
+    retained.update(attributes)
+    assert retained.writeCount == 14
+
+
+def test_text_layer_only_writes_changes():
+    layer = StubLayer()
+    retained = RetainedTextLayer(layer)
+    retained.update((0, 0), "a")
+    retained.update((0, 0), "a")
+    assert layer.writeCount == 2
+    retained.update((0, 0), "b")
+    assert layer.writeCount == 3
+    retained.update((5, 0), "b")
+    assert layer.writeCount == 4
+
+
+class WriteCounter(object):
+
+    # the writes to each dot and to the caption during one event
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.dots = tool.dots.getSublayers()
+        self.start()
+
+    def start(self):
+        self._dots = [layer.writeCount for layer in self.dots]
+        self._images = [layer.imageSettings for layer in self.dots]
+        self._caption = self.tool.captionLayer.writeCount
+
+    def dotWrites(self):
+        return [layer.writeCount - count for layer, count in zip(self.dots, self._dots)]
+
+    def imageWrites(self):
+        return [index for index, (layer, settings) in enumerate(zip(self.dots, self._images)) if layer.imageSettings is not settings]
+
+    def captionWrites(self):
+        return self.tool.captionLayer.writeCount - self._caption
+
+
+def makeTool():
+    makeGlyph(0)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.mouseDown(StubPoint(0, 0), 1)
+    return tool
+
+
+def drag(tool, x, y, dx, dy):
+    tool.mouseDragged(StubPoint(x, y), StubPoint(dx, dy))
+    tool.dragCoalescer.flush()
+
+
+def sizeShape(tool, steps=20):
+    # a horizontal shape, flat y stays 0 so the vertical tangents are stacked
+    for step in range(1, steps + 1):
+        drag(tool, step * 10, step * 6, 10, 6)
+    return steps * 10, steps * 6
+
+
+def setModifiers(tool, modifiers):
+    tool._modifiers = modifiers
+    tool.modifiersChanged()
+
+
+def test_size_drag_moves_every_dot_once():
+    tool = makeTool()
+    x, y = sizeShape(tool)
+    counter = WriteCounter(tool)
+    for step in range(10):
+        counter.start()
+        x += 7
+        y += 3
+        drag(tool, x, y, 7, 3)
+        assert counter.dotWrites() == [1] * 17
+        assert counter.imageWrites() == []
+        assert counter.captionWrites() == 2
+
+
+def test_curves_drag_only_writes_the_moved_bcps():
+    tool = makeTool()
+    x, y = sizeShape(tool)
+    setModifiers(tool, {"optionDown": True})
+    counter = WriteCounter(tool)
+    for step in range(10):
+        counter.start()
+        before = tool.shape
+        # left, the horizontal bcps only
+        x -= 4
+        drag(tool, x, y, -4, 0)
+        expected = [0] * 17
+        if tool.shape.bcps()[:2] != before.bcps()[:2]:
+            for index in HORIZONTAL_BCPS:
+                expected[index] = 1
+        assert counter.dotWrites() == expected
+        assert counter.imageWrites() == []
+        # the center stays, only the text changes
+        assert counter.captionWrites() <= 1
+
+
+def test_flats_drag_swaps_the_colour_once_when_stacked_dots_come_apart():
+    tool = makeTool()
+    x, y = sizeShape(tool)
+    assert tool.shape.t1_v == tool.shape.t2_v
+    setModifiers(tool, {"commandDown": True})
+    counter = WriteCounter(tool)
+    # down, the vertical flat opens up
+    counter.start()
+    y -= 5
+    drag(tool, x, y, 0, -5)
+    assert tool.shape.t1_v != tool.shape.t2_v
+    writes = counter.dotWrites()
+    assert counter.imageWrites() == list(VERTICAL_TANGENTS)
+    for index in VERTICAL_TANGENTS:
+        # moved and the colour flipped
+        assert writes[index] == 2
+        assert tool.dots.getSublayers()[index].imageSettings["fillColor"] == UNSTACKED
+    for index in VERTICAL_BCPS:
+        assert writes[index] == 1
+    for index in list(HORIZONTAL_TANGENTS) + list(HORIZONTAL_BCPS) + [CENTER]:
+        assert writes[index] == 0
+    # further on the dots only move
+    for step in range(5):
+        counter.start()
+        y -= 5
+        drag(tool, x, y, 0, -5)
+        writes = counter.dotWrites()
+        assert counter.imageWrites() == []
+        assert sum(writes) == 8
+        assert all(writes[index] == 1 for index in list(VERTICAL_TANGENTS) + list(VERTICAL_BCPS))
@@ -0,0 +1,77 @@
+import pytest
+
+import round_shape_geometry
+from round_shape_bulk import addShapeToMasters
+from round_shape_geometry import MasterShapes, RoundShape, ShapeOutline, flatTolerance
+from round_shape_replay import StubGlyph
+
+
+# a light master with flats of 4 units, a bold one with long flats
+BOUNDS = [(0, 0, 200, 200), (-20, -10, 420, 300)]
+FLATFACTORS = [(.02, .02), (.25, .5)]
+BCPFACTORS = [(.55, .55), (.2, .3)]
+
+
+def structure(contour):
+    return [(segmentType, smooth) for pt, segmentType, smooth in contour]
+
+
+def glyphStructure(glyph):
+    return [[point.type for point in contour.points] for contour in glyph.contours]
+
+
+@pytest.fixture(params=["numpy", "scalar"])
+def numpyOrNot(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(round_shape_geometry, "_numpy", None)
+    return request.param
+
+
+def test_short_flats_in_one_master_are_kept(numpyOrNot):
+    masterShapes = MasterShapes.calculate(BOUNDS, FLATFACTORS, BCPFACTORS, flatTolerance)
+    # on its own the light master leaves out its flats, but for the closing
+    # one, the bold one keeps them all
+    light = RoundShape(*BOUNDS[0], *FLATFACTORS[0], *BCPFACTORS[0])
+    bold = RoundShape(*BOUNDS[1], *FLATFACTORS[1], *BCPFACTORS[1])
+    assert len(ShapeOutline(light).contourPoints(flatTolerance)) == 13
+    assert len(ShapeOutline(bold).contourPoints(flatTolerance)) == 16
+    contours = masterShapes.contourPoints()
+    assert len(contours) == 2
+    assert structure(contours[0]) == structure(contours[1])
+    assert len(contours[0]) == 16
+    # the points are those of each master
+    for contour, shape in zip(contours, (light, bold)):
+        assert sorted(pt for pt, segmentType, smooth in contour) == sorted(tuple(map(float, pt)) for pt in shape.points())
+
+
+def test_flats_short_in_all_masters_are_left_out(numpyOrNot):
+    bounds = [(0, 0, 200, 200), (0, 0, 300, 300)]
+    flatFactors = [(.02, 0), (.01, 0)]
+    bcpFactors = [(.55, .55), (.55, .55)]
+    contours = MasterShapes.calculate(bounds, flatFactors, bcpFactors, flatTolerance).contourPoints()
+    assert structure(contours[0]) == structure(contours[1])
+    assert len(contours[0]) == 12
+    for contour, box, factors in zip(contours, bounds, flatFactors):
+        shape = RoundShape(*box, *factors, .55, .55)
+        assert contour == ShapeOutline(shape).contourPoints(flatTolerance)
+
+
+def test_numpy_and_scalar_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    contours = MasterShapes.calculate(BOUNDS, FLATFACTORS, BCPFACTORS, flatTolerance).contourPoints()
+    monkeypatch.setattr(round_shape_geometry, "_numpy", None)
+    assert MasterShapes.calculate(BOUNDS, FLATFACTORS, BCPFACTORS, flatTolerance).contourPoints() == contours
+
+
+def test_add_shape_to_masters(numpyOrNot):
+    glyphs = [StubGlyph("a"), StubGlyph("a")]
+    report = addShapeToMasters(BOUNDS, FLATFACTORS, BCPFACTORS, glyphs)
+    assert report.glyphCount == 2
+    assert len(glyphs[0].contours) == len(glyphs[1].contours) == 1
+    assert glyphStructure(glyphs[0]) == glyphStructure(glyphs[1])
+    assert glyphStructure(glyphs[0])[0].count("line") == 4
+    assert [glyph.undoCount for glyph in glyphs] == [1, 1]
+    with pytest.raises(ValueError):
+        addShapeToMasters(BOUNDS, FLATFACTORS, BCPFACTORS, glyphs[:1])
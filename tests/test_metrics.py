@@ -0,0 +1,56 @@
+import math
+import random
+
+import pytest
+
+from round_shape_geometry import RoundShape, calculateShapes, circleFactor
+from round_shape_metrics import batchMetrics, shapeMetrics
+
+
+@pytest.mark.parametrize("bcpFactor", [0, .3, circleFactor, 1])
+def test_rectangle(bcpFactor):
+    # flats of 1 leave no curves, whatever the bcps
+    metrics = shapeMetrics(RoundShape(10, 20, 310, 220, 1, 1, bcpFactor, bcpFactor).points())
+    # the tool draws clockwise
+    assert metrics.area == -300 * 200
+    assert metrics.length == 2 * (300 + 200)
+    assert metrics.bounds == (10, 20, 310, 220)
+
+
+@pytest.mark.parametrize("radius", [1, 100, 2500])
+def test_circle(radius):
+    shape = RoundShape(-radius, -radius, radius, radius, 0, 0, circleFactor, circleFactor)
+    metrics = shapeMetrics(shape.translated(300, -40).points())
+    # the four cubics are within 0.03% of the circle
+    assert -metrics.area == pytest.approx(math.pi * radius * radius, rel=3e-4)
+    assert metrics.length == pytest.approx(2 * math.pi * radius, rel=2e-4)
+    assert metrics.bounds == pytest.approx((300 - radius, -40 - radius, 300 + radius, -40 + radius))
+    assert metrics.joinCurvature == pytest.approx(1, abs=.025)
+
+
+def test_stadium():
+    # flats of 200 between two half circles of radius 100
+    metrics = shapeMetrics(RoundShape(0, 0, 400, 200, .5, 0, circleFactor, circleFactor).points())
+    assert -metrics.area == pytest.approx(200 * 200 + math.pi * 100 * 100, rel=3e-4)
+    assert metrics.length == pytest.approx(2 * 200 + 2 * math.pi * 100, rel=2e-4)
+
+
+def test_negative_bcps_reach_outside_the_box():
+    metrics = shapeMetrics(RoundShape(0, 0, 200, 200, 0, 0, -.5, -.5).points())
+    xMin, yMin, xMax, yMax = metrics.bounds
+    assert xMin < 0 and yMin < 0 and xMax > 200 and yMax > 200
+
+
+def test_batch_metrics_as_shape_metrics():
+    pytest.importorskip("numpy")
+    rng = random.Random(1)
+    bounds = [(rng.uniform(-500, 500), rng.uniform(-500, 500), rng.uniform(-500, 500), rng.uniform(-500, 500)) for index in range(50)]
+    flatFactors = [(rng.uniform(0, 1.5), rng.uniform(0, 1.5)) for index in range(50)]
+    bcpFactors = [(rng.uniform(-.5, 1), rng.uniform(-.5, 1)) for index in range(50)]
+    points = calculateShapes(bounds, flatFactors, bcpFactors)
+    batch = batchMetrics(points)
+    for index, row in enumerate(points):
+        metrics = shapeMetrics(row)
+        assert batch["area"][index] == pytest.approx(metrics.area)
+        assert batch["length"][index] == pytest.approx(metrics.length)
+        assert batch["joinCurvature"][index] == pytest.approx(metrics.joinCurvature)
@@ -0,0 +1,112 @@
+import math
+import random
+
+import pytest
+
+from round_shape_geometry import RoundShape, ShapeOutline, flatTolerance
+
+pytest.importorskip("fontTools")
+from fontTools.pens.pointPen import SegmentToPointPen  # noqa: E402
+from fontTools.pens.recordingPen import RecordingPointPen  # noqa: E402
+
+
+def baselineContour(shape):
+    # the contour the way the tool used to add it: into the segment pen of
+    # the glyph, the flats of 5 units or less left out
+    def notClose(pt1, pt2):
+        return math.hypot(pt1[0] - pt2[0], pt1[1] - pt2[1]) > 5
+
+    points = shape.points()
+    recording = RecordingPointPen()
+    pen = SegmentToPointPen(recording, guessSmooth=True)
+    pen.moveTo(points[0])
+    for index in range(1, 16, 4):
+        pen.curveTo(*points[index:index+3])
+        if index < 13 and notClose(points[index+2], points[index+3]):
+            pen.lineTo(points[index+3])
+    pen.closePath()
+    return [
+        (args[0], args[1], args[2])
+        for method, args, kwargs in recording.value if method == "addPoint"
+    ]
+
+
+def typed(contour):
+    return [((type(x), x), (type(y), y)) for (x, y), segmentType, smooth in contour]
+
+
+def randomShape(rng, integral=True):
+    if integral:
+        x, y = rng.randint(-500, 500), rng.randint(-500, 500)
+        width, height = rng.randint(21, 800), rng.randint(21, 800)
+    else:
+        x, y = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        width, height = rng.uniform(21, 800), rng.uniform(21, 800)
+    return RoundShape(
+        x, y, x + width, y + height,
+        rng.choice([0, .25, rng.uniform(0, 1.5)]), rng.choice([0, rng.uniform(0, 1.5)]),
+        rng.choice([.2, rng.uniform(-.5, 1)]), rng.choice([.2, rng.uniform(-.5, 1)])
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_points_keep_their_number_types(seed):
+    rng = random.Random(seed)
+    for index in range(50):
+        shape = randomShape(rng, integral=index % 2 == 0)
+        contour = ShapeOutline(shape).contourPoints(flatTolerance)
+        assert typed(contour) == typed(baselineContour(shape))
+
+
+def drawnContour(outline, **kwargs):
+    recording = RecordingPointPen()
+    outline.drawPoints(recording, **kwargs)
+    methods = [method for method, args, kwargs in recording.value]
+    assert methods[0] == "beginPath" and methods[-1] == "endPath"
+    return [
+        (args[0], args[1], args[2])
+        for method, args, kwargs in recording.value if method == "addPoint"
+    ]
+
+
+@pytest.mark.parametrize("shape", [
+    # no flats at all
+    RoundShape(0, 0, 300, 200, 0, 0, .2, .2),
+    RoundShape(0, 0, 200, 200, 0, 0, .55, .55),
+    # flats of 5 units and less are left out, longer ones are kept
+    RoundShape(0, 0, 200, 200, .025, .02, .2, .2),
+    RoundShape(0, 0, 200, 200, .03, .026, .2, .2),
+    # flats, and flats over 1
+    RoundShape(-100, 40, 300, 200, .25, .5, .2, .2),
+    RoundShape(0, 0, 300, 200, 1.5, 1.2, .3, -.2),
+    # straight bcps make corner points
+    RoundShape(0, 0, 300, 200, .5, .5, 0, 0),
+    RoundShape(0, 0, 300, 200, 0, 0, 1, 1),
+])
+def test_draw_points_as_the_segment_pen(shape):
+    contour = drawnContour(ShapeOutline(shape), flatTolerance=flatTolerance)
+    assert contour == baselineContour(shape)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_draw_points_as_the_segment_pen_random(seed):
+    rng = random.Random(seed)
+    for index in range(50):
+        shape = randomShape(rng, integral=index % 2 == 0)
+        contour = drawnContour(ShapeOutline(shape), flatTolerance=flatTolerance)
+        assert contour == baselineContour(shape)
+        assert typed(contour) == typed(baselineContour(shape))
+
+
+def test_draw_points_drops_flats():
+    shape = RoundShape(0, 0, 200, 200, .02, 0, .2, .2)
+    outline = ShapeOutline(shape)
+    # a circle with two short flats: only the curves
+    contour = drawnContour(outline, flatTolerance=flatTolerance)
+    assert [segmentType for pt, segmentType, smooth in contour].count("line") == 0
+    assert len(contour) == 12
+    assert all(smooth for pt, segmentType, smooth in contour if segmentType is not None)
+    # with a smaller tolerance the flats of 4 units stay, the flats of none do not
+    contour = drawnContour(outline, flatTolerance=3)
+    assert [segmentType for pt, segmentType, smooth in contour].count("line") == 2
+    assert len(contour) == 14
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from round_shape_geometry import RoundShape, circleFactor, pointsToSegments
+from round_shape_polygon import RoundPolygon, polygonTable
+
+
+class RecordingPen(object):
+
+    def __init__(self):
+        self.value = []
+
+    def __getattr__(self, name):
+        return lambda *pts: self.value.append((name, pts))
+
+
+def randomShape(rng):
+    x, y = rng.choice([rng.randint(-500, 500), rng.uniform(-500, 500)]), rng.uniform(-500, 500)
+    width, height = rng.choice([rng.randint(1, 800), rng.uniform(1, 800)]), rng.uniform(1, 800)
+    return RoundShape(
+        x, y, x + width, y + height,
+        rng.choice([0, .25, 1, rng.uniform(0, 1.5)]), rng.choice([0, rng.uniform(0, 1.5)]),
+        rng.choice([.2, circleFactor, rng.uniform(-.5, 1)]), rng.choice([.2, rng.uniform(-.5, 1)])
+    )
+
+
+def rounded(points):
+    return sorted((round(x, 6), round(y, 6)) for x, y in points)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_four_sides_as_round_shape(seed):
+    rng = random.Random(seed)
+    for index in range(100):
+        shape = randomShape(rng)
+        polygon = RoundPolygon.fromRoundShape(shape)
+        # the same to the bit
+        assert polygon.points() == shape.points()
+        assert polygon.segments() == pointsToSegments(shape.points())
+
+
+@pytest.mark.parametrize("sides", [3, 5, 7, 9, 6])
+def test_point_count_and_symmetry(sides):
+    xMin, yMin, xMax, yMax = -40, 10, 360, 290
+    polygon = RoundPolygon(xMin, yMin, xMax, yMax, sides, .3, circleFactor)
+    points = polygon.points()
+    assert len(points) == 4 * sides
+    segments = polygon.segments()
+    assert [segmentType for segmentType, pts in segments].count("curveTo") == sides
+    assert [segmentType for segmentType, pts in segments].count("lineTo") == sides - 1
+    assert sum(len(pts) for segmentType, pts in segments) == 4 * sides
+    # the flat of side 0 is on the left of the box
+    (x1, y1), (x2, y2) = polygon.tangents()[0]
+    assert x1 == x2 == xMin
+    assert y1 < y2
+    # mirrored over the horizontal middle of the box, the points are the same
+    mirrored = [(x, yMin + yMax - y) for x, y in points]
+    assert rounded(mirrored) == rounded(points)
+    # the corners touch the box
+    vertices = polygonTable(sides).vertices
+    assert min(x for x, y in vertices) == 0 and max(x for x, y in vertices) == 1
+    assert min(y for x, y in vertices) == 0 and max(y for x, y in vertices) == 1
+    for x, y in points:
+        assert xMin - 1e-9 <= x <= xMax + 1e-9
+        assert yMin - 1e-9 <= y <= yMax + 1e-9
+
+
+@pytest.mark.parametrize("sides", [3, 5])
+def test_short_flats_left_out(sides):
+    polygon = RoundPolygon(0, 0, 300, 300, sides, 0, .2)
+    pen = polygon.draw(RecordingPen(), flatTolerance=5)
+    assert [name for name, pts in pen.value] == ["moveTo"] + ["curveTo"] * sides + ["closePath"]
+    pen = polygon.draw(RecordingPen())
+    assert [name for name, pts in pen.value].count("lineTo") == sides - 1
+
+
+def test_factors():
+    with pytest.raises(ValueError):
+        RoundPolygon(0, 0, 100, 100, 2, 0, .2)
+    with pytest.raises(ValueError):
+        RoundPolygon(0, 0, 100, 100, 5, [0, 0], .2)
+    # one factor per corner, or a pair, are the same when the pair is equal
+    one = RoundPolygon(0, 0, 100, 100, 5, .2, [.1, .2, .3, .4, .5])
+    pairs = RoundPolygon(0, 0, 100, 100, 5, .2, [(.1, .1), (.2, .2), (.3, .3), (.4, .4), (.5, .5)])
+    assert one.points() == pairs.points()
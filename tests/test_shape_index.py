@@ -0,0 +1,91 @@
+import the_symmetrical_round_shape_drawing_tool as toolModule
+from round_shape_lib import getFontShapeIndex
+from round_shape_replay import StubPoint, makeGlyph
+
+
+def drawShape(tool, start=(0, 0), steps=30):
+    x, y = start
+    tool.mouseDown(StubPoint(x, y), 1)
+    for step in range(steps):
+        x += 10
+        y += 6
+        tool.mouseDragged(StubPoint(x, y), StubPoint(10, 6))
+    tool.mouseUp(StubPoint(x, y))
+
+
+def makeTool():
+    glyph = makeGlyph(0)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.becomeActive()
+    return glyph, tool
+
+
+def curveMiddle(shape):
+    # halfway along the first curve, away from the on curve points
+    p0, p1, p2, p3 = shape.points()[:4]
+    return tuple(.125 * a + .375 * b + .375 * c + .125 * d for a, b, c, d in zip(p0, p1, p2, p3))
+
+
+def click(tool, x, y):
+    tool.mouseDown(StubPoint(x, y), 1)
+    editing = tool.editing
+    tool.mouseUp(StubPoint(x, y))
+    return editing
+
+
+def test_hit_test_skips_deleted_contours():
+    glyph, tool = makeTool()
+    drawShape(tool)
+    index = getFontShapeIndex(glyph.font)
+    (identifier, shape), = index.shapes(glyph).items()
+    x, y = shape.xMin, .5 * (shape.yMin + shape.yMax)
+    assert index.hitTest(glyph, x, y)[0] == identifier
+    # gone without a glyphChanged
+    glyph.removeContour(glyph.contours[0])
+    assert index.hitTest(glyph, x, y) is None
+
+
+def test_inactive_tool_forgets_the_glyph():
+    glyph, tool = makeTool()
+    drawShape(tool)
+    index = getFontShapeIndex(glyph.font)
+    shape, = index.shapes(glyph).values()
+    x, y = shape.xMin, .5 * (shape.yMin + shape.yMax)
+    assert click(tool, x, y) is not None
+    click(tool, 900, 900)
+    readCount = index.readCount
+    tool.becomeInactive()
+    glyph.removeContour(glyph.contours[0])
+    tool.becomeActive()
+    assert click(tool, x, y) is None
+    assert index.readCount == readCount + 1
+
+
+def test_drag_next_to_a_shape_draws_a_new_one():
+    glyph, tool = makeTool()
+    drawShape(tool)
+    index = getFontShapeIndex(glyph.font)
+    (identifier, shape), = index.shapes(glyph).items()
+    x, y = curveMiddle(shape)
+    assert index.hitTest(glyph, x, y) is not None
+    assert index.hitTest(glyph, x, y, onCurve=True) is None
+    drawShape(tool, start=(x, y))
+    assert len(glyph.contours) == 2
+    assert index.shapes(glyph)[identifier] == shape
+
+
+def test_on_curve_point_or_control_opens_a_shape():
+    glyph, tool = makeTool()
+    drawShape(tool)
+    index = getFontShapeIndex(glyph.font)
+    (identifier, shape), = index.shapes(glyph).items()
+    # the end of the top flat
+    assert click(tool, shape.t2_h + 3, shape.yMax - 3)[0] == identifier
+    x, y = curveMiddle(shape)
+    assert click(tool, x, y) is None
+    tool._modifiers = {"controlDown": True}
+    tool.modifiersChanged()
+    assert click(tool, x, y)[0] == identifier
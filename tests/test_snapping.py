@@ -0,0 +1,212 @@
+import itertools
+import math
+import random
+
+import pytest
+
+import the_symmetrical_round_shape_drawing_tool as toolModule
+from round_shape_replay import StubContour, StubPoint, makeGlyph
+from round_shape_snapping import GlyphSnapper, PointIndex, SnapTable, defaultSnapTables
+
+
+def makeSizedTool():
+    makeGlyph(0)
+    tool = toolModule.SymmetricalRoundShapeDrawingTool()
+    tool.snapToGlyph = False
+    tool._modifiers = {}
+    tool.modifiersChanged()
+    tool.mouseDown(StubPoint(0, 0), 1)
+    x = y = 0
+    for step in range(30):
+        x += 10
+        y += 7
+        tool.mouseDragged(StubPoint(x, y), StubPoint(10, 7))
+        tool.dragCoalescer.flush()
+    return tool, x, y
+
+
+def slowDrag(tool, x, y, modifiers, dx, dy, steps=200):
+    tool._modifiers = modifiers
+    tool.modifiersChanged()
+    for step in range(steps):
+        x += dx
+        y += dy
+        tool.mouseDragged(StubPoint(x, y), StubPoint(dx, dy))
+        tool.dragCoalescer.flush()
+    return x, y
+
+
+def test_default_flats_have_no_targets():
+    assert len(defaultSnapTables()["flats"]) == 0
+
+
+def test_slow_flats_drag_leaves_a_target():
+    tool, x, y = makeSizedTool()
+    tool.snapTables["flats"] = SnapTable([0])
+    assert tool.flatFactor_y == 0
+    # 2 units per event, .01 per event: less than the threshold every time
+    slowDrag(tool, x, y, {"commandDown": True}, 0, -2)
+    assert abs(tool.flatFactor_y - 1.5) < 1e-9
+    assert tool.shape.flatFactor_y == tool.flatFactor_y
+
+
+def test_slow_flats_drag_snaps_on_the_way():
+    tool, x, y = makeSizedTool()
+    tool.snapTables["flats"] = SnapTable([.5])
+    x, y = slowDrag(tool, x, y, {"commandDown": True}, 0, -2, steps=49)
+    # .49 unsnapped, .5 shown and committed
+    assert tool.flatFactor_y == .5
+    assert tool.shape.flatFactor_y == .5
+    slowDrag(tool, x, y, {"commandDown": True}, 0, -2, steps=4)
+    assert abs(tool.flatFactor_y - .53) < 1e-9
+
+
+def test_slow_bcps_drag_leaves_the_circle():
+    tool, x, y = makeSizedTool()
+    # option and control: .00025 per unit, far below the threshold per event
+    x, y = slowDrag(tool, x, y, {"optionDown": True}, 0, -2, steps=1)
+    tool.bcpFactor_y = toolModule.circleFactor
+    tool._dirty.add("bcps")
+    slowDrag(tool, x, y, {"optionDown": True, "controlDown": True}, 0, 4, steps=100)
+    assert abs(tool.bcpFactor_y - (toolModule.circleFactor + .1)) < 1e-9
+
+
+def test_values_set_elsewhere_are_not_overwritten():
+    tool, x, y = makeSizedTool()
+    tool.snapTables["flats"] = SnapTable([0])
+    x, y = slowDrag(tool, x, y, {"commandDown": True}, 0, -2, steps=1)
+    # the history or a reopened shape sets the factor, the drag goes on from there
+    tool.flatFactor_y = .8
+    slowDrag(tool, x, y, {"commandDown": True}, 0, -2, steps=1)
+    assert abs(tool.flatFactor_y - .81) < 1e-9
+
+
+def bruteNearest(points, x, y, threshold):
+    # every point at the smallest distance within threshold, or None
+    distances = [(math.hypot(px - x, py - y), (px, py)) for px, py in points]
+    distances = [(distance, point) for distance, point in distances if distance <= threshold]
+    if not distances:
+        return None
+    smallest = min(distance for distance, point in distances)
+    return max(point for distance, point in distances if distance == smallest)
+
+
+@pytest.mark.parametrize("cellSize", [4, 16, 64])
+def test_point_index_nearest(cellSize):
+    rng = random.Random(cellSize)
+    # integer points, so there are ties, on both sides of the cell borders
+    points = [(rng.randint(-100, 100), rng.randint(-100, 100)) for index in range(300)]
+    index = PointIndex(points, cellSize=cellSize)
+    assert len(index) == 300
+    for query in range(500):
+        x, y = rng.uniform(-110, 110), rng.choice([rng.uniform(-110, 110), rng.randint(-110, 110)])
+        threshold = rng.choice([2, 8, 20])
+        assert index.nearest(x, y, threshold) == bruteNearest(points, x, y, threshold)
+
+
+def test_point_index_cell_borders():
+    index = PointIndex([(15.5, 0), (-.5, -.5)], cellSize=16)
+    # the nearest point is in the next cell
+    assert index.nearest(16.5, 0, 2) == (15.5, 0)
+    assert index.nearest(.5, .5, 2) == (-.5, -.5)
+    # a point at the threshold counts, further away it does not
+    assert index.nearest(23.5, 0, 8) == (15.5, 0)
+    assert index.nearest(23.6, 0, 8) is None
+    # a threshold over the cell size looks further than the next cell
+    assert index.nearest(55.5, 0, 40) == (15.5, 0)
+    index.clear()
+    assert len(index) == 0
+    assert index.nearest(15.5, 0, 8) is None
+
+
+def test_point_index_ties():
+    points = [(0, 10), (10, 0), (0, -10), (-10, 0)]
+    for order in itertools.permutations(points):
+        for cellSize in (4, 10, 64):
+            index = PointIndex(order, cellSize=cellSize)
+            assert index.nearest(0, 0, 10) == (10, 0)
+
+
+class SnapGlyph(object):
+
+    # only what GlyphSnapper looks at
+
+    def __init__(self, points, bounds=None, font=None):
+        contour = StubContour()
+        contour.points = [StubPoint(x, y, type) for x, y, type in points]
+        self.contours = [contour]
+        self.bounds = bounds
+        self.font = font
+
+
+def test_glyph_snapper():
+    font = makeGlyph(0).font
+    font.info.xHeight = 500
+    font.info.capHeight = 700
+    glyph = SnapGlyph([
+        (100, 100, "line"), (100, 300, "curve"), (200, 400, "offcurve"), (300, 400, "qcurve"),
+    ], bounds=(50, -20, 320, 410), font=font)
+    snapper = GlyphSnapper(threshold=8)
+    snapper.build(glyph)
+    assert len(snapper.points) == 3
+    assert snapper.xValues == [50, 320]
+    assert snapper.yValues == [-20, 0, 410, 500, 700]
+    # on curve points first
+    assert snapper.snap(104, 95) == (100, 100)
+    assert snapper.snap(305, 396) == (300, 400)
+    # off curve points are no targets
+    assert snapper.snap(203, 402) == (203, 410)
+    # x and y snap to the lines on their own
+    assert snapper.snap(55, 497) == (50, 500)
+    assert snapper.snap(150, 3) == (150, 0)
+    assert snapper.snap(150, 150) == (150, 150)
+    # between two lines the nearest one
+    assert snapper.snap(150, 702) == (150, 700)
+    snapper.clear()
+    assert snapper.snap(104, 95) == (104, 95)
+
+
+def test_snap_table_values():
+    table = SnapTable([.2, .5, .8], threshold=.05)
+    for axis in ("x", "y"):
+        # below, near and above the first and last targets
+        assert table.snap(0, axis) == 0
+        assert table.snap(.16, axis) == .2
+        assert table.snap(.83, axis) == .8
+        assert table.snap(1.2, axis) == 1.2
+        # between two targets the nearest one, or none when both are too far
+        assert table.snap(.46, axis) == .5
+        assert table.snap(.53, axis) == .5
+        assert table.snap(.35, axis) == .35
+        # on a target
+        assert table.snap(.5, axis) == .5
+
+
+def test_snap_table_ties_and_axes():
+    table = SnapTable([0, 1], threshold=.5)
+    # halfway between two targets the larger one wins
+    assert table.snap(.5, "x") == 1
+    table = SnapTable(threshold=.05)
+    table.add(.3, "x")
+    table.addValues([.6, .3, .6])
+    assert table.values == dict(x=[.3, .6], y=[.3, .6])
+    table.add(.1, "y")
+    assert len(table) == 5
+    assert table.snap(.12, "x") == .12
+    assert table.snap(.12, "y") == .1
+    table.clear()
+    assert len(table) == 0
+    assert table.snap(.31, "x") == .31
+
+
+def test_snap_table_update():
+    table = SnapTable()
+    table.update({"both": [.4], "x": [.25], "threshold": .01})
+    assert table.threshold == .01
+    assert table.values == dict(x=[.25, .4], y=[.4])
+    assert table.snap(.245, "x") == .25
+    assert table.snap(.245, "y") == .245
+    table.update([0])
+    assert table.values == dict(x=[0, .25, .4], y=[0, .4])
+    with pytest.raises(ValueError):
+        table.update({"z": [1]})